@@ -16,4 +16,9 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-"""Top-level package for Random Log Generator."""
+# Top-level package for Random Log Generator.
+
+import time
+
+# time the package is imported, to measure the startup
+STARTED = time.perf_counter()
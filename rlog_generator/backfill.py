@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Backfill for rlog_generator.
+
+Logs of a past time range are generated as fast as possible: a simulated
+clock gives the timestamp of each log, advancing by the eps of pattern,
+optionally with jitter and a diurnal shape, or following the load profile
+of pattern, or the timing of a replayed file, over the range, and logs
+are written in large chunks.
+"""
+
+import bisect
+import itertools
+import logging
+import math
+import random
+import time
+from typing import Any, Dict, Iterator, List
+
+from . import corpus, metrics, profiles
+from . import rlog_generator as generator
+from .profiles import DEFAULT_DIURNAL_PEAK, diurnal_factor
+
+
+# logs rendered and written with a single write
+CHUNK_SIZE = 10000
+
+# size of file buffer
+BUFFER_SIZE = 1024 * 1024
+
+# min factor of eps of diurnal shape: with an amplitude close to 1 the
+# interval at the trough would jump over the rest of the range
+MIN_DIURNAL_FACTOR = 0.01
+
+
+log = logging.getLogger(__name__)
+
+
+def count_timestamps(start: float, end: float, eps: float) -> int:
+    """Return the number of timestamps of range [start, end) at a
+    constant eps, as yielded by timestamps without diurnal shape
+
+    Arguments:
+        start {float} -- start of range as seconds since the epoch
+        end {float} -- end of range as seconds since the epoch
+        eps {float} -- events per second
+
+    Returns:
+        int -- number of timestamps
+    """
+    return max(0, math.ceil((end - start) * eps))
+
+
+def timestamps(
+    start: float,
+    end: float,
+    eps: float,
+    jitter: float = 0.0,
+    diurnal: float = 0.0,
+    peak_hour: float = DEFAULT_DIURNAL_PEAK,
+    rng: Any = random,
+) -> Iterator[float]:
+    """Yield the timestamps of logs in [start, end) on a simulated clock
+
+    Arguments:
+        start {float} -- start of range as seconds since the epoch
+        end {float} -- end of range as seconds since the epoch
+        eps {float} -- mean events per second
+
+    Keyword Arguments:
+        jitter {float} -- random shift of each log, as fraction of the
+                          interval between logs in [0, 1) (default: {0.0})
+        diurnal {float} -- amplitude of diurnal shape in [0, 1], 0 for
+                           constant eps (default: {0.0})
+        peak_hour {float} -- hour of maximum eps, UTC (default: {DEFAULT_DIURNAL_PEAK})
+        rng {Any} -- random generator of jitter (default: {random})
+
+    Yields:
+        float -- timestamp of log
+    """
+    uniform = rng.random
+    if not diurnal:
+        # from the index, summed intervals drift from the clock
+        interval = 1 / eps
+        for i in range(count_timestamps(start, end, eps)):
+            ts = start + i / eps
+            yield ts + uniform() * jitter * interval if jitter else ts
+        return
+
+    # offset from start, summed with compensation of rounding errors
+    span = end - start
+    offset = error = 0.0
+    while offset < span:
+        ts = start + offset
+        factor = max(MIN_DIURNAL_FACTOR, diurnal_factor(ts, diurnal, peak_hour))
+        interval = 1 / (eps * factor)
+        yield ts + uniform() * jitter * interval if jitter else ts
+        step = interval - error
+        total = offset + step
+        error = (total - offset) - step
+        offset = total
+
+
+def profile_timestamps(
+    start: float,
+    profile: profiles.Profile,
+    jitter: float = 0.0,
+    rng: Any = random,
+) -> Iterator[float]:
+    """Yield the timestamps of the events of a profile, on a simulated
+    clock that starts at start
+
+    Arguments:
+        start {float} -- start of range as seconds since the epoch
+        profile {Profile} -- schedule of events of range
+
+    Keyword Arguments:
+        jitter {float} -- random shift of each log, as fraction of the
+                          interval between logs of its step in [0, 1) (default: {0.0})
+        rng {Any} -- random generator of jitter (default: {random})
+
+    Yields:
+        float -- timestamp of log
+    """
+    cumulative = profile.cumulative
+    counts = profile.counts
+    step = profile.step
+    uniform = rng.random
+    k = 0
+    for i in range(profile.total):
+        # the step of event moves forward only
+        while cumulative[k + 1] <= i:
+            k += 1
+        interval = step / counts[k]
+        ts = start + k * step + (i - cumulative[k]) * interval
+        yield ts + uniform() * jitter * interval if jitter else ts
+
+
+def validate(pattern_conf: Dict[str, Any]) -> None:
+    """Validate the backfill parameters of a pattern
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+
+    Raises:
+        ValueError: raised when jitter or diurnal are not valid, or
+                    diurnal is used with a profile
+    """
+    name = pattern_conf["name"]
+    jitter = float(pattern_conf.get("jitter", 0))
+    if not 0 <= jitter < 1:
+        raise ValueError(f"[{name}] - jitter must be in [0, 1), not {jitter}")
+    diurnal = float(pattern_conf.get("diurnal", 0))
+    if not 0 <= diurnal <= 1:
+        raise ValueError(f"[{name}] - diurnal must be in [0, 1], not {diurnal}")
+    if diurnal and pattern_conf.get("profile") is not None:
+        raise ValueError(
+            f"[{name}] - diurnal and profile can't be used together, "
+            "use a diurnal segment of profile")
+
+
+def _segments(stamps: List[float], f: Any) -> Iterator[List[float]]:
+    """Split the timestamps of a chunk at the next rotation by interval
+    of the output file, so a segment has only the logs of its interval
+
+    Arguments:
+        stamps {List[float]} -- sorted timestamps of chunk
+        f {Any} -- output of pattern, deadline is the next rotation of
+                   a file rotated by interval
+
+    Returns:
+        Iterator[List[float]] -- timestamps written together
+    """
+    pos = 0
+    while pos < len(stamps):
+        # read after each write, that moves it when the file is rotated
+        deadline = getattr(f, "deadline", None)
+        if deadline is None:
+            end = len(stamps)
+        else:
+            # the first log after the deadline is written alone, it rotates
+            end = max(pos + 1, bisect.bisect_left(stamps, deadline, pos))
+        yield stamps[pos:end]
+        pos = end
+
+
+def backfill_generator(pattern_conf: Dict[str, Any]) -> int:
+    """This function generates as fast as possible the logs of a pattern
+    for the time range in 'backfill' of configuration pattern
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern,
+                                         with 'backfill' as (start, end) in
+                                         seconds since the epoch
+
+    Raises:
+        ValueError: raised when the pattern is not valid
+
+    Returns:
+        int -- number of logs generated
+    """
+    name = pattern_conf["name"]
+    start, end = pattern_conf["backfill"]
+    validate(pattern_conf)
+
+    plan, scheduler, _ = generator.prepare_pattern(pattern_conf)
+    # the scheduler doesn't pace backfill, only lines and writes are measured
+    pattern_metrics = metrics.register_pattern(pattern_conf)
+    render = plan.render
+    jitter = float(pattern_conf.get("jitter", 0))
+    if plan.replay is not None and plan.replay.speed is not None:
+        profile = plan.replay.profile(end - start)
+        ts_iter = profile_timestamps(start, profile, jitter, plan.rng)
+        total = profile.total
+    elif pattern_conf.get("profile") is not None:
+        profile = profiles.build_profile(
+            name, pattern_conf["profile"], scheduler.eps, end - start, start, plan.rng)
+        ts_iter = profile_timestamps(start, profile, jitter, plan.rng)
+        total = profile.total
+    else:
+        ts_iter = timestamps(
+            start, end, scheduler.eps,
+            jitter=jitter,
+            diurnal=float(pattern_conf.get("diurnal", 0)),
+            peak_hour=float(pattern_conf.get("diurnal_peak", DEFAULT_DIURNAL_PEAK)),
+            rng=plan.rng)
+        # the diurnal shape averages 1 over a day
+        total = count_timestamps(start, end, scheduler.eps)
+
+    log.debug(f"[{name}] - Backfilling from {start} to {end}")
+    progress = None
+    if pattern_conf.get("progress_bar", False):  # pragma: no cover
+        from tqdm import tqdm
+        progress = tqdm(
+            total=total, desc=f"{name} backfill")
+
+    arena = corpus.build_corpus(pattern_conf, plan, start)
+    # a chunk of corpus is at most the corpus, its lines are patched in place
+    chunk_size = CHUNK_SIZE if arena is None else min(CHUNK_SIZE, len(arena))
+
+    nr_logs = 0
+    # rotate_interval of output is on the time of logs
+    log_time = start
+    begin = time.perf_counter()
+    with generator.open_output(pattern_conf, BUFFER_SIZE, lambda: log_time) as f:
+        write = f.write if arena is None else corpus.writer_of(f)
+        while True:
+            rendering = time.perf_counter()
+            stamps = list(itertools.islice(ts_iter, chunk_size))
+            count = len(stamps)
+            if not count:
+                break
+            size = 0
+            write_time = 0.0
+            for part in _segments(stamps, f):
+                if arena is None:
+                    data: List[Any] = ["\n".join([render(ts) for ts in part]) + "\n"]
+                else:
+                    data = arena.take_each(part)
+                size += sum(len(i) for i in data)
+                writing = time.perf_counter()
+                log_time = part[0]
+                for i in data:
+                    write(i)
+                write_time += time.perf_counter() - writing
+            if not nr_logs:
+                generator.log_first_log(name)
+            nr_logs += count
+            if pattern_metrics is not None:
+                render_time = time.perf_counter() - rendering - write_time
+                pattern_metrics.observe(count, size, render_time, write_time)
+            if progress is not None:  # pragma: no cover
+                progress.update(count)
+
+    if progress is not None:  # pragma: no cover
+        progress.close()
+
+    elapsed = time.perf_counter() - begin
+    log.info(
+        f"[{name}] - Backfilled {nr_logs} logs in {elapsed:.2f} s "
+        f"({nr_logs / elapsed if elapsed > 0 else 0:.0f} logs/s)")
+    return nr_logs
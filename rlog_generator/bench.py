@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Benchmark of rlog_generator.
+
+Every pattern is run unthrottled for a fixed number of logs to /dev/null
+or to an in-memory sink, measuring separately the time spent generating
+field values, formatting logs and writing them.
+"""
+
+import datetime
+import glob
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+from . import compiler, utils
+
+
+NULL = "null"
+MEMORY = "memory"
+
+DEFAULT_EVENTS = 100000
+
+# logs generated, formatted and written at a time
+CHUNK_SIZE = 1000
+
+
+log = logging.getLogger(__name__)
+
+
+class MemorySink:
+    """File-like object that only counts the bytes written"""
+
+    def __init__(self) -> None:
+        self.bytes = 0
+
+    def write(self, data: str) -> int:
+        self.bytes += len(data.encode())
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "MemorySink":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Return the peak resident set size of process in KiB
+
+    Returns:
+        Optional[int] -- peak RSS, None when not available
+    """
+    if resource is None:  # pragma: no cover
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS gives bytes, Linux KiB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def bench_pattern(
+    pattern_conf: Dict[str, Any],
+    events: int = DEFAULT_EVENTS,
+    sink: str = NULL,
+) -> Dict[str, Any]:
+    """Run a pattern unthrottled and return its throughput
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+
+    Keyword Arguments:
+        events {int} -- number of logs to generate (default: {DEFAULT_EVENTS})
+        sink {str} -- 'null' to write to /dev/null, 'memory' to only
+                      count bytes (default: {NULL})
+
+    Raises:
+        ValueError: raised when the pattern or sink are not valid
+
+    Returns:
+        Dict[str, Any] -- results of pattern
+    """
+    start = time.perf_counter()
+    plan = compiler.compile_pattern(pattern_conf)
+    compile_time = time.perf_counter() - start
+
+    if sink == NULL:
+        f = open(os.devnull, "w")
+    elif sink == MEMORY:
+        f = MemorySink()
+    else:
+        raise ValueError(f"sink must be '{NULL}' or '{MEMORY}', not {sink!r}")
+
+    # sequences can't be split in stages, they are rendered as raw examples
+    templates = plan.templates if not plan.sequences else ()
+    generate = format_ = write = 0.0
+    nr_bytes = 0
+    done = 0
+
+    with f:
+        while done < events:
+            batch = min(CHUNK_SIZE, events - done)
+
+            t0 = time.perf_counter()
+            if templates:
+                chosen = [plan.choose() for _ in range(batch)]
+                values = [i.generate() for i in chosen]
+                t1 = time.perf_counter()
+                lines = [i.format(v) for i, v in zip(chosen, values)]
+            else:
+                lines = [plan.render() for _ in range(batch)]
+                t1 = time.perf_counter()
+            t2 = time.perf_counter()
+
+            chunk = "\n".join(lines) + "\n"
+            f.write(chunk)
+            f.flush()
+            t3 = time.perf_counter()
+
+            generate += t1 - t0
+            format_ += t2 - t1
+            write += t3 - t2
+            nr_bytes += len(chunk.encode()) if sink == NULL else 0
+            done += batch
+
+        if sink == MEMORY:
+            nr_bytes = f.bytes
+
+    total = generate + format_ + write
+    return {
+        "name": plan.name,
+        "generator_type": plan.generator_type,
+        "events": events,
+        "bytes": nr_bytes,
+        "seconds": total,
+        "lines_per_sec": events / total if total else 0.0,
+        "bytes_per_sec": nr_bytes / total if total else 0.0,
+        "us_per_line": {
+            "generate": generate / events * 1e6,
+            "format": format_ / events * 1e6,
+            "write": write / events * 1e6,
+            "total": total / events * 1e6,
+        },
+        "compile_ms": compile_time * 1000,
+    }
+
+
+def load_patterns(paths: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Return all patterns of paths, enabled or not
+
+    Arguments:
+        paths {List[str]} -- folders of patterns
+
+    Returns:
+        Dict[str, Dict[str, Any]] -- patterns by file path
+    """
+    patterns = {}
+    for path in paths:
+        for i in sorted(glob.iglob(os.path.join(path, "*.yml"))):
+            patterns[i] = utils.load_pattern(i)
+    return patterns
+
+
+def run_bench(
+    paths: List[str],
+    events: int = DEFAULT_EVENTS,
+    sink: str = NULL,
+) -> Dict[str, Any]:
+    """Run the benchmark of all patterns of paths
+
+    Arguments:
+        paths {List[str]} -- folders of patterns
+
+    Keyword Arguments:
+        events {int} -- number of logs foreach pattern (default: {DEFAULT_EVENTS})
+        sink {str} -- 'null' or 'memory' (default: {NULL})
+
+    Returns:
+        Dict[str, Any] -- results, with metadata to compare runs
+    """
+    from .version import __version__
+
+    results = []
+    for path, conf in load_patterns(paths).items():
+        log.info(f"Benchmarking {path}")
+        try:
+            result = bench_pattern(conf, events, sink)
+        except Exception as e:
+            log.error(f"Error benchmarking {path}: {e}")
+            results.append(
+                {"name": conf.get("name", path), "path": path, "error": str(e)})
+            continue
+        result["path"] = path
+        results.append(result)
+
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "events": events,
+        "sink": sink,
+        # ru_maxrss is the peak of the whole process, not of a pattern
+        "peak_rss_kb": peak_rss_kb(),
+        "results": results,
+    }
+
+
+def format_report(
+    bench: Dict[str, Any],
+    previous: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Return a table of benchmark results, with the change of lines/sec
+    from a previous run when given
+
+    Arguments:
+        bench {Dict[str, Any]} -- results of run_bench
+
+    Keyword Arguments:
+        previous {Optional[Dict[str, Any]]} -- results of a previous run
+                                                (default: {None})
+
+    Returns:
+        str -- report
+    """
+    before = {}
+    if previous is not None:
+        before = {i["name"]: i for i in previous.get("results", []) if "error" not in i}
+
+    header = (
+        f"{'pattern':<30} {'lines/s':>10} {'MB/s':>8} {'gen us':>8} "
+        f"{'fmt us':>8} {'write us':>8}")
+    if before:
+        header += f" {'change':>8}"
+    rows = [header]
+
+    for i in bench["results"]:
+        if "error" in i:
+            rows.append(f"{i['name']:<30} error: {i['error']}")
+            continue
+        us = i["us_per_line"]
+        row = (
+            f"{i['name']:<30} {i['lines_per_sec']:>10.0f} "
+            f"{i['bytes_per_sec'] / 1e6:>8.2f} {us['generate']:>8.2f} "
+            f"{us['format']:>8.2f} {us['write']:>8.2f}")
+        if i["name"] in before and before[i["name"]]["lines_per_sec"]:
+            change = i["lines_per_sec"] / before[i["name"]]["lines_per_sec"] * 100 - 100
+            row += f" {change:>+7.1f}%"
+        rows.append(row)
+
+    if bench.get("peak_rss_kb") is not None:
+        rows.append(f"\nPeak RSS of process: {bench['peak_rss_kb'] / 1024:.1f} MiB")
+    return "\n".join(rows)
+
+
+def save(bench: Dict[str, Any], path: str) -> None:
+    """Save benchmark results in a JSON file
+
+    Arguments:
+        bench {Dict[str, Any]} -- results of run_bench
+        path {str} -- path of JSON file
+    """
+    with open(path, "w") as f:
+        json.dump(bench, f, indent=2)
+
+
+def load(path: str) -> Dict[str, Any]:
+    """Load benchmark results from a JSON file
+
+    Arguments:
+        path {str} -- path of JSON file
+
+    Returns:
+        Dict[str, Any] -- results of run_bench
+    """
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Bulk value generation for rlog_generator.
+
+Functions of utils generate a value at a time. Here the same kinds of
+values are generated K at a time from a single draw of random bytes or
+integers, and handed out one by one by a buffer. NumPy is used for
+integers when it is installed, imported at the first bulk draw of
+integers so that startup doesn't pay for it.
+"""
+
+import logging
+import random
+import socket
+from functools import partial
+from typing import Any, Callable, List, Sequence
+
+from . import utils
+
+
+DEFAULT_BUFFER_SIZE = 1024
+
+# max attempts, in multiples of cardinality, to find distinct pool values
+POOL_ATTEMPTS = 10
+
+# first octets of IPv4 networks never used by fake_ip: this network,
+# loopback, multicast and reserved
+_RESERVED_OCTETS = frozenset([0, 127] + list(range(224, 256)))
+
+_ZERO_IP = bytes(4)
+
+_HEX_VARIANT = "89ab" * 4
+
+# values generated by a costly Faker provider, drawn from then on
+FAKER_POOL_SIZE = 4096
+
+
+log = logging.getLogger(__name__)
+
+# numpy module, False when it isn't installed, None before the first use
+_numpy: Any = None
+
+
+BulkFunction = Callable[[int], List[Any]]
+
+
+def get_numpy() -> Any:
+    """Return the numpy module, imported at the first call
+
+    Returns:
+        Any -- numpy, None when it isn't installed
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:  # pragma: no cover
+            _numpy = False
+    return _numpy or None
+
+
+class Buffered:
+    """Callable without arguments that returns values generated in bulk,
+    refilling its buffer with size values when it's empty
+    """
+
+    __slots__ = ("_bulk", "_size", "_next")
+
+    def __init__(self, bulk: BulkFunction, size: int = DEFAULT_BUFFER_SIZE) -> None:
+        """
+        Arguments:
+            bulk {BulkFunction} -- function that returns a list of k values
+
+        Keyword Arguments:
+            size {int} -- number of values generated at a time
+                          (default: {DEFAULT_BUFFER_SIZE})
+        """
+        self._bulk = bulk
+        self._size = size
+        self._next = iter(()).__next__
+
+    def __call__(self) -> Any:
+        try:
+            return self._next()
+        except StopIteration:
+            self._next = iter(self._bulk(self._size)).__next__
+            return self._next()
+
+
+def randint_bulk(min_value: int, max_value: int, rng: Any = random) -> BulkFunction:
+    """Return a bulk function of random integers in range
+    [min_value, max_value], including both end points
+
+    Arguments:
+        min_value {int} -- min value
+        max_value {int} -- max value
+
+    Keyword Arguments:
+        rng {Any} -- random generator of pattern (default: {random})
+
+    Returns:
+        BulkFunction -- bulk function of random integers
+    """
+    values = range(min_value, max_value + 1)
+
+    def bulk(k: int) -> List[int]:
+        numpy = get_numpy()
+        if numpy is None:
+            return rng.choices(values, k=k)
+        # seeded from rng, so the seed of rng is enough
+        generator = numpy.random.default_rng(rng.getrandbits(64))
+        return generator.integers(min_value, max_value, size=k, endpoint=True).tolist()
+    return bulk
+
+
+def choice_bulk(values: Sequence[Any], rng: Any = random) -> BulkFunction:
+    """Return a bulk function of random choices of values
+
+    Arguments:
+        values {Sequence[Any]} -- values to choose from
+
+    Keyword Arguments:
+        rng {Any} -- random generator of pattern (default: {random})
+
+    Returns:
+        BulkFunction -- bulk function of random choices
+    """
+    values = tuple(values)
+    return lambda k: rng.choices(values, k=k)
+
+
+def _ips(k: int, reserved: frozenset, rng: Any = random) -> List[str]:
+    data = rng.randbytes(4 * k)
+    ntoa = socket.inet_ntoa
+    ips = [ntoa(data[i:i + 4]) for i in range(0, 4 * k, 4) if data[i] not in reserved]
+    while len(ips) < k:
+        ips.extend(_ips(k - len(ips), reserved, rng))
+    return ips
+
+
+def randip_bulk(k: int, rng: Any = random) -> List[str]:
+    """Return k random IP addresses, like utils.randip all but 0.0.0.0
+
+    Arguments:
+        k {int} -- number of values
+
+    Keyword Arguments:
+        rng {Any} -- random generator of pattern (default: {random})
+
+    Returns:
+        List[str] -- IP addresses
+    """
+    data = rng.randbytes(4 * k)
+    ntoa = socket.inet_ntoa
+    ips = [ntoa(data[i:i + 4]) for i in range(0, 4 * k, 4) if data[i:i + 4] != _ZERO_IP]
+    while len(ips) < k:
+        ips.extend(randip_bulk(k - len(ips), rng))
+    return ips
+
+
+def fake_ip_bulk(k: int, rng: Any = random) -> List[str]:
+    """Return k random IPv4 addresses out of reserved networks,
+    a faster version of utils.fake_ip
+
+    Arguments:
+        k {int} -- number of values
+
+    Keyword Arguments:
+        rng {Any} -- random generator of pattern (default: {random})
+
+    Returns:
+        List[str] -- IP addresses
+    """
+    return _ips(k, _RESERVED_OCTETS, rng)
+
+
+def fake_uuid_bulk(k: int, rng: Any = random) -> List[str]:
+    """Return k random UUID version 4
+
+    Arguments:
+        k {int} -- number of values
+
+    Keyword Arguments:
+        rng {Any} -- random generator of pattern (default: {random})
+
+    Returns:
+        List[str] -- UUIDs
+    """
+    h = rng.randbytes(16 * k).hex()
+    return [
+        f"{h[i:i + 8]}-{h[i + 8:i + 12]}-4{h[i + 13:i + 16]}-"
+        f"{_HEX_VARIANT[int(h[i + 16], 16)]}{h[i + 17:i + 20]}-{h[i + 20:i + 32]}"
+        for i in range(0, 32 * k, 32)]
+
+
+def fake_mac_bulk(k: int, rng: Any = random) -> List[str]:
+    """Return k random MAC addresses
+
+    Arguments:
+        k {int} -- number of values
+
+    Keyword Arguments:
+        rng {Any} -- random generator of pattern (default: {random})
+
+    Returns:
+        List[str] -- MAC addresses
+    """
+    data = rng.randbytes(6 * k)
+    return [data[i:i + 6].hex(":") for i in range(0, 6 * k, 6)]
+
+
+def fake_port_bulk(k: int, rng: Any = random) -> List[int]:
+    """Return k random port numbers
+
+    Arguments:
+        k {int} -- number of values
+
+    Keyword Arguments:
+        rng {Any} -- random generator of pattern (default: {random})
+
+    Returns:
+        List[int] -- port numbers
+    """
+    return rng.choices(range(65536), k=k)
+
+
+def pooled_bulk(
+    generator: Callable[[], Any],
+    size: int = FAKER_POOL_SIZE,
+    rng: Any = random,
+) -> BulkFunction:
+    """Return a bulk function of values drawn from a pool of size values
+    of generator, generated at the first call, for functions too costly
+    to call for each value
+
+    Arguments:
+        generator {Callable[[], Any]} -- function that returns a random value
+
+    Keyword Arguments:
+        size {int} -- number of values of pool (default: {FAKER_POOL_SIZE})
+        rng {Any} -- random generator of pattern (default: {random})
+
+    Returns:
+        BulkFunction -- bulk function of values of pool
+    """
+    pool: List[Any] = []
+
+    def bulk(k: int) -> List[Any]:
+        if not pool:
+            pool.extend(generator() for _ in range(size))
+        return rng.choices(pool, k=k)
+    return bulk
+
+
+def _fixed(bulk: Callable[..., List[Any]]) -> Callable[[Any], BulkFunction]:
+    return lambda rng: partial(bulk, rng=rng)
+
+
+# bulk versions of utils functions: factories that receive the random
+# generator of pattern and the arguments of the string function and
+# return a bulk function
+BULK_FUNCTIONS = {
+    utils.randint: lambda rng, min_value, max_value: randint_bulk(
+        int(min_value), int(max_value), rng),
+    utils.randip: _fixed(randip_bulk),
+    utils.fake_ip: _fixed(fake_ip_bulk),
+    utils.fake_uuid: _fixed(fake_uuid_bulk),
+    utils.fake_mac: _fixed(fake_mac_bulk),
+    utils.fake_port: _fixed(fake_port_bulk),
+}
+
+# utils functions of Faker providers that cost about 0.1 ms a value: their
+# values are drawn from a pool of FAKER_POOL_SIZE values, see pooled_bulk
+POOLED_FUNCTIONS = frozenset([utils.fake_user_agent])
+
+
+def make_pool(name: str, generator: Callable[[], Any], cardinality: int) -> List[Any]:
+    """Return a pool of distinct values generated by generator.
+    If the values are fewer than cardinality, after some attempts the
+    pool is returned with the values found.
+
+    Arguments:
+        name {str} -- name of field
+        generator {Callable[[], Any]} -- function that returns a random value
+        cardinality {int} -- number of distinct values
+
+    Returns:
+        List[Any] -- distinct values
+    """
+    pool = {}
+    for _ in range(cardinality * POOL_ATTEMPTS):
+        pool[generator()] = None
+        if len(pool) == cardinality:
+            break
+    else:
+        log.warning(
+            f"field {name} has only {len(pool)} distinct values "
+            f"of cardinality {cardinality}")
+    return list(pool)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Pattern cache for rlog_generator.
+
+Parsing YAML is the slowest part of loading patterns, so the parsed
+pattern is cached in a pickle file, keyed on the path of pattern and
+valid while the file has the same mtime and size. Compiled plans are not
+cached: they hold the random generators of the run.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+from typing import Any, Callable
+
+
+# version of cache files, changed when the format of patterns changes
+CACHE_VERSION = 1
+
+
+log = logging.getLogger(__name__)
+
+
+def cache_dir() -> str:
+    """Return the folder of cached patterns, in $XDG_CACHE_HOME or ~/.cache"""
+    root = (
+        os.environ.get("XDG_CACHE_HOME")
+        or os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(root, "rlog_generator", "patterns")
+
+
+def cached(path: str, loader: Callable[[str], Any]) -> Any:
+    """Return the object loaded from path by loader, from the cache when
+    the file didn't change since it was cached
+
+    Arguments:
+        path {str} -- path of file
+        loader {Callable[[str], Any]} -- function that loads the file
+
+    Returns:
+        Any -- object loaded from file
+    """
+    stat = os.stat(path)
+    stamp = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    key = hashlib.sha1(os.path.realpath(path).encode()).hexdigest()
+    cache_path = os.path.join(cache_dir(), f"{key}.pickle")
+
+    try:
+        with open(cache_path, "rb") as f:
+            cached_stamp, value = pickle.load(f)
+        if cached_stamp == stamp:
+            log.debug(f"Loaded {path} from cache")
+            return value
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError) as e:
+        log.debug(f"Cache of {path} not valid: {e}")
+
+    value = loader(path)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((stamp, value), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        log.debug(f"Can't cache {path}: {e}")
+    return value
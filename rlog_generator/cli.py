@@ -20,9 +20,14 @@ Console script for rlog_generator.
 
 import click
 import runpy
+import yaml
+from datetime import datetime
 from os.path import expanduser, join, realpath, dirname
-from typing import Optional
+from typing import Optional, Tuple
 
+from . import bench as benchmark
+from . import planner
+from . import replay
 from . import rlog_generator
 from .utils import custom_log
 
@@ -32,8 +37,10 @@ current = realpath(dirname(__file__))
 __version__ = runpy.run_path(
     join(current, "version.py"))["__version__"]
 
+EXECUTORS = [rlog_generator.THREAD, rlog_generator.PROCESS, rlog_generator.ASYNCIO]
 
-@click.command()
+
+@click.group(invoke_without_command=True)
 @click.version_option(version=__version__)
 @click.option(
     '--patterns', "-p",
@@ -59,16 +66,97 @@ __version__ = runpy.run_path(
     default=False,
     show_default=True,
     help="Enable/Disable progress bar")
-def main(patterns: str, max_concur_req: int, log_level: str, progress_bar: bool) -> Optional[int]:
+@click.option(
+    '--executor', "-e",
+    default=rlog_generator.THREAD,
+    show_default=True,
+    type=click.Choice(EXECUTORS),
+    help="Run patterns on threads, on processes or on a single asyncio event loop")
+@click.option(
+    '--shard-eps',
+    default=rlog_generator.DEFAULT_SHARD_EPS,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Max eps of a process, higher eps patterns are split (only process executor)")
+@click.option(
+    '--report-interval', "-r",
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds between reports of target and achieved eps of patterns "
+         "(log level INFO)")
+@click.option(
+    '--backfill', "-b",
+    nargs=2,
+    default=None,
+    type=click.DateTime(),
+    metavar="START END",
+    help="Generate as fast as possible the logs from START to END (local time) "
+         "with simulated timestamps")
+@click.option(
+    '--metrics-port',
+    default=None,
+    type=click.IntRange(min=0, max=65535),
+    help="Serve live metrics of patterns in Prometheus format on http://HOST:PORT/metrics")
+@click.option(
+    '--metrics-host',
+    default="127.0.0.1",
+    show_default=True,
+    type=str,
+    help="Address of metrics endpoint")
+@click.option(
+    '--stats-interval',
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds between JSON stats lines of patterns on stderr")
+@click.option(
+    '--seed',
+    default=None,
+    type=int,
+    help="Seed of random generators, each pattern and shard gets its own stream "
+         "for reproducible runs")
+@click.option(
+    '--pattern-cache/--no-pattern-cache',
+    default=True,
+    show_default=True,
+    help="Load patterns parsed by previous runs, if their files didn't change")
+@click.pass_context
+def main(
+    ctx: click.Context,
+    patterns: str,
+    max_concur_req: int,
+    log_level: str,
+    progress_bar: bool,
+    executor: str,
+    shard_eps: int,
+    report_interval: Optional[float],
+    backfill: Optional[Tuple[datetime, datetime]],
+    metrics_port: Optional[int],
+    metrics_host: str,
+    stats_interval: Optional[float],
+    seed: Optional[int],
+    pattern_cache: bool,
+) -> Optional[int]:
     """Random Logs Generator Tool."""
 
     logger = custom_log(level=log_level)
+    if ctx.invoked_subcommand is not None:
+        ctx.obj = {"patterns": patterns}
+        return None
 
     try:
         total_logs = rlog_generator.core(
             path_patterns=patterns,
             max_concur_req=max_concur_req,
-            progress_bar=progress_bar)
+            progress_bar=progress_bar,
+            executor=executor,
+            shard_eps=shard_eps,
+            report_interval=report_interval,
+            backfill_range=backfill,
+            metrics_port=metrics_port,
+            metrics_host=metrics_host,
+            stats_interval=stats_interval,
+            seed=seed,
+            pattern_cache=pattern_cache)
         print(f"\nGenerated {total_logs} logs")
         return 0
     except KeyboardInterrupt:  # pragma: no cover
@@ -82,5 +170,337 @@ def main(patterns: str, max_concur_req: int, log_level: str, progress_bar: bool)
         return 2
 
 
+def _patterns_option(func):
+    return click.option(
+        '--patterns', "-p",
+        default=None,
+        show_default="-p of rlog-generator",
+        type=str,
+        help="Path all log patterns files (only *.yml)")(func)
+
+
+def _patterns(ctx: click.Context, patterns: Optional[str]) -> str:
+    # -p given before the command, e.g. rlog-generator -p DIR validate
+    return patterns if patterns is not None else ctx.obj["patterns"]
+
+
+@main.command()
+@_patterns_option
+@click.option(
+    '--events', "-n",
+    default=benchmark.DEFAULT_EVENTS,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of logs generated foreach pattern")
+@click.option(
+    '--sink', "-s",
+    default=benchmark.NULL,
+    show_default=True,
+    type=click.Choice([benchmark.NULL, benchmark.MEMORY]),
+    help="Write logs to /dev/null or only count their bytes in memory")
+@click.option(
+    '--output', "-o",
+    default=None,
+    type=click.Path(dir_okay=False, writable=True),
+    help="Save results in a JSON file")
+@click.option(
+    '--compare', "-c",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON file of a previous run to compare lines/sec with")
+@click.pass_context
+def bench(
+    ctx: click.Context,
+    patterns: Optional[str],
+    events: int,
+    sink: str,
+    output: Optional[str],
+    compare: Optional[str],
+) -> None:
+    """Benchmark all patterns, enabled or not, unthrottled."""
+
+    results = benchmark.run_bench([_patterns(ctx, patterns)], events, sink)
+    previous = benchmark.load(compare) if compare else None
+    print(benchmark.format_report(results, previous))
+    if output:
+        benchmark.save(results, output)
+
+
+@main.command()
+@_patterns_option
+@click.pass_context
+def validate(ctx: click.Context, patterns: Optional[str]) -> None:
+    """Compile all enabled patterns and render each template once."""
+
+    path_patterns = _patterns(ctx, patterns)
+    result = planner.run_plan(path_patterns, measure_rate=False)
+    print(planner.format_plan(result))
+    if not result["patterns"]:
+        click.echo(f"Error: no enabled patterns in {path_patterns}", err=True)
+        ctx.exit(1)
+    if result["errors"]:
+        ctx.exit(1)
+
+
+@main.command()
+@_patterns_option
+@click.option(
+    '--executor', "-e",
+    default=rlog_generator.THREAD,
+    show_default=True,
+    type=click.Choice(EXECUTORS),
+    help="Executor of the planned run")
+@click.option(
+    '--seconds', "-s",
+    default=planner.DEFAULT_SECONDS,
+    show_default=True,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds of rendering to measure each pattern")
+@click.option(
+    '--backfill', "-b",
+    nargs=2,
+    default=None,
+    type=click.DateTime(),
+    metavar="START END",
+    help="Plan the backfill from START to END instead of a real time run")
+@click.pass_context
+def plan(
+    ctx: click.Context,
+    patterns: Optional[str],
+    executor: str,
+    seconds: float,
+    backfill: Optional[Tuple[datetime, datetime]],
+) -> None:
+    """Validate all enabled patterns and estimate cores, bandwidth and
+    size of their run, without writing any log."""
+
+    backfill_seconds = (backfill[1] - backfill[0]).total_seconds() if backfill else None
+    try:
+        result = planner.run_plan(
+            _patterns(ctx, patterns), executor, seconds, backfill_seconds)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        ctx.exit(1)
+    print(planner.format_plan(result))
+    if result["errors"]:
+        ctx.exit(1)
+
+
+def _secret_option(func):
+    return click.option(
+        '--secret',
+        required=True,
+        envvar="RLOG_GENERATOR_SECRET",
+        type=str,
+        help="Shared secret of controller and workers, "
+             "also from $RLOG_GENERATOR_SECRET")(func)
+
+
+@main.command()
+@_patterns_option
+@_secret_option
+@click.option(
+    '--workers', "-w",
+    required=True,
+    type=click.IntRange(min=1),
+    help="Number of workers to wait for")
+@click.option(
+    '--host',
+    default="127.0.0.1",
+    show_default=True,
+    type=str,
+    help="Address to listen on for workers, 0.0.0.0 for all interfaces")
+@click.option(
+    '--port',
+    default=None,
+    type=click.IntRange(min=0, max=65535),
+    help="TCP port to listen on for workers  [default: 7410]")
+@click.option(
+    '--start-delay',
+    default=None,
+    type=click.FloatRange(min=0),
+    help="Seconds between the dispatch of patterns and the synchronized start "
+         "of workers  [default: 2.0]")
+@click.option(
+    '--backfill', "-b",
+    nargs=2,
+    default=None,
+    type=click.DateTime(),
+    metavar="START END",
+    help="Backfill the logs from START to END instead of real time logs")
+@click.option(
+    '--seed',
+    default=None,
+    type=int,
+    help="Seed of random generators, for reproducible runs")
+@click.option(
+    '--metrics-port',
+    default=None,
+    type=click.IntRange(min=0, max=65535),
+    help="Serve aggregated metrics of workers in Prometheus format on http://HOST:PORT/metrics")
+@click.option(
+    '--metrics-host',
+    default="127.0.0.1",
+    show_default=True,
+    type=str,
+    help="Address of metrics endpoint")
+@click.option(
+    '--stats-interval',
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds between JSON stats lines of workers on stderr")
+@click.pass_context
+def controller(
+    ctx: click.Context,
+    patterns: Optional[str],
+    secret: str,
+    workers: int,
+    host: str,
+    port: Optional[int],
+    start_delay: Optional[float],
+    backfill: Optional[Tuple[datetime, datetime]],
+    seed: Optional[int],
+    metrics_port: Optional[int],
+    metrics_host: str,
+    stats_interval: Optional[float],
+) -> None:
+    """Split all enabled patterns across workers and start them together."""
+
+    # multiprocessing.connection is imported only by distributed runs
+    from . import distributed
+
+    if port is None:
+        port = distributed.DEFAULT_PORT
+    if start_delay is None:
+        start_delay = distributed.DEFAULT_START_DELAY
+    try:
+        total_logs = distributed.run_controller(
+            _patterns(ctx, patterns), workers, secret, host, port, start_delay,
+            backfill, seed, metrics_port, metrics_host, stats_interval)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        ctx.exit(1)
+    print(f"\nGenerated {total_logs} logs on {workers} workers")
+
+
+@main.command()
+@_secret_option
+@click.option(
+    '--host',
+    default="127.0.0.1",
+    show_default=True,
+    type=str,
+    help="Address of controller")
+@click.option(
+    '--port',
+    default=None,
+    type=click.IntRange(min=0, max=65535),
+    help="TCP port of controller  [default: 7410]")
+@click.option(
+    '--name',
+    default=None,
+    type=str,
+    help="Name of worker  [default: host name]")
+@click.option(
+    '--executor', "-e",
+    default=rlog_generator.THREAD,
+    show_default=True,
+    type=click.Choice(EXECUTORS),
+    help="Run the patterns of worker on threads, on processes or on a single "
+         "asyncio event loop")
+@click.option(
+    '--max-concur-req', "-m",
+    default=10,
+    show_default=True,
+    type=int,
+    help="Max concurrent logs generating")
+@click.option(
+    '--shard-eps',
+    default=rlog_generator.DEFAULT_SHARD_EPS,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Max eps of a process, higher eps patterns are split (only process executor)")
+@click.pass_context
+def worker(
+    ctx: click.Context,
+    secret: str,
+    host: str,
+    port: Optional[int],
+    name: Optional[str],
+    executor: str,
+    max_concur_req: int,
+    shard_eps: int,
+) -> None:
+    """Run the patterns sent by a controller."""
+
+    from . import distributed
+
+    if port is None:
+        port = distributed.DEFAULT_PORT
+    try:
+        total_logs = distributed.run_worker(
+            secret, host, port, name, max_concur_req, executor, shard_eps)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        ctx.exit(1)
+    print(f"\nGenerated {total_logs} logs")
+
+
+@main.command()
+@click.argument("log_file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    '--output', "-o",
+    default=None,
+    type=click.Path(dir_okay=False, writable=True),
+    help="Save the pattern in a YAML file instead of printing it")
+@click.option(
+    '--name', "-n",
+    default=None,
+    type=str,
+    help="Name of pattern  [default: name of LOG_FILE]")
+@click.option(
+    '--templates', "-t",
+    default=replay.DEFAULT_MAX_TEMPLATES,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Max number of templates, the most frequent")
+@click.option(
+    '--max-values',
+    default=replay.DEFAULT_MAX_VALUES,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Max distinct values of a field kept as a list, more are generated "
+         "by a function")
+@click.option(
+    '--lines', "-l",
+    default=replay.INFER_LINES,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of lines read from the start of LOG_FILE")
+@click.pass_context
+def learn(
+    ctx: click.Context,
+    log_file: str,
+    output: Optional[str],
+    name: Optional[str],
+    templates: int,
+    max_values: int,
+    lines: int,
+) -> None:
+    """Infer a template pattern from the lines of LOG_FILE."""
+
+    try:
+        pattern = replay.infer_pattern(log_file, name, templates, max_values, lines)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        ctx.exit(1)
+    text = yaml.safe_dump(pattern, sort_keys=False, allow_unicode=True, width=1000)
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+    else:
+        print(text, end="")
+
+
 if __name__ == "__main__":
     main()  # pragma: no cover
@@ -0,0 +1,913 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Pattern compiler for rlog_generator.
+
+A pattern is compiled once, when it is loaded, into a plan that the
+generating loop only has to run: `func_` strings are resolved to callables
+with their arguments already parsed, every template is rewritten into a
+positional format string and only the fields a template uses are generated.
+Values that can be generated in bulk are buffered, see bulk module.
+All date fields of a line, and the positional datetime of the template,
+share a single clock read: the time of the line can also be given, as the
+backfill does with its simulated clock. Fields can refer to the entities
+of the pattern, and sequences of templates are rendered over time for
+the same entity, see entities module.
+"""
+
+import _string
+import datetime
+import heapq
+import inspect
+import itertools
+import logging
+import os
+import random
+import time
+from functools import partial
+from string import Formatter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from . import (
+    bulk, datefmt, dictionaries, distributions, entities, formats, replay, utils)
+from .bulk import DEFAULT_BUFFER_SIZE
+
+
+TEMPLATE = "template"
+RAW = "raw"
+REPLAY = "replay"
+
+
+log = logging.getLogger(__name__)
+
+_formatter = Formatter()
+
+# names of parameters of functions, by function
+_parameters: Dict[Callable[..., Any], frozenset] = {}
+
+
+class LineClock:
+    """Time of the line being rendered, as seconds since the epoch,
+    and its sequential number
+    """
+
+    __slots__ = ("ts", "line")
+
+    def __init__(self) -> None:
+        self.ts = 0.0
+        self.line = 0
+
+
+class Context:
+    """State shared by all fields of a pattern while it is compiled"""
+
+    def __init__(
+        self,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        base_dir: str = ".",
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Keyword Arguments:
+            buffer_size {int} -- number of values generated at a time by
+                                 functions with a bulk version, 0 to
+                                 disable buffering (default: {DEFAULT_BUFFER_SIZE})
+            base_dir {str} -- folder of relative paths of dictionaries (default: {"."})
+            seed {Optional[int]} -- seed of random generators of pattern,
+                                    None for a random seed (default: {None})
+        """
+        self.buffer_size = buffer_size
+        self.base_dir = base_dir
+        # random generators of pattern, not shared with other patterns
+        self.rng = random.Random(seed)
+        self._faker_seed = self.rng.getrandbits(64)
+        self._faker: Optional[Any] = None
+        # Faker providers needed by fields, None for all
+        self.faker_providers: Optional[List[str]] = None
+        self.clock = LineClock()
+        # number of compiled functions that read the clock
+        self.clock_users = 0
+        self.entities: Dict[str, entities.EntityPool] = {}
+        # costly Faker functions draw from a pool, but not to fill the
+        # pool of a cardinality
+        self.pooling = True
+
+    @property
+    def faker(self) -> Any:
+        """Faker of pattern, created when a field needs it"""
+        if self._faker is None:
+            self._faker = utils.new_faker(self._faker_seed, self.faker_providers)
+        return self._faker
+
+
+def _compile_randint(
+    context: Context,
+    min_value: str,
+    max_value: str,
+) -> Callable[[], int]:
+    return partial(context.rng.randint, int(min_value), int(max_value))
+
+
+def _compile_date(context: Context, fmt: str, tz: str) -> Callable[[], str]:
+    clock = context.clock
+    context.clock_users += 1
+    formatter = datefmt.CachedFormatter(fmt, tz)
+    return lambda: formatter(clock.ts)
+
+
+def _compile_format_date(context: Context, *args: str) -> Callable[[], str]:
+    fmt = args[0] if args else "%Y-%m-%d %H:%M:%S"
+    return _compile_date(context, fmt, datefmt.UTC)
+
+
+# Functions with a cheaper compiled form than calling them with string
+# arguments on every line
+_SPECIALISATIONS: Dict[Callable[..., Any], Callable[..., Callable[[], Any]]] = {
+    utils.randint: _compile_randint,
+    utils.format_date: _compile_format_date,
+}
+
+
+def compile_function(
+    function_str: str,
+    context: Optional[Context] = None,
+) -> Callable[[], Any]:
+    """Return a callable without arguments that gives the value of a
+    string function, like 'func_randint 1 10'.
+    The function is looked up and its arguments are parsed only here.
+
+    Arguments:
+        function_str {str} -- complete string function
+
+    Keyword Arguments:
+        context {Optional[Context]} -- context of pattern (default: {None})
+
+    Raises:
+        ValueError: raised when the string function is empty, unknown or
+                    its arguments don't match the function
+
+    Returns:
+        Callable[[], Any] -- callable that returns the value of string function
+    """
+    tokens = function_str.split()
+    if not tokens:
+        raise ValueError("Empty function string provided")
+
+    if context is None:
+        context = Context()
+
+    try:
+        func = utils.get_function(tokens[0])
+    except (AttributeError, ValueError):
+        raise ValueError(f"unknown function {tokens[0]} in {function_str!r}")
+    args = tokens[1:]
+    try:
+        inspect.signature(func).bind(*args)
+    except TypeError as e:
+        raise ValueError(f"wrong arguments in {function_str!r}: {e}")
+    except ValueError:  # pragma: no cover
+        # no signature, as for some builtins
+        pass
+
+    if context.buffer_size > 0 and func in bulk.BULK_FUNCTIONS:
+        return bulk.Buffered(
+            bulk.BULK_FUNCTIONS[func](context.rng, *args), context.buffer_size)
+    if context.buffer_size > 0 and context.pooling and func in bulk.POOLED_FUNCTIONS:
+        generator = partial(func, *args, **_random_generators(func, context))
+        return bulk.Buffered(
+            bulk.pooled_bulk(generator, rng=context.rng), context.buffer_size)
+
+    specialisation = _SPECIALISATIONS.get(func)
+    if specialisation is not None:
+        return specialisation(context, *args)
+    generators = _random_generators(func, context)
+    if args or generators:
+        return partial(func, *args, **generators)
+    return func
+
+
+def _parameters_of(func: Callable[..., Any]) -> frozenset:
+    parameters = _parameters.get(func)
+    if parameters is None:
+        try:
+            parameters = frozenset(inspect.signature(func).parameters)
+        except (TypeError, ValueError):
+            parameters = frozenset()
+        _parameters[func] = parameters
+    return parameters
+
+
+def _random_generators(func: Callable[..., Any], context: Context) -> Dict[str, Any]:
+    """Return the random generators of pattern that func accepts, as
+    the keyword arguments rng and faker of utils functions
+    """
+    parameters = _parameters_of(func)
+    generators = {}
+    if "rng" in parameters:
+        generators["rng"] = context.rng
+    if "faker" in parameters:
+        generators["faker"] = context.faker
+    return generators
+
+
+def _functions(value: Any) -> Iterator[Callable[..., Any]]:
+    """Yield the functions of all string functions in a value of pattern"""
+    if isinstance(value, str):
+        if value.startswith("func_") and value.split():
+            try:
+                yield utils.get_function(value.split()[0])
+            except (AttributeError, ValueError):
+                # reported when the field is compiled
+                pass
+    elif isinstance(value, dict):
+        for i in value.values():
+            yield from _functions(i)
+    elif isinstance(value, list):
+        for i in value:
+            yield from _functions(i)
+
+
+def _constant(value: Any) -> Callable[[], Any]:
+    return lambda: value
+
+
+def _compile_value(value: Any, context: Context) -> Callable[[], Any]:
+    if isinstance(value, str) and value.startswith('func_'):
+        return compile_function(value, context)
+    return _constant(value)
+
+
+def _compile_choice(
+    values: List[Any],
+    context: Context,
+    weights: Optional[List[float]] = None,
+) -> Callable[[], Any]:
+    rng = context.rng
+    if weights is None:
+        if context.buffer_size > 0:
+            return bulk.Buffered(bulk.choice_bulk(values, rng), context.buffer_size)
+        return partial(rng.choice, tuple(values))
+    if context.buffer_size > 0:
+        return bulk.Buffered(
+            distributions.choice_bulk(values, weights, rng), context.buffer_size)
+    return distributions.chooser(values, weights, rng)
+
+
+def _choice_of(
+    generators: Sequence[Callable[[], Any]],
+    context: Context,
+    weights: Optional[List[float]] = None,
+) -> Callable[[], Any]:
+    choice = distributions.chooser(generators, weights, context.rng)
+    return lambda: choice()()
+
+
+def _compile_list(
+    name: str,
+    values: List[Any],
+    context: Context,
+    weights: Optional[List[float]] = None,
+) -> Callable[[], Any]:
+    if not values:
+        raise ValueError(f"field {name} is an empty list")
+    if not any(isinstance(i, str) and i.startswith('func_') for i in values):
+        return _compile_choice(values, context, weights)
+    generators = tuple(_compile_value(i, context) for i in values)
+    return _choice_of(generators, context, weights)
+
+
+def _compile_file(
+    name: str,
+    field_value: Dict[str, Any],
+    context: Context,
+) -> Callable[[], Any]:
+    path = os.path.join(context.base_dir, os.path.expanduser(field_value["file"]))
+    dictionary = dictionaries.open_dictionary(path)
+    n = len(dictionary)
+    # lines are drawn by index, the file is never copied in memory
+    weights = distributions.field_weights(name, field_value, n)
+    rng = context.rng
+    if weights is None:
+        sample = partial(rng.randrange, n)
+        sample_bulk = partial(rng.choices, range(n))
+    else:
+        table = distributions.AliasTable(weights, rng)
+        sample, sample_bulk = table.sample, table.sample_bulk
+    if context.buffer_size > 0:
+        return bulk.Buffered(
+            lambda k: [dictionary[i] for i in sample_bulk(k=k)], context.buffer_size)
+    return lambda: dictionary[sample()]
+
+
+def _compile_entity_ref(
+    name: str,
+    field_value: Dict[str, Any],
+    context: Context,
+) -> Callable[[], Any]:
+    entity = field_value["entity"]
+    pool = context.entities.get(entity)
+    if pool is None:
+        raise ValueError(f"field {name} refers to undefined entity {entity}")
+    # entities expire on the time of line
+    context.clock_users += 1
+    return pool.attribute(field_value.get("attribute", entities.ID))
+
+
+def compile_entities(
+    entities_conf: Dict[str, Dict[str, Any]],
+    context: Context,
+) -> None:
+    """Add to context the pools of entities of a pattern. Attributes
+    are fields, that can refer to the entities defined before.
+
+    Arguments:
+        entities_conf {Dict[str, Dict[str, Any]]} -- 'entities' of pattern configuration
+        context {Context} -- context of pattern
+
+    Raises:
+        ValueError: raised when an entity is not valid
+    """
+    for name, conf in entities_conf.items():
+        if not isinstance(conf, dict):
+            raise ValueError(f"entity {name} must be a dict")
+        attributes = {
+            k: compile_field(f"{name}.{k}", v, context)
+            for k, v in (conf.get("attributes") or {}).items()}
+        ttl = conf.get("ttl")
+        context.entities[name] = entities.EntityPool(
+            name,
+            attributes,
+            context.clock,
+            size=int(conf.get("size", entities.DEFAULT_POOL_SIZE)),
+            ttl=float(ttl) if ttl is not None else None,
+            reuse=float(conf.get("reuse", entities.DEFAULT_REUSE)),
+            rng=context.rng)
+
+
+def compile_field(
+    name: str,
+    field_value: Union[str, List[Any], Dict[str, Any]],
+    context: Optional[Context] = None,
+) -> Callable[[], Any]:
+    """Return a callable without arguments that gives a random value of
+    a field, with the same semantic of utils.get_random_value.
+    A field can also be a dict, with the string or list in 'value' and
+    these options:
+     - cardinality: values are drawn from a pool of this number of
+       distinct values, generated once
+     - weights: weight foreach value of the list, or of the pool
+     - distribution: 'uniform' (default) or 'zipf', the value of rank r
+       of the list, or of the pool, has weight 1 / r ** exponent
+     - exponent: exponent of zipf distribution (default: 1.0)
+    or with 'file' instead of 'value', to draw the lines of a text file,
+    with the same weights or distribution, see dictionaries module;
+    or with 'entity' and 'attribute', to get an attribute of the entity
+    of the line.
+
+    Arguments:
+        name {str} -- name of field
+        field_value {Union[str, List[Any], Dict[str, Any]]} -- value of field in
+                                                               pattern configuration
+
+    Keyword Arguments:
+        context {Optional[Context]} -- context of pattern (default: {None})
+
+    Raises:
+        ValueError: raised when field value is not valid
+
+    Returns:
+        Callable[[], Any] -- callable that returns a random value of field
+    """
+    if context is None:
+        context = Context()
+
+    if isinstance(field_value, str):
+        return _compile_value(field_value, context)
+    elif isinstance(field_value, list):
+        return _compile_list(name, field_value, context)
+    elif isinstance(field_value, dict):
+        if "entity" in field_value:
+            return _compile_entity_ref(name, field_value, context)
+        if "file" in field_value:
+            return _compile_file(name, field_value, context)
+        if "value" not in field_value:
+            raise ValueError(f"field {name} must have a value, a file or an entity")
+        value = field_value["value"]
+        cardinality = field_value.get("cardinality")
+        if cardinality is not None:
+            if int(cardinality) < 1:
+                raise ValueError(f"field {name} cardinality must be greater than 0")
+            context.pooling = False
+            try:
+                generator = compile_field(name, value, context)
+            finally:
+                context.pooling = True
+            pool = bulk.make_pool(name, generator, int(cardinality))
+            log.debug(f"field {name} draws from {len(pool)} values")
+            weights = distributions.field_weights(name, field_value, len(pool))
+            return _compile_choice(pool, context, weights)
+        if isinstance(value, list):
+            weights = distributions.field_weights(name, field_value, len(value))
+            return _compile_list(name, value, context, weights)
+        if "weights" in field_value or "distribution" in field_value:
+            raise ValueError(
+                f"field {name} weights and distribution need a list value "
+                "or a cardinality")
+        return compile_field(name, value, context)
+    else:
+        raise ValueError(f"field {name} value can be a string, a list or a dict")
+
+
+def _escape(literal: str) -> str:
+    return literal.replace("{", "{{").replace("}", "}}")
+
+
+def _next_index(slots: Dict[Any, int]) -> int:
+    return len(slots.keys() - {""}) + 1
+
+
+def _rewrite(template: str, slots: Dict[Any, int]) -> str:
+    """Rewrite a template string replacing field names with positional
+    indexes. The index 0 is reserved to the current datetime, like the
+    positional argument given by utils.get_template_log.
+    slots is updated with all field names found, the empty name stands
+    for the current datetime. The current datetime with only a format
+    spec, like {:%b %d}, gets its own index with key ("", spec), so it
+    is formatted by a cached formatter.
+    """
+    parts = []
+    for literal, field_name, format_spec, conversion in _formatter.parse(template):
+        parts.append(_escape(literal))
+        if field_name is None:
+            continue
+
+        first, rest = _string.formatter_field_name_split(field_name)
+        rest = list(rest)
+        if first == "" or first == 0:
+            if format_spec and not conversion and not rest and "{" not in format_spec:
+                key = ("", format_spec)
+                parts.append("{%d}" % slots.setdefault(key, _next_index(slots)))
+                continue
+            index = slots.setdefault("", 0)
+        elif isinstance(first, int):
+            raise ValueError(
+                f"positional field {{{field_name}}} is not valid in template, "
+                "only {} or {0} (current datetime) are allowed")
+        else:
+            index = slots.setdefault(first, _next_index(slots))
+
+        accessors = "".join(
+            f".{key}" if is_attr else f"[{key}]" for is_attr, key in rest)
+        placeholder = f"{index}{accessors}"
+        if conversion:
+            placeholder += f"!{conversion}"
+        if format_spec:
+            placeholder += f":{_rewrite(format_spec, slots)}"
+        parts.append("{" + placeholder + "}")
+    return "".join(parts)
+
+
+class CompiledTemplate:
+    """A template string compiled against the fields of its pattern"""
+
+    __slots__ = (
+        "source", "fields", "needs_now", "uses_clock", "_clock", "_format",
+        "_generators")
+
+    def __init__(
+        self,
+        template: str,
+        fields: Dict[str, Any],
+        context: Optional[Context] = None,
+    ) -> None:
+        """
+        Arguments:
+            template {str} -- template string in Python formatting string
+            fields {Dict[str, Any]} -- dict field from pattern configuration file
+
+        Keyword Arguments:
+            context {Optional[Context]} -- context of pattern (default: {None})
+
+        Raises:
+            ValueError: raised when template uses a field not defined in fields
+        """
+        slots: Dict[Any, int] = {}
+        self.source = template
+        self._format = _rewrite(template, slots).format
+        self.needs_now = slots.pop("", None) is not None
+
+        missing = [i for i in slots if isinstance(i, str) and i not in fields]
+        if missing:
+            raise ValueError(
+                f"template {template!r} uses undefined fields: {', '.join(missing)}")
+
+        if context is None:
+            context = Context()
+        clock_users = context.clock_users
+
+        keys = sorted(slots, key=slots.__getitem__)
+        self.fields: Tuple[str, ...] = tuple(i for i in keys if isinstance(i, str))
+        self._generators = tuple(
+            compile_field(i, fields[i], context) if isinstance(i, str)
+            else _compile_date(context, i[1], datefmt.LOCAL)
+            for i in keys)
+        self._clock = context.clock
+        self.uses_clock = self.needs_now or context.clock_users > clock_users
+
+    def render(self, ts: Optional[float] = None) -> str:
+        """Return a random log from this template
+
+        Keyword Arguments:
+            ts {Optional[float]} -- time of log as seconds since the epoch,
+                                    None for now (default: {None})
+
+        Returns:
+            str -- random log generated from template
+        """
+        now = None
+        clock = self._clock
+        clock.line += 1
+        if self.uses_clock:
+            if ts is None:
+                ts = time.time()
+            clock.ts = ts
+            if self.needs_now:
+                now = datetime.datetime.fromtimestamp(ts)
+        return self._format(now, *[g() for g in self._generators])
+
+    def generate(self, ts: Optional[float] = None) -> List[Any]:
+        """Return the values of a random log, to format with format.
+        render does the same in a single step.
+
+        Keyword Arguments:
+            ts {Optional[float]} -- time of log as seconds since the epoch,
+                                    None for now (default: {None})
+
+        Returns:
+            List[Any] -- values of log
+        """
+        now = None
+        clock = self._clock
+        clock.line += 1
+        if self.uses_clock:
+            if ts is None:
+                ts = time.time()
+            clock.ts = ts
+            if self.needs_now:
+                now = datetime.datetime.fromtimestamp(ts)
+        return [now] + [g() for g in self._generators]
+
+    def format(self, values: List[Any]) -> str:
+        """Return the log of values given by generate
+
+        Arguments:
+            values {List[Any]} -- values of log
+
+        Returns:
+            str -- log
+        """
+        return self._format(*values)
+
+
+class CompiledRecord:
+    """The fields of a pattern serialized in a structured format, in
+    place of a template
+    """
+
+    __slots__ = (
+        "output_format", "fields", "uses_clock", "_clock", "_generators",
+        "_timestamp", "_serialize")
+
+    def __init__(
+        self,
+        fmt: str,
+        name: str,
+        fields: Dict[str, Any],
+        options: Optional[Dict[str, Any]] = None,
+        context: Optional[Context] = None,
+    ) -> None:
+        """
+        Arguments:
+            fmt {str} -- format: 'json', 'rfc5424', 'cef' or 'leef'
+            name {str} -- name of pattern
+            fields {Dict[str, Any]} -- dict field from pattern configuration file
+
+        Keyword Arguments:
+            options {Optional[Dict[str, Any]]} -- options of format (default: {None})
+            context {Optional[Context]} -- context of pattern (default: {None})
+
+        Raises:
+            ValueError: raised when the format or the fields are not valid
+        """
+        if not fields:
+            raise ValueError(f"format {fmt} requires fields")
+        if context is None:
+            context = Context()
+        clock_users = context.clock_users
+
+        self.output_format = fmt
+        self.fields: Tuple[str, ...] = tuple(str(i) for i in fields)
+        self._generators = tuple(
+            compile_field(k, v, context) for k, v in fields.items())
+        timestamp, self._serialize = formats.compile_format(
+            fmt, name, list(self.fields), options)
+
+        clock = context.clock
+        if timestamp is None:
+            self._timestamp = _constant(None)
+        elif timestamp == formats.EPOCH_MS:
+            context.clock_users += 1
+            self._timestamp = lambda: int(clock.ts * 1000)
+        else:
+            self._timestamp = _compile_date(context, timestamp, datefmt.UTC)
+        self._clock = clock
+        self.uses_clock = context.clock_users > clock_users
+
+    def render(self, ts: Optional[float] = None) -> str:
+        """Return a random log of the fields
+
+        Keyword Arguments:
+            ts {Optional[float]} -- time of log as seconds since the epoch,
+                                    None for now (default: {None})
+
+        Returns:
+            str -- random log serialized in format
+        """
+        clock = self._clock
+        clock.line += 1
+        if self.uses_clock:
+            clock.ts = time.time() if ts is None else ts
+        return self._serialize(self._timestamp(), [g() for g in self._generators])
+
+    def generate(self, ts: Optional[float] = None) -> List[Any]:
+        """Return the timestamp and the values of a random log, to
+        serialize with format. render does the same in a single step.
+
+        Keyword Arguments:
+            ts {Optional[float]} -- time of log as seconds since the epoch,
+                                    None for now (default: {None})
+
+        Returns:
+            List[Any] -- timestamp and values of log
+        """
+        clock = self._clock
+        clock.line += 1
+        if self.uses_clock:
+            clock.ts = time.time() if ts is None else ts
+        return [self._timestamp()] + [g() for g in self._generators]
+
+    def format(self, values: List[Any]) -> str:
+        """Return the log of values given by generate
+
+        Arguments:
+            values {List[Any]} -- timestamp and values of log
+
+        Returns:
+            str -- log
+        """
+        return self._serialize(values[0], values[1:])
+
+
+def _compile_delay(
+    delay: Union[None, float, List[float]],
+    context: Context,
+) -> Callable[[], float]:
+    if delay is None:
+        return _constant(0.0)
+    if isinstance(delay, list):
+        if len(delay) != 2:
+            raise ValueError(f"delay range must be [min, max], not {delay}")
+        min_delay, max_delay = float(delay[0]), float(delay[1])
+        if not 0 <= min_delay <= max_delay:
+            raise ValueError(f"delay range must be 0 <= min <= max, not {delay}")
+        return partial(context.rng.uniform, min_delay, max_delay)
+    if float(delay) < 0:
+        raise ValueError(f"delay must not be negative, not {delay}")
+    return _constant(float(delay))
+
+
+class CompiledSequence:
+    """Templates rendered one after the other, each one a delay after
+    the previous one, for the same entity
+    """
+
+    __slots__ = ("pool", "steps")
+
+    def __init__(
+        self,
+        sequence_conf: Dict[str, Any],
+        fields: Dict[str, Any],
+        context: Context,
+    ) -> None:
+        """
+        Arguments:
+            sequence_conf {Dict[str, Any]} -- sequence of pattern configuration,
+                                              with 'steps' and optional 'entity'
+            fields {Dict[str, Any]} -- dict field from pattern configuration file
+            context {Context} -- context of pattern
+
+        Raises:
+            ValueError: raised when the sequence is not valid
+        """
+        entity = sequence_conf.get("entity")
+        self.pool: Optional[entities.EntityPool] = None
+        if entity is not None:
+            self.pool = context.entities.get(entity)
+            if self.pool is None:
+                raise ValueError(f"sequence refers to undefined entity {entity}")
+
+        steps = sequence_conf.get("steps")
+        if not isinstance(steps, list) or not steps:
+            raise ValueError("sequence steps must be a list of templates")
+        steps = [i if isinstance(i, dict) else {"template": i} for i in steps]
+        self.steps: Tuple[Tuple[CompiledTemplate, Callable[[], float]], ...] = tuple(
+            (
+                CompiledTemplate(i["template"], fields, context),
+                _compile_delay(i.get("delay"), context))
+            for i in steps)
+
+    def start(self) -> Optional[entities.Entity]:
+        """Return a new entity for a new run of sequence, if it has one"""
+        return self.pool.new() if self.pool is not None else None
+
+    def render(self, step: int, entity: Optional[entities.Entity], ts: float) -> str:
+        """Return the log of a step of sequence
+
+        Arguments:
+            step {int} -- index of step
+            entity {Optional[Entity]} -- entity of this run of sequence
+            ts {float} -- time of log as seconds since the epoch
+
+        Returns:
+            str -- log of step
+        """
+        if entity is not None:
+            self.pool.bind(entity)
+        return self.steps[step][0].render(ts)
+
+    def delay(self, step: int) -> float:
+        """Return the seconds between step and the previous one"""
+        return self.steps[step][1]()
+
+
+def _weight(conf: Dict[str, Any]) -> float:
+    weight = float(conf.get("weight", 1))
+    if weight < 0:
+        raise ValueError(f"weight must not be negative, not {weight}")
+    return weight
+
+
+class CompiledPattern:
+    """Plan of a pattern: it gives a new log line each time it is rendered"""
+
+    __slots__ = (
+        "name", "generator_type", "templates", "sequences", "render",
+        "choose", "rng", "replay", "_examples", "_pending", "_counter")
+
+    def __init__(self, pattern_conf: Dict[str, Any]) -> None:
+        """
+        Arguments:
+            pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+
+        Raises:
+            ValueError: raised when the pattern is not valid
+        """
+        self.name = pattern_conf["name"]
+        self.generator_type = pattern_conf.get("generator_type", RAW)
+        self.templates: Tuple[Union[CompiledTemplate, CompiledRecord], ...] = ()
+        self.sequences: Tuple[CompiledSequence, ...] = ()
+        # replay of a file, its timing can give the schedule of pattern
+        self.replay: Optional[replay.Replay] = None
+        context = Context(
+            int(pattern_conf.get("buffer_size", DEFAULT_BUFFER_SIZE)),
+            pattern_conf.get("pattern_dir", "."),
+            pattern_conf.get("seed"))
+        # random generator of pattern, also for the jitter of backfill
+        self.rng = context.rng
+
+        if self.generator_type == TEMPLATE and pattern_conf.get("format") is not None:
+            if pattern_conf.get("template") or pattern_conf.get("sequences"):
+                raise ValueError(
+                    "format serializes the fields, it can't be used with template "
+                    "or sequences")
+            fields = pattern_conf.get("fields") or {}
+            context.faker_providers = utils.faker_providers(
+                i for i in _functions([fields, pattern_conf.get("entities")])
+                if "faker" in _parameters_of(i))
+            compile_entities(pattern_conf.get("entities") or {}, context)
+            record = CompiledRecord(
+                pattern_conf["format"], self.name, fields,
+                pattern_conf.get("format_options"), context)
+            self.templates = (record,)
+            self.choose = _constant(record)
+            self.render = record.render
+
+        elif self.generator_type == TEMPLATE:
+            sequences = pattern_conf.get("sequences") or []
+            templates = pattern_conf.get("template", [] if sequences else None)
+            if not isinstance(templates, list) or not (templates or sequences):
+                raise ValueError("template must be a list of templates")
+            if not isinstance(sequences, list):
+                raise ValueError("sequences must be a list of sequences")
+            fields = pattern_conf.get("fields") or {}
+            # Faker is created with only the providers of the fields
+            context.faker_providers = utils.faker_providers(
+                i for i in _functions([fields, pattern_conf.get("entities")])
+                if "faker" in _parameters_of(i))
+            compile_entities(pattern_conf.get("entities") or {}, context)
+            templates = [
+                i if isinstance(i, dict) else {"template": i} for i in templates]
+            self.templates = tuple(
+                CompiledTemplate(i["template"], fields, context) for i in templates)
+            self.sequences = tuple(
+                CompiledSequence(i, fields, context) for i in sequences)
+            # templates and sequences are chosen with their weight
+            weights = [_weight(i) for i in templates + sequences]
+            if self.sequences:
+                # a new line is a template or the first step of a sequence
+                self.choose = distributions.chooser(
+                    self.templates + self.sequences, weights, self.rng)
+                self._pending: List[Tuple[float, int, CompiledSequence, int, Any]] = []
+                self._counter = itertools.count()
+                self.render = self._render_stateful
+            else:
+                self.choose = distributions.chooser(self.templates, weights, self.rng)
+                if len(self.templates) == 1:
+                    self.render = self.templates[0].render
+                else:
+                    self.render = self._render_random
+
+        elif self.generator_type == RAW:
+            examples = pattern_conf.get("examples")
+            if not examples:
+                raise ValueError(
+                    f"[{self.name}] - Generator type 'raw' requires 'examples' "
+                    "field with sample logs")
+            self._examples = tuple(examples)
+            self.render = self._render_example
+
+        elif self.generator_type == REPLAY:
+            self.replay = replay.compile_replay(pattern_conf)
+            self.render = self.replay.render
+
+        else:
+            raise ValueError(f"Generator type {self.generator_type} doesn't exist")
+
+    def _render_random(self, ts: Optional[float] = None) -> str:
+        return self.choose().render(ts)
+
+    def _render_stateful(self, ts: Optional[float] = None) -> str:
+        if ts is None:
+            ts = time.time()
+
+        pending = self._pending
+        if pending and pending[0][0] <= ts:
+            # next step of a sequence is due
+            _, _, sequence, step, entity = heapq.heappop(pending)
+        else:
+            start = self.choose()
+            if isinstance(start, CompiledTemplate):
+                return start.render(ts)
+            sequence, step, entity = start, 0, start.start()
+
+        line = sequence.render(step, entity, ts)
+        step += 1
+        if step < len(sequence.steps):
+            due = ts + sequence.delay(step)
+            heapq.heappush(pending, (due, next(self._counter), sequence, step, entity))
+        return line
+
+    def _render_example(self, ts: Optional[float] = None) -> str:
+        # raw examples keep their own timestamps
+        return self.rng.choice(self._examples)
+
+
+def compile_pattern(pattern_conf: Dict[str, Any]) -> CompiledPattern:
+    """Return the plan of a configuration pattern
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+
+    Raises:
+        ValueError: raised when the pattern is not valid
+
+    Returns:
+        CompiledPattern -- plan of pattern
+    """
+    plan = CompiledPattern(pattern_conf)
+    log.debug(f"[{plan.name}] - Pattern compiled ({plan.generator_type})")
+    return plan
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Pre-rendered corpus of rlog_generator patterns.
+
+For throughput tests the lines of a pattern don't need to be unique: a
+pattern with 'corpus' renders that many lines once, when it starts, in
+an arena: a single bytes buffer with the offsets of lines and of their
+timestamps. Logs are then slices of the arena, written without copies,
+and only the bytes of timestamps are patched in place, so a log costs a
+few bytes copied instead of the rendering of a line.
+"""
+
+import io
+import logging
+import re
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+from . import compiler, replay
+
+
+log = logging.getLogger(__name__)
+
+
+def _skeleton(stamp: bytes) -> bytes:
+    # timestamps of the same style differ only in their digits
+    return re.sub(rb"\d", b"0", stamp)
+
+
+class Corpus:
+    """Lines rendered once, in a buffer, taken in a loop with their
+    first timestamp patched to the time of log
+    """
+
+    __slots__ = (
+        "name", "data", "offsets", "stamps", "styles", "widths", "formats",
+        "_view", "_index")
+
+    def __init__(self, name: str, lines: List[str]) -> None:
+        """
+        Arguments:
+            name {str} -- name of pattern
+            lines {List[str]} -- lines of corpus, without newline
+
+        Raises:
+            ValueError: raised when there are no lines
+        """
+        if not lines:
+            raise ValueError(f"[{name}] - corpus has no lines")
+        self.name = name
+        encoded = [i.encode() + b"\n" for i in lines]
+        self.data = bytearray(b"".join(encoded))
+        self._view = memoryview(self.data)
+        self._index = 0
+
+        n = len(encoded)
+        self.offsets = array("Q", bytes(8 * (n + 1)))
+        # offset of timestamp of each line in data, -1 without timestamp
+        self.stamps = array("q", bytes(8 * n))
+        # style of timestamp of each line, as index of formats and widths
+        self.styles = array("H", bytes(2 * n))
+        self.formats: List[Callable[[float], str]] = []
+        self.widths: List[int] = []
+
+        kind = replay.detect_timestamp(encoded[:replay.DETECT_LINES])
+        search = replay.TIMESTAMP_REGEXES[kind].search if kind else None
+        styles: Dict[bytes, int] = {}
+        offset = 0
+        for i, line in enumerate(encoded):
+            self.offsets[i] = offset
+            m = search(line) if search is not None else None
+            if m is None:
+                self.stamps[i] = -1
+            else:
+                key = _skeleton(m.group(0))
+                style = styles.get(key)
+                if style is None:
+                    style = styles[key] = len(self.formats)
+                    self.formats.append(replay.timestamp_formatter(kind, m))  # type: ignore
+                    self.widths.append(m.end() - m.start())
+                self.stamps[i] = offset + m.start()
+                self.styles[i] = style
+            offset += len(line)
+        self.offsets[n] = offset
+
+        patched = sum(1 for i in self.stamps if i >= 0)
+        log.debug(
+            f"[{name}] - corpus timestamps: {kind or 'none'}, "
+            f"{len(self.formats)} styles in {patched} lines")
+        if kind is not None and patched < n:
+            log.warning(
+                f"[{name}] - {n - patched} lines of corpus have no {kind} "
+                "timestamp, they are written as rendered")
+
+    def __len__(self) -> int:
+        return len(self.stamps)
+
+    def _stamp(self, style: int, ts: float) -> Optional[bytes]:
+        """Return a timestamp of a style, None when it doesn't fit the
+        bytes of the timestamps in the corpus
+        """
+        stamp = self.formats[style](ts).encode()
+        if len(stamp) != self.widths[style]:
+            # patched in place, from here on lines are written as rendered
+            log.warning(
+                f"[{self.name}] - timestamp {stamp!r} doesn't fit the corpus, "
+                "timestamps aren't patched")
+            self.formats = []
+            return None
+        return stamp
+
+    def _patch(self, first: int, last: int, ts: float) -> None:
+        """Patch the timestamps of lines in [first, last) to a time"""
+        stamps = [self._stamp(i, ts) for i in range(len(self.formats))]
+        if not stamps or None in stamps:
+            return
+        data = self.data
+        if len(stamps) == 1:
+            stamp = stamps[0]
+            width = self.widths[0]
+            for position in self.stamps[first:last]:
+                if position >= 0:
+                    data[position:position + width] = stamp  # type: ignore
+            return
+        styles = self.styles
+        widths = self.widths
+        positions = self.stamps
+        for i in range(first, last):
+            position = positions[i]
+            if position >= 0:
+                style = styles[i]
+                data[position:position + widths[style]] = stamps[style]  # type: ignore
+
+    def take(self, count: int, ts: Optional[float] = None) -> List[memoryview]:
+        """Return the next lines of corpus, from the first after the
+        last, with the timestamps patched to a time
+
+        Arguments:
+            count {int} -- number of lines
+
+        Keyword Arguments:
+            ts {Optional[float]} -- time of logs as seconds since the epoch,
+                                    None for now (default: {None})
+
+        Returns:
+            List[memoryview] -- slices of corpus to write in order,
+                                valid until the next take
+        """
+        if ts is None:
+            ts = time.time()
+        n = len(self.stamps)
+        offsets = self.offsets
+        views = []
+        while count > 0:
+            first = self._index
+            last = min(n, first + count)
+            self._patch(first, last, ts)
+            views.append(self._view[offsets[first]:offsets[last]])
+            count -= last - first
+            self._index = last % n
+        return views
+
+    def take_each(self, timestamps: List[float]) -> List[memoryview]:
+        """Return the next lines of corpus, each one with its timestamp,
+        like the lines of backfill
+
+        Arguments:
+            timestamps {List[float]} -- time foreach log, at most the
+                                        lines of corpus
+
+        Raises:
+            ValueError: raised when there are more timestamps than lines
+
+        Returns:
+            List[memoryview] -- slices of corpus to write in order,
+                                valid until the next take
+        """
+        n = len(self.stamps)
+        if len(timestamps) > n:
+            raise ValueError(
+                f"[{self.name}] - {len(timestamps)} logs taken from a corpus "
+                f"of {n} lines")
+        data = self.data
+        positions = self.stamps
+        styles = self.styles
+        widths = self.widths
+        stamp = self._stamp
+        views = []
+        index = self._index
+        first = index
+        patching = bool(self.formats)
+        for ts in timestamps:
+            position = positions[index]
+            if patching and position >= 0:
+                style = styles[index]
+                patch = stamp(style, ts)
+                if patch is None:
+                    patching = False
+                else:
+                    data[position:position + widths[style]] = patch
+            index += 1
+            if index == n:
+                views.append(self._view[self.offsets[first]:self.offsets[n]])
+                index = first = 0
+        if index > first:
+            views.append(self._view[self.offsets[first]:self.offsets[index]])
+        self._index = index % n
+        return views
+
+
+def build_corpus(
+    pattern_conf: Dict[str, Any],
+    plan: compiler.CompiledPattern,
+    ts: Optional[float] = None,
+) -> Optional[Corpus]:
+    """Render the corpus of a pattern, from 'corpus' in configuration
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+        plan {CompiledPattern} -- plan of pattern
+
+    Keyword Arguments:
+        ts {Optional[float]} -- time of first line, None for now (default: {None})
+
+    Raises:
+        ValueError: raised when the size of corpus is not valid
+
+    Returns:
+        Optional[Corpus] -- corpus of pattern, None when it has no corpus
+    """
+    size = pattern_conf.get("corpus")
+    if size is None:
+        return None
+    name = pattern_conf["name"]
+    size = int(size)
+    if size < 1:
+        raise ValueError(f"[{name}] - corpus must be greater than 0, not {size}")
+
+    start = time.perf_counter()
+    if ts is None:
+        ts = time.time()
+    # lines on a clock at the eps of pattern, so the steps of sequences are due
+    interval = 1 / float(pattern_conf.get("eps", 1))
+    render = plan.render
+    corpus = Corpus(name, [render(ts + i * interval) for i in range(size)])
+    log.info(
+        f"[{name}] - Corpus of {size} lines ({len(corpus.data) / 1e6:.1f} MB) "
+        f"rendered in {time.perf_counter() - start:.2f} s")
+    return corpus
+
+
+def writer_of(f: TextIO) -> Callable[[memoryview], Any]:
+    """Return the function that writes slices of a corpus to an output:
+    to the binary buffer of a file, decoded for the other outputs
+
+    Arguments:
+        f {TextIO} -- output of pattern
+
+    Returns:
+        Callable[[memoryview], Any] -- write of slices
+    """
+    if isinstance(f, io.TextIOWrapper):
+        # nothing is written as text, so nothing is pending in the text layer
+        return f.buffer.write
+    return lambda view: f.write(str(view, "utf-8"))
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Timestamp formatting for rlog_generator.
+
+strftime is one of the biggest costs of a log line, but at high eps many
+lines fall in the same second. A formatter keeps the formatted text of
+the last second and splices in only the microseconds (%f). When a new
+second is formatted, time.strftime is used instead of datetime.strftime
+for the formats where both give the same result, as ISO-8601, RFC3164
+syslog and Apache CLF.
+"""
+
+import datetime
+import time
+from typing import Callable, List
+
+
+UTC = "utc"
+LOCAL = "local"
+
+# timestamp used to check that time.strftime gives the same result
+# of datetime.strftime for a format
+_CHECK_TS = 1700000000
+
+
+def split_microseconds(fmt: str) -> List[str]:
+    """Split a strftime format string on %f directives, %% excluded
+
+    Arguments:
+        fmt {str} -- strftime format string
+
+    Returns:
+        List[str] -- format strings between %f directives
+    """
+    parts = []
+    current = []
+    i = 0
+    while i < len(fmt):
+        if fmt[i] == "%" and i + 1 < len(fmt):
+            directive = fmt[i:i + 2]
+            if directive == "%f":
+                parts.append("".join(current))
+                current = []
+            else:
+                current.append(directive)
+            i += 2
+        else:
+            current.append(fmt[i])
+            i += 1
+    parts.append("".join(current))
+    return parts
+
+
+def _datetime_strftime(tz: str) -> Callable[[str, int], str]:
+    if tz == UTC:
+        utc = datetime.timezone.utc
+        return lambda fmt, sec: datetime.datetime.fromtimestamp(sec, utc).strftime(fmt)
+    # naive local datetime, like datetime.now()
+    return lambda fmt, sec: datetime.datetime.fromtimestamp(sec).strftime(fmt)
+
+
+def _time_strftime(tz: str) -> Callable[[str, int], str]:
+    to_struct = time.gmtime if tz == UTC else time.localtime
+    strftime = time.strftime
+    return lambda fmt, sec: strftime(fmt, to_struct(sec))
+
+
+def _strftime_for(parts: List[str], tz: str) -> Callable[[str, int], str]:
+    """Return the fastest strftime that gives the same result of
+    datetime.strftime for all parts
+    """
+    reference = _datetime_strftime(tz)
+    fast = _time_strftime(tz)
+    try:
+        if all(fast(i, _CHECK_TS) == reference(i, _CHECK_TS) for i in parts):
+            return fast
+    except ValueError:
+        pass
+    return reference
+
+
+class CachedFormatter:
+    """Callable that formats a timestamp with a strftime format string,
+    caching the formatted text of the last second
+    """
+
+    __slots__ = ("fmt", "tz", "_parts", "_strftime", "_second", "_cached")
+
+    def __init__(self, fmt: str, tz: str = UTC) -> None:
+        """
+        Arguments:
+            fmt {str} -- strftime format string
+
+        Keyword Arguments:
+            tz {str} -- 'utc' for an aware UTC datetime, 'local' for a
+                        naive local datetime (default: {UTC})
+        """
+        self.fmt = fmt
+        self.tz = tz
+        self._parts = split_microseconds(fmt)
+        self._strftime = _strftime_for(self._parts, tz)
+        self._second = None
+        self._cached: List[str] = []
+
+    def __call__(self, ts: float) -> str:
+        """Return the timestamp formatted
+
+        Arguments:
+            ts {float} -- timestamp as seconds since the epoch
+
+        Returns:
+            str -- formatted timestamp
+        """
+        second = int(ts // 1)
+        microsecond = round((ts - second) * 1e6)
+        if microsecond == 1000000:
+            second += 1
+            microsecond = 0
+
+        if second != self._second:
+            strftime = self._strftime
+            self._cached = [strftime(i, second) for i in self._parts]
+            self._second = second
+
+        if len(self._cached) == 1:
+            return self._cached[0]
+        return f"{microsecond:06d}".join(self._cached)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+File dictionaries for rlog_generator.
+
+A field can draw its values from the lines of a large text file, like
+a list of real URLs or user agents. The file is memory-mapped instead of
+read: pages are loaded by the OS when they are used and shared by all
+processes. The offsets of lines are indexed once and the index is cached
+next to the file, in path.idx, so the next loads only map it.
+"""
+
+import array
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+
+# suffix of index file
+INDEX_SUFFIX = ".idx"
+
+# header of index file: magic, size and mtime of indexed file
+_HEADER = struct.Struct("<8sQQ")
+_MAGIC = b"rlogidx1"
+
+# offsets are unsigned 64 bit integers
+_OFFSET = "Q"
+
+
+log = logging.getLogger(__name__)
+
+
+_dictionaries: Dict[str, "FileDictionary"] = {}
+
+
+def _scan(mm: mmap.mmap) -> array.array:
+    """Return the offsets of start of not empty lines, and the size of
+    file as last offset
+    """
+    offsets = array.array(_OFFSET)
+    size = len(mm)
+    find = mm.find
+    start = 0
+    while start < size:
+        end = find(b"\n", start)
+        if end == -1:
+            end = size
+        if end > start and mm[start:end].strip():
+            offsets.append(start)
+        start = end + 1
+    offsets.append(size)
+    return offsets
+
+
+class FileDictionary:
+    """Lines of a file, memory-mapped, with O(1) random access"""
+
+    def __init__(self, path: str) -> None:
+        """
+        Arguments:
+            path {str} -- path of text file, a value per line
+
+        Raises:
+            ValueError: raised when the file doesn't exist or has no lines
+        """
+        self.path = path
+        try:
+            self._f = open(path, "rb")
+        except OSError as e:
+            raise ValueError(f"can't open dictionary {path}: {e}")
+
+        stat = os.fstat(self._f.fileno())
+        if stat.st_size == 0:
+            raise ValueError(f"dictionary {path} is empty")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        start = time.perf_counter()
+        self._offsets = self._load_index(stat) or self._build_index(stat)
+        # the last offset is the end of the last line
+        self._n = len(self._offsets) - 1
+        if self._n == 0:
+            raise ValueError(f"dictionary {path} has no lines")
+        log.debug(
+            f"Dictionary {path}: {self._n} lines loaded "
+            f"in {time.perf_counter() - start:.3f} s")
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, index: int) -> str:
+        start, end = self.bounds(index)
+        return self._mm[start:end].decode("utf-8", "replace")
+
+    @property
+    def data(self) -> mmap.mmap:
+        """Memory map of file"""
+        return self._mm
+
+    def bounds(self, index: int) -> Tuple[int, int]:
+        """Return the offsets of start and end of a line in the file,
+        without newline
+
+        Arguments:
+            index {int} -- index of line
+
+        Returns:
+            Tuple[int, int] -- offsets of first byte and after the last one
+        """
+        offsets = self._offsets
+        start = offsets[index]
+        end = self._mm.find(b"\n", start, offsets[index + 1])
+        if end == -1:
+            end = offsets[index + 1]
+        if end > start and self._mm[end - 1] == 13:
+            end -= 1
+        return start, end
+
+    def _load_index(self, stat: os.stat_result) -> Optional[Sequence[int]]:
+        index_path = self.path + INDEX_SUFFIX
+        try:
+            with open(index_path, "rb") as f:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return None
+                magic, size, mtime = _HEADER.unpack(header)
+                if magic != _MAGIC or size != stat.st_size or mtime != stat.st_mtime_ns:
+                    log.debug(f"Index {index_path} is stale")
+                    return None
+                index_mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return memoryview(index_mm)[_HEADER.size:].cast(_OFFSET)
+        except (OSError, TypeError, ValueError):
+            log.debug(f"Index {index_path} is not valid")
+            return None
+
+    def _build_index(self, stat: os.stat_result) -> Sequence[int]:
+        offsets = _scan(self._mm)
+        index_path = self.path + INDEX_SUFFIX
+        tmp_path = f"{index_path}.{os.getpid()}"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, stat.st_size, stat.st_mtime_ns))
+                offsets.tofile(f)
+            os.replace(tmp_path, index_path)
+            log.info(f"Indexed dictionary {self.path}: {len(offsets) - 1} lines")
+        except OSError as e:
+            # the index is kept in memory
+            log.warning(f"Can't write index {index_path}: {e}")
+        return offsets
+
+
+def open_dictionary(path: str) -> FileDictionary:
+    """Return the dictionary of path, opened once per process
+
+    Arguments:
+        path {str} -- path of text file
+
+    Raises:
+        ValueError: raised when the file is not a valid dictionary
+
+    Returns:
+        FileDictionary -- lines of file
+    """
+    path = os.path.realpath(path)
+    dictionary = _dictionaries.get(path)
+    if dictionary is None:
+        dictionary = _dictionaries[path] = FileDictionary(path)
+    return dictionary
@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Distributed generation for rlog_generator.
+
+A controller reads the patterns and waits for its workers, that connect
+to it over TCP. The eps of each pattern is split across the workers,
+then every worker gets its patterns with the same start time, corrected
+by the offset of its clock, and runs them as a local run. Workers push
+the snapshots of their metrics to the controller, that aggregates them
+in its registry, served by the same /metrics endpoint and stats of a
+local run.
+
+Connections are authenticated with a shared secret, messages are dicts
+sent with multiprocessing.connection.
+"""
+
+import datetime
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import metrics, replay, sinks, utils
+from . import rlog_generator as generator
+
+
+DEFAULT_PORT = 7410
+
+# seconds between the dispatch of patterns and the start of workers
+DEFAULT_START_DELAY = 2.0
+
+# messages
+REGISTER = "register"
+CLOCK = "clock"
+RUN = "run"
+METRICS = "metrics"
+DONE = "done"
+ERROR = "error"
+
+
+log = logging.getLogger(__name__)
+
+
+class WorkerSnapshots:
+    """Last snapshots of metrics pushed by a worker, read by the registry
+    of controller like the shared dicts of process workers
+    """
+
+    def __init__(self, worker: str) -> None:
+        """
+        Arguments:
+            worker {str} -- name of worker
+        """
+        self.worker = worker
+        self._lock = threading.Lock()
+        self._snapshots: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+    def update(self, snapshots: List[Dict[str, Any]]) -> None:
+        """Replace the snapshots of patterns pushed again
+
+        Arguments:
+            snapshots {List[Dict[str, Any]]} -- snapshots of worker registry
+        """
+        with self._lock:
+            for i in snapshots:
+                key = (i["pattern"], i["shard"])
+                self._snapshots[key] = dict(i, worker=self.worker)
+
+    def values(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._snapshots.values())
+
+
+def split_pattern(
+    pattern_conf: Dict[str, Any],
+    workers: int,
+    offset: int = 0,
+) -> List[Optional[Dict[str, Any]]]:
+    """Split the eps of a pattern across workers, like shard_pattern
+    does across processes. A pattern with less eps than workers runs on
+    eps workers only, starting from offset, so low eps patterns are
+    spread on all workers. The lines of a timed replay are split between
+    all workers instead. Each worker part gets its own seed, derived
+    from the seed of pattern when it has one, and its own file, so
+    workers on the same host don't share it.
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+        workers {int} -- number of workers
+
+    Keyword Arguments:
+        offset {int} -- first worker of pattern (default: {0})
+
+    Returns:
+        List[Optional[Dict[str, Any]]] -- configuration of pattern foreach
+                                          worker, None when it doesn't run it
+    """
+    eps = pattern_conf.get("eps", 1)
+    # the lines of a timed replay are split between workers, not the eps
+    timed = replay.is_timed(pattern_conf)
+    parts = workers if timed else max(1, min(workers, int(eps)))
+    seed = pattern_conf.get("seed")
+    system_random = random.SystemRandom()
+
+    confs: List[Optional[Dict[str, Any]]] = [None] * workers
+    for part in range(parts):
+        conf = dict(pattern_conf)
+        if timed:
+            conf["shard"] = part
+            conf["shards"] = parts
+        else:
+            conf["eps"] = eps // parts + (1 if part < eps % parts else 0)
+        if parts > 1:
+            if seed is None:
+                conf["seed"] = system_random.getrandbits(64)
+            else:
+                conf["seed"] = utils.derive_seed(seed, "worker", part)
+            if sinks.is_file(pattern_conf):
+                conf["path"] = generator.shard_path(pattern_conf["path"], part)
+        confs[(offset + part) % workers] = conf
+    return confs
+
+
+def assign_patterns(
+    patterns: Dict[str, Dict[str, Any]],
+    workers: int,
+) -> List[Dict[str, Dict[str, Any]]]:
+    """Return the patterns foreach worker
+
+    Arguments:
+        patterns {Dict[str, Dict[str, Any]]} -- configuration patterns
+        workers {int} -- number of workers
+
+    Returns:
+        List[Dict[str, Dict[str, Any]]] -- configuration patterns foreach worker
+    """
+    assignments: List[Dict[str, Dict[str, Any]]] = [{} for _ in range(workers)]
+    for offset, (key, conf) in enumerate(sorted(patterns.items())):
+        for worker, part in enumerate(split_pattern(conf, workers, offset)):
+            if part is not None:
+                assignments[worker][key] = part
+    return assignments
+
+
+def _register(conn: Connection) -> Tuple[str, float]:
+    """Return the name of a new worker and the offset of its clock, with
+    the time of the worker taken halfway through a round trip
+    """
+    message = conn.recv()
+    if message.get("type") != REGISTER:
+        raise ValueError(f"expected {REGISTER} message, not {message.get('type')!r}")
+    sent = time.time()
+    conn.send({"type": CLOCK})
+    worker_time = conn.recv()["time"]
+    received = time.time()
+    return message["name"], worker_time - (sent + received) / 2
+
+
+def _collect(
+    conn: Connection,
+    snapshots: WorkerSnapshots,
+    results: Dict[str, Any],
+) -> None:
+    """Receive the messages of a worker until it ends"""
+    name = snapshots.worker
+    try:
+        while True:
+            message = conn.recv()
+            if message["type"] == METRICS:
+                snapshots.update(message["snapshots"])
+            elif message["type"] == DONE:
+                results[name] = message["logs"]
+                log.info(f"Worker {name} generated {message['logs']} logs")
+                return
+            elif message["type"] == ERROR:
+                results[name] = ValueError(message["error"])
+                log.error(f"Worker {name} failed: {message['error']}")
+                return
+    except (EOFError, OSError) as e:
+        results[name] = ValueError(f"connection lost: {e!r}")
+        log.error(f"Worker {name} lost: {e!r}")
+    finally:
+        conn.close()
+
+
+def run_controller(
+    path_patterns: str,
+    workers: int,
+    secret: str,
+    host: str = metrics.DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    start_delay: float = DEFAULT_START_DELAY,
+    backfill_range: Optional[Tuple[datetime.datetime, datetime.datetime]] = None,
+    seed: Optional[int] = None,
+    metrics_port: Optional[int] = None,
+    metrics_host: str = metrics.DEFAULT_HOST,
+    stats_interval: Optional[float] = None,
+    pattern_cache: bool = True,
+) -> int:
+    """Wait for workers, split the enabled patterns across them, start
+    them together and aggregate their metrics and counters
+
+    Arguments:
+        path_patterns {str} -- path of log patterns
+        workers {int} -- number of workers to wait for
+        secret {str} -- shared secret of workers
+
+    Keyword Arguments:
+        host {str} -- address to listen on (default: {DEFAULT_HOST})
+        port {int} -- TCP port to listen on (default: {DEFAULT_PORT})
+        start_delay {float} -- seconds between the dispatch of patterns and
+                               their start (default: {DEFAULT_START_DELAY})
+        backfill_range {Optional[Tuple[datetime, datetime]]} -- backfill
+            this time range instead of real time logs (default: {None})
+        seed {Optional[int]} -- seed of run (default: {None})
+        metrics_port {Optional[int]} -- port of HTTP /metrics endpoint, None to disable
+        metrics_host {str} -- address of HTTP /metrics endpoint
+        stats_interval {Optional[float]} -- seconds between JSON stats on stderr
+        pattern_cache {bool} -- load patterns parsed by previous runs (default: {True})
+
+    Raises:
+        ValueError: raised when the run is not valid or a worker failed
+
+    Returns:
+        int -- Total number of logs generated by workers
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be greater than 0, not {workers}")
+    if backfill_range is not None and backfill_range[0] >= backfill_range[1]:
+        raise ValueError("backfill start must be before end")
+
+    patterns = generator.load_patterns(path_patterns, pattern_cache)
+    if len(patterns) == 0:
+        log.error("There aren't logs to generate. Check pattern files")
+        return 0
+    for i in patterns.values():
+        if seed is not None and "seed" not in i:
+            i["seed"] = utils.derive_seed(seed, i["name"])
+    assignments = assign_patterns(patterns, workers)
+
+    server = None
+    reporter = None
+    metrics.REGISTRY.clear()
+    links: List[Tuple[Connection, WorkerSnapshots, float]] = []
+    results: Dict[str, Any] = {}
+    collectors = []
+    try:
+        with Listener((host, port), authkey=secret.encode()) as listener:
+            log.info(f"Waiting for {workers} workers on {host}:{listener.address[1]}")
+            while len(links) < workers:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, EOFError, OSError) as e:
+                    log.warning(f"Connection refused: {e!r}")
+                    continue
+                try:
+                    name, offset = _register(conn)
+                except (EOFError, OSError, KeyError, ValueError) as e:
+                    log.warning(f"Registration failed: {e!r}")
+                    conn.close()
+                    continue
+                name = f"{name}-{len(links)}"
+                log.info(
+                    f"Worker {name} registered, clock offset {offset * 1000:.1f} ms")
+                links.append((conn, WorkerSnapshots(name), offset))
+
+        if metrics_port is not None:
+            server = metrics.serve(metrics_port, metrics_host)
+        if stats_interval is not None:
+            reporter = metrics.StatsReporter(stats_interval).start()
+
+        start_at = time.time() + start_delay
+        for (conn, snapshots, offset), assigned in zip(links, assignments):
+            summary = ", ".join(
+                f"{k} at {v.get('eps', 1)} eps" for k, v in sorted(assigned.items()))
+            log.info(f"Worker {snapshots.worker}: {summary or 'no patterns'}")
+            conn.send({
+                "type": RUN,
+                "patterns": assigned,
+                # on the clock of worker
+                "start_at": start_at + offset,
+                "backfill": backfill_range})
+            metrics.REGISTRY.add_remote(snapshots)
+            collector = threading.Thread(
+                target=_collect, args=(conn, snapshots, results), daemon=True)
+            collector.start()
+            collectors.append(collector)
+
+        for i in collectors:
+            i.join()
+    finally:
+        for conn, _, _ in links:
+            conn.close()
+        if reporter is not None:
+            reporter.stop()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    errors = [f"{k}: {v}" for k, v in results.items() if isinstance(v, Exception)]
+    if errors:
+        raise ValueError(f"{len(errors)} workers failed: {'; '.join(errors)}")
+
+    by_pattern: Dict[str, int] = {}
+    for i in metrics.REGISTRY.snapshot():
+        by_pattern[i["pattern"]] = by_pattern.get(i["pattern"], 0) + i["lines"]
+    for name, nr_logs in sorted(by_pattern.items()):
+        log.info(f"[{name}] - Generated {nr_logs} logs on {workers} workers")
+    return sum(results.values())
+
+
+def _push(
+    conn: Connection,
+    lock: threading.Lock,
+    stop: threading.Event,
+    interval: float,
+) -> None:
+    """Send the snapshots of registry to the controller every interval"""
+    while not stop.wait(interval):
+        with lock:
+            conn.send({"type": METRICS, "snapshots": metrics.REGISTRY.snapshot()})
+
+
+def run_worker(
+    secret: str,
+    host: str = metrics.DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    name: Optional[str] = None,
+    max_concur_req: int = 10,
+    executor: str = generator.THREAD,
+    shard_eps: int = generator.DEFAULT_SHARD_EPS,
+) -> int:
+    """Connect to a controller, run the patterns it sends and push
+    metrics and counters back
+
+    Arguments:
+        secret {str} -- shared secret of controller
+
+    Keyword Arguments:
+        host {str} -- address of controller (default: {DEFAULT_HOST})
+        port {int} -- TCP port of controller (default: {DEFAULT_PORT})
+        name {Optional[str]} -- name of worker, None for the host name (default: {None})
+        max_concur_req {int} -- max concurrent log generator (default: {10})
+        executor {str} -- execution backend of worker (default: {THREAD})
+        shard_eps {int} -- max eps of a process (default: {DEFAULT_SHARD_EPS})
+
+    Raises:
+        ValueError: raised when the controller is not reachable or the run failed
+
+    Returns:
+        int -- number of logs generated by worker
+    """
+    try:
+        conn = Client((host, port), authkey=secret.encode())
+    except (AuthenticationError, OSError) as e:
+        raise ValueError(f"can't connect to controller {host}:{port}: {e}")
+
+    lock = threading.Lock()
+    stop = threading.Event()
+    with conn:
+        conn.send({
+            "type": REGISTER, "name": name or socket.gethostname(),
+            "cores": os.cpu_count()})
+        conn.recv()
+        conn.send({"time": time.time()})
+
+        message = conn.recv()
+        if message.get("type") != RUN:
+            raise ValueError(f"expected {RUN} message, not {message.get('type')!r}")
+        log.info(
+            f"Running {len(message['patterns'])} patterns of controller {host}:{port}")
+
+        pusher = threading.Thread(
+            target=_push, args=(conn, lock, stop, metrics.PUSH_INTERVAL), daemon=True)
+        pusher.start()
+        try:
+            nr_logs = generator.run(
+                message["patterns"],
+                max_concur_req,
+                executor=executor,
+                shard_eps=shard_eps,
+                backfill_range=message["backfill"],
+                start_at=message["start_at"],
+                collect_metrics=True) if message["patterns"] else 0
+        except Exception as e:
+            stop.set()
+            pusher.join()
+            with lock:
+                conn.send({"type": ERROR, "error": f"{type(e).__name__}: {e}"})
+            raise
+        stop.set()
+        pusher.join()
+        with lock:
+            conn.send({"type": METRICS, "snapshots": metrics.REGISTRY.snapshot()})
+            conn.send({"type": DONE, "logs": nr_logs})
+    return nr_logs
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Weighted random choices for rlog_generator.
+
+Weights of values and templates are turned, once when the pattern is
+compiled, into an alias table (Vose's method), so every draw costs two
+random numbers whatever the number of values. Zipf weights give the
+power law of real logs, where a few values are most of the lines.
+"""
+
+import random
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from . import bulk
+
+
+UNIFORM = "uniform"
+ZIPF = "zipf"
+
+DISTRIBUTIONS = (UNIFORM, ZIPF)
+
+DEFAULT_ZIPF_EXPONENT = 1.0
+
+
+def zipf_weights(n: int, exponent: float = DEFAULT_ZIPF_EXPONENT) -> List[float]:
+    """Return the weights of a Zipf distribution: the value of rank r
+    has weight 1 / r ** exponent
+
+    Arguments:
+        n {int} -- number of values
+
+    Keyword Arguments:
+        exponent {float} -- exponent of power law (default: {DEFAULT_ZIPF_EXPONENT})
+
+    Returns:
+        List[float] -- weights in rank order
+    """
+    return [1 / r ** exponent for r in range(1, n + 1)]
+
+
+class AliasTable:
+    """Alias table of weights, to draw indexes in O(1)"""
+
+    __slots__ = ("n", "prob", "alias", "cum_weights", "rng")
+
+    def __init__(self, weights: Sequence[float], rng: Any = random) -> None:
+        """
+        Arguments:
+            weights {Sequence[float]} -- weight foreach index
+
+        Keyword Arguments:
+            rng {Any} -- random generator of pattern (default: {random})
+
+        Raises:
+            ValueError: raised when weights are not valid
+        """
+        n = len(weights)
+        if n == 0:
+            raise ValueError("weights must not be empty")
+        if any(w < 0 for w in weights):
+            raise ValueError("weights must not be negative")
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError("sum of weights must be greater than 0")
+
+        self.n = n
+        self.rng = rng
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = g
+            scaled[g] -= 1 - scaled[s]
+            (small if scaled[g] < 1 else large).append(g)
+        # what is left has probability 1, up to rounding errors
+        for i in small + large:
+            self.prob[i] = 1.0
+
+        # cumulative weights, for draws in bulk without NumPy
+        self.cum_weights: List[float] = []
+        cumulative = 0.0
+        for w in weights:
+            cumulative += w
+            self.cum_weights.append(cumulative)
+
+    def sample(self) -> int:
+        """Return a random index
+
+        Returns:
+            int -- index drawn with its weight
+        """
+        u = self.rng.random() * self.n
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def sample_bulk(self, k: int) -> List[int]:
+        """Return k random indexes
+
+        Arguments:
+            k {int} -- number of indexes
+
+        Returns:
+            List[int] -- indexes drawn with their weights
+        """
+        numpy = bulk.get_numpy()
+        if numpy is None:
+            return self.rng.choices(range(self.n), cum_weights=self.cum_weights, k=k)
+        generator = numpy.random.default_rng(self.rng.getrandbits(64))
+        index = generator.integers(0, self.n, size=k)
+        alias = numpy.asarray(self.alias)[index]
+        kept = generator.random(k) < numpy.asarray(self.prob)[index]
+        return numpy.where(kept, index, alias).tolist()
+
+
+def chooser(
+    values: Sequence[Any],
+    weights: Optional[Sequence[float]] = None,
+    rng: Any = random,
+) -> Callable[[], Any]:
+    """Return a callable that gives a random value, drawn with weights
+
+    Arguments:
+        values {Sequence[Any]} -- values to choose from
+
+    Keyword Arguments:
+        weights {Optional[Sequence[float]]} -- weight foreach value,
+                                               None for uniform (default: {None})
+        rng {Any} -- random generator of pattern (default: {random})
+
+    Returns:
+        Callable[[], Any] -- callable that returns a random value
+    """
+    values = tuple(values)
+    if weights is None or len(set(weights)) == 1:
+        return partial(rng.choice, values)
+    sample = AliasTable(weights, rng).sample
+    return lambda: values[sample()]
+
+
+def choice_bulk(
+    values: Sequence[Any],
+    weights: Sequence[float],
+    rng: Any = random,
+) -> bulk.BulkFunction:
+    """Return a bulk function of random choices of values, drawn with weights
+
+    Arguments:
+        values {Sequence[Any]} -- values to choose from
+        weights {Sequence[float]} -- weight foreach value
+
+    Keyword Arguments:
+        rng {Any} -- random generator of pattern (default: {random})
+
+    Returns:
+        BulkFunction -- bulk function of weighted random choices
+    """
+    values = tuple(values)
+    sample_bulk = AliasTable(weights, rng).sample_bulk
+    return lambda k: [values[i] for i in sample_bulk(k)]
+
+
+def field_weights(
+    name: str,
+    field_conf: Dict[str, Any],
+    n: int,
+) -> Optional[List[float]]:
+    """Return the weights of the n values of a field from 'weights' or
+    'distribution' of its dict form, None for uniform
+
+    Arguments:
+        name {str} -- name of field
+        field_conf {Dict[str, Any]} -- dict of field
+        n {int} -- number of values of field
+
+    Raises:
+        ValueError: raised when weights or distribution are not valid
+
+    Returns:
+        Optional[List[float]] -- weight foreach value
+    """
+    weights = field_conf.get("weights")
+    distribution = field_conf.get("distribution", UNIFORM)
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(
+            f"field {name} distribution must be one of {', '.join(DISTRIBUTIONS)}, "
+            f"not {distribution!r}")
+
+    if weights is not None:
+        if distribution != UNIFORM:
+            raise ValueError(f"field {name} can't have both weights and distribution")
+        if len(weights) != n:
+            raise ValueError(f"field {name} has {len(weights)} weights for {n} values")
+        weights = [float(i) for i in weights]
+        if any(i < 0 for i in weights) or sum(weights) <= 0:
+            raise ValueError(f"field {name} weights must not be negative and not all 0")
+        return weights
+
+    if distribution == ZIPF:
+        return zipf_weights(n, float(field_conf.get("exponent", DEFAULT_ZIPF_EXPONENT)))
+    return None
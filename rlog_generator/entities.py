@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Stateful entities for rlog_generator.
+
+An entity, like a user, a host or a message, is a set of attributes
+generated together when it is created. Entities live in a bounded pool
+of a pattern: a line reuses a live entity or creates a new one, and all
+fields of a line that refer to the same pool get the attributes of the
+same entity. Entities are evicted when the pool is full, the least
+recently used first, or when they are not used for ttl seconds of line
+time.
+"""
+
+import itertools
+import logging
+import random
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+DEFAULT_POOL_SIZE = 1000
+
+# probability that a line reuses a live entity instead of a new one
+DEFAULT_REUSE = 0.9
+
+# attribute with the sequential number of entity in its pool
+ID = "id"
+
+
+log = logging.getLogger(__name__)
+
+
+class Entity:
+    """Attributes of an entity and its state in the pool"""
+
+    __slots__ = ("attributes", "last_seen", "index")
+
+    def __init__(self, attributes: Dict[str, Any], last_seen: float) -> None:
+        self.attributes = attributes
+        self.last_seen = last_seen
+        # position in the list of live entities, -1 when evicted
+        self.index = -1
+
+
+class EntityPool:
+    """Bounded pool of live entities with LRU and TTL eviction"""
+
+    def __init__(
+        self,
+        name: str,
+        attributes: Dict[str, Callable[[], Any]],
+        clock: Any,
+        size: int = DEFAULT_POOL_SIZE,
+        ttl: Optional[float] = None,
+        reuse: float = DEFAULT_REUSE,
+        rng: Any = random,
+    ) -> None:
+        """
+        Arguments:
+            name {str} -- name of entity
+            attributes {Dict[str, Callable[[], Any]]} -- generators of attributes
+            clock {Any} -- line clock of pattern, with ts and line
+
+        Keyword Arguments:
+            size {int} -- max live entities (default: {DEFAULT_POOL_SIZE})
+            ttl {Optional[float]} -- seconds after the last use an entity
+                                     expires, None to never expire (default: {None})
+            reuse {float} -- probability of reusing a live entity
+                             (default: {DEFAULT_REUSE})
+            rng {Any} -- random generator of pattern (default: {random})
+
+        Raises:
+            ValueError: raised when a parameter is not valid
+        """
+        if size < 1:
+            raise ValueError(f"entity {name} size must be greater than 0, not {size}")
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f"entity {name} ttl must be greater than 0, not {ttl}")
+        if not 0 <= reuse <= 1:
+            raise ValueError(f"entity {name} reuse must be in [0, 1], not {reuse}")
+
+        self.name = name
+        self.size = size
+        self.ttl = ttl
+        self.reuse = reuse
+        self._attributes = attributes
+        self._clock = clock
+        self._rng = rng
+        self._ids = itertools.count(1)
+        # live entities, for random choice, and their order of use
+        self._live: List[Entity] = []
+        self._lru: "OrderedDict[Entity, None]" = OrderedDict()
+        # entity of the line being rendered
+        self._line = -1
+        self._current: Optional[Entity] = None
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def _remove(self, entity: Entity) -> None:
+        last = self._live.pop()
+        if last is not entity:
+            self._live[entity.index] = last
+            last.index = entity.index
+        entity.index = -1
+        del self._lru[entity]
+
+    def _expired(self, entity: Entity, now: float) -> bool:
+        return self.ttl is not None and now - entity.last_seen > self.ttl
+
+    def new(self) -> Entity:
+        """Create a new entity and add it to the pool, evicting the
+        least recently used one if the pool is full
+
+        Returns:
+            Entity -- new entity
+        """
+        if len(self._live) >= self.size:
+            self._remove(next(iter(self._lru)))
+
+        attributes = {ID: next(self._ids)}
+        for name, generator in self._attributes.items():
+            attributes[name] = generator()
+
+        entity = Entity(attributes, self._clock.ts)
+        entity.index = len(self._live)
+        self._live.append(entity)
+        self._lru[entity] = None
+        return entity
+
+    def pick(self) -> Entity:
+        """Return a live entity or a new one
+
+        Returns:
+            Entity -- entity
+        """
+        now = self._clock.ts
+        # the least recently used entities expire first
+        while self._lru and self._expired(next(iter(self._lru)), now):
+            self._remove(next(iter(self._lru)))
+
+        if self._live and self._rng.random() < self.reuse:
+            entity = self._rng.choice(self._live)
+            entity.last_seen = now
+            self._lru.move_to_end(entity)
+            return entity
+        return self.new()
+
+    def bind(self, entity: Entity) -> None:
+        """Use entity for the next line, as the steps of a sequence do
+
+        Arguments:
+            entity {Entity} -- entity of next line
+        """
+        self._line = self._clock.line + 1
+        self._current = entity
+        if entity.index >= 0:
+            entity.last_seen = self._clock.ts
+            self._lru.move_to_end(entity)
+
+    def current(self) -> Entity:
+        """Return the entity of the line being rendered, picking it at
+        the first use in the line
+
+        Returns:
+            Entity -- entity of line
+        """
+        line = self._clock.line
+        if self._line != line:
+            self._current = self.pick()
+            self._line = line
+        return self._current
+
+    def attribute(self, name: str) -> Callable[[], Any]:
+        """Return a callable that gives an attribute of the entity of line
+
+        Arguments:
+            name {str} -- name of attribute
+
+        Raises:
+            ValueError: raised when the attribute doesn't exist
+
+        Returns:
+            Callable[[], Any] -- callable that returns the attribute
+        """
+        if name != ID and name not in self._attributes:
+            raise ValueError(f"entity {self.name} has no attribute {name}")
+        current = self.current
+        return lambda: current().attributes[name]
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Structured output formats for rlog_generator.
+
+The fields of a pattern are serialized as JSON Lines, RFC5424 syslog,
+CEF or LEEF instead of being formatted in a template. Keys, static parts
+and escaping of each field are compiled once per pattern in a format
+string, so a log costs one str.format call with the escaped values.
+JSON uses orjson when it is installed, the stdlib encoder otherwise.
+"""
+
+import json
+import re
+from json.encoder import encode_basestring
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+JSON = "json"
+RFC5424 = "rfc5424"
+CEF = "cef"
+LEEF = "leef"
+FORMATS = (JSON, RFC5424, CEF, LEEF)
+
+# timestamp as milliseconds since the epoch, instead of a strftime format
+EPOCH_MS = "epoch_ms"
+
+ISO_8601 = "%Y-%m-%dT%H:%M:%S.%fZ"
+LEEF_TIME = "%b %d %Y %H:%M:%S"
+
+# private enterprise number of example, for structured data of RFC5424
+DEFAULT_SD_ID = "fields@32473"
+
+# escapes of values, the backslash first
+_SD_VALUE = (
+    ("\\", "\\\\"), ('"', '\\"'), ("]", "\\]"), ("\n", "\\n"), ("\r", "\\r"))
+_MSG = (("\n", "\\n"), ("\r", "\\r"))
+_TOKEN = ((" ", "_"), ("\t", "_"), ("\n", "_"), ("\r", "_"))
+_SD_NAME = re.compile(r'^[!-~]{1,32}$')
+_CEF_HEADER = (("\\", "\\\\"), ("|", "\\|"), ("\n", " "), ("\r", " "))
+_CEF_VALUE = (("\\", "\\\\"), ("=", "\\="), ("\n", "\\n"), ("\r", "\\r"))
+_CEF_KEY = re.compile(r'^[A-Za-z0-9_]+$')
+_LEEF_VALUE = (("\t", " "), ("\n", " "), ("\r", " "))
+
+# serializer of a log: timestamp and field values to text
+Serializer = Callable[[Any, List[Any]], str]
+
+
+def _json_value(value: Any) -> str:
+    kind = type(value)
+    if kind is str:
+        return encode_basestring(value)
+    if kind is int or kind is float:
+        return repr(value) if value == value and abs(value) != float("inf") else "null"
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _braces(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _text(pairs: Tuple[Tuple[str, str], ...]) -> Callable[[Any], str]:
+    # faster than str.translate, that builds a new string char by char
+    def escape(value: Any) -> str:
+        text = str(value)
+        for old, new in pairs:
+            if old in text:
+                text = text.replace(old, new)
+        return text
+
+    return escape
+
+
+def _compile(parts: List[Any]) -> Serializer:
+    """Return a serializer of parts: constant strings, or (index, escape)
+    of the values, with index -1 for the timestamp
+    """
+    template = []
+    slots: List[Tuple[int, Callable[[Any], str]]] = []
+    for i in parts:
+        if isinstance(i, str):
+            template.append(_braces(i))
+        else:
+            template.append("{}")
+            slots.append(i)
+    fmt = "".join(template).format
+
+    def serialize(ts: Any, values: List[Any]) -> str:
+        return fmt(*[
+            escape(ts if index < 0 else values[index]) for index, escape in slots])
+
+    return serialize
+
+
+def _option(options: Dict[str, Any], key: str, keys: List[str], default: Any) -> Any:
+    """Return an option of format: the index of a field when its value
+    is the name of a field, or a constant
+    """
+    value = options.get(key, default)
+    if isinstance(value, str) and value in keys:
+        return keys.index(value)
+    return str(value)
+
+
+def _token(value: Any) -> str:
+    # header values of RFC5424 can't have spaces or be empty
+    return _text(_TOKEN)(value) or "-"
+
+
+def _header(value: Any, escape: Callable[[Any], str]) -> Any:
+    return (value, escape) if isinstance(value, int) else escape(value)
+
+
+def _json(keys: List[str], timestamp: Optional[str]) -> Serializer:
+    if orjson is not None:
+        dumps = orjson.dumps
+
+        if timestamp is None:
+            return lambda ts, values: dumps(
+                dict(zip(keys, values)), default=str).decode()
+        names = [timestamp] + keys
+        return lambda ts, values: dumps(
+            dict(zip(names, [ts] + values)), default=str).decode()
+
+    parts: List[Any] = []
+    separator = "{"
+    if timestamp is not None:
+        parts.extend(
+            [separator + encode_basestring(timestamp) + ":", (-1, _json_value)])
+        separator = ","
+    for index, key in enumerate(keys):
+        parts.extend([separator + encode_basestring(key) + ":", (index, _json_value)])
+        separator = ","
+    parts.append("{}" if separator == "{" else "}")
+    return _compile(parts)
+
+
+def _rfc5424(name: str, keys: List[str], options: Dict[str, Any]) -> Serializer:
+    facility = int(options.get("facility", 1))
+    severity = int(options.get("severity", 6))
+    if not 0 <= facility <= 23 or not 0 <= severity <= 7:
+        raise ValueError(
+            "facility must be in [0, 23] and severity in [0, 7], "
+            f"not {facility} and {severity}")
+    header = [
+        _option(options, "hostname", keys, "-"),
+        _option(options, "app_name", keys, name),
+        _option(options, "procid", keys, "-"),
+        _option(options, "msgid", keys, "-")]
+    message = _option(options, "message", keys, "") if "message" in options else None
+
+    sd_id = str(options.get("sd_id", DEFAULT_SD_ID))
+    used = {i for i in header + [message] if isinstance(i, int)}
+    params = [(i, k) for i, k in enumerate(keys) if i not in used]
+    for _, key in [(None, sd_id)] + params:
+        if not _SD_NAME.match(key) or any(c in key for c in '= ]"'):
+            raise ValueError(f"{key!r} is not a valid name of RFC5424 structured data")
+
+    parts: List[Any] = [f"<{facility * 8 + severity}>1 ", (-1, str)]
+    for i in header:
+        parts.extend([" ", _header(i, _token)])
+    if params:
+        parts.append(f" [{sd_id}")
+        for index, key in params:
+            parts.extend([f' {key}="', (index, _text(_SD_VALUE)), '"'])
+        parts.append("]")
+    else:
+        parts.append(" -")
+    if message is not None:
+        # a line is a log, also for the message
+        parts.extend([" ", _header(message, _text(_MSG))])
+    return _compile(parts)
+
+
+def _cef(
+    name: str,
+    keys: List[str],
+    options: Dict[str, Any],
+    timestamp: Optional[str],
+) -> Serializer:
+    header = [
+        _option(options, "vendor", keys, "rlog_generator"),
+        _option(options, "product", keys, name),
+        _option(options, "version", keys, "1.0"),
+        _option(options, "signature_id", keys, name),
+        _option(options, "name", keys, name),
+        _option(options, "severity", keys, 5)]
+    used = {i for i in header if isinstance(i, int)}
+    params = [(i, k) for i, k in enumerate(keys) if i not in used]
+    for _, key in params:
+        if not _CEF_KEY.match(key):
+            raise ValueError(f"{key!r} is not a valid CEF extension key")
+
+    parts: List[Any] = ["CEF:0"]
+    for i in header:
+        parts.extend(["|", _header(i, _text(_CEF_HEADER))])
+    parts.append("|")
+    separator = ""
+    if timestamp is not None:
+        parts.extend([f"{timestamp}=", (-1, str)])
+        separator = " "
+    for index, key in params:
+        parts.extend([f"{separator}{key}=", (index, _text(_CEF_VALUE))])
+        separator = " "
+    return _compile(parts)
+
+
+def _leef(
+    name: str,
+    keys: List[str],
+    options: Dict[str, Any],
+    timestamp: Optional[str],
+) -> Serializer:
+    header = [
+        _option(options, "vendor", keys, "rlog_generator"),
+        _option(options, "product", keys, name),
+        _option(options, "version", keys, "1.0"),
+        _option(options, "event_id", keys, name)]
+    used = {i for i in header if isinstance(i, int)}
+    params = [(i, k) for i, k in enumerate(keys) if i not in used]
+
+    parts: List[Any] = ["LEEF:1.0"]
+    for i in header:
+        parts.extend(["|", _header(i, _text(_CEF_HEADER))])
+    parts.append("|")
+    separator = ""
+    if timestamp is not None:
+        parts.extend([f"{timestamp}=", (-1, str)])
+        separator = "\t"
+    for index, key in params:
+        parts.extend([f"{separator}{key}=", (index, _text(_LEEF_VALUE))])
+        separator = "\t"
+    return _compile(parts)
+
+
+def compile_format(
+    fmt: str,
+    name: str,
+    keys: List[str],
+    options: Optional[Dict[str, Any]] = None,
+) -> Tuple[Optional[str], Serializer]:
+    """Return how the timestamp is formatted and the serializer of the
+    fields of a pattern in a structured format
+
+    Arguments:
+        fmt {str} -- format: 'json', 'rfc5424', 'cef' or 'leef'
+        name {str} -- name of pattern, default of names in headers
+        keys {List[str]} -- names of fields, in their order
+
+    Keyword Arguments:
+        options {Optional[Dict[str, Any]]} -- options of format (default: {None})
+
+    Raises:
+        ValueError: raised when the format or its options are not valid
+
+    Returns:
+        Tuple[Optional[str], Serializer] -- strftime format of timestamp,
+            EPOCH_MS or None without timestamp, and serializer of a
+            timestamp and the values of fields
+    """
+    options = options or {}
+    if not isinstance(options, dict):
+        raise ValueError(f"format_options must be a dict, not {options!r}")
+
+    if fmt == JSON:
+        timestamp = options.get("timestamp_field", "@timestamp")
+        return (ISO_8601 if timestamp else None), _json(keys, timestamp or None)
+    if fmt == RFC5424:
+        return ISO_8601, _rfc5424(name, keys, options)
+    if fmt == CEF:
+        timestamp = options.get("timestamp_field", "rt")
+        serializer = _cef(name, keys, options, timestamp or None)
+        return (EPOCH_MS if timestamp else None), serializer
+    if fmt == LEEF:
+        timestamp = options.get("timestamp_field", "devTime")
+        serializer = _leef(name, keys, options, timestamp or None)
+        return (LEEF_TIME if timestamp else None), serializer
+    raise ValueError(f"format must be one of {', '.join(FORMATS)}, not {fmt!r}")
@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Live metrics of rlog_generator.
+
+Every running pattern has counters of lines and bytes written, time spent
+rendering and writing, and a histogram of write latency, next to the
+target and achieved eps, lag and dropped/late events of its scheduler.
+They are served in Prometheus text format on a local HTTP endpoint and
+can be written periodically to stderr as JSON lines. Process workers push
+their snapshots to a shared dict read by the parent.
+"""
+
+import bisect
+import json
+import logging
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, TextIO, Tuple
+
+from .scheduler import RateScheduler
+
+if TYPE_CHECKING:  # pragma: no cover
+    from http.server import ThreadingHTTPServer
+
+
+DEFAULT_HOST = "127.0.0.1"
+
+# upper bounds in seconds of write latency histogram
+WRITE_BUCKETS = (0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+# seconds between pushes of process workers
+PUSH_INTERVAL = 1.0
+
+
+log = logging.getLogger(__name__)
+
+
+class PatternMetrics:
+    """Counters of a running pattern, updated by its writer only"""
+
+    def __init__(
+        self,
+        name: str,
+        shard: int = 0,
+        scheduler: Optional[RateScheduler] = None,
+    ) -> None:
+        """
+        Arguments:
+            name {str} -- name of pattern
+
+        Keyword Arguments:
+            shard {int} -- shard of pattern (default: {0})
+            scheduler {Optional[RateScheduler]} -- scheduler of pattern,
+                                                   None when not paced (default: {None})
+        """
+        self.name = name
+        self.shard = shard
+        self.scheduler = scheduler
+        self.lines = 0
+        self.bytes = 0
+        self.render_seconds = 0.0
+        self.write_seconds = 0.0
+        self.writes = 0
+        # count of writes foreach bucket, the last one is +Inf
+        self._buckets = [0] * (len(WRITE_BUCKETS) + 1)
+
+    def observe(self, lines: int, nr_bytes: int, render: float, write: float) -> None:
+        """Record a write
+
+        Arguments:
+            lines {int} -- number of logs written
+            nr_bytes {int} -- bytes written
+            render {float} -- seconds spent rendering logs
+            write {float} -- seconds spent writing and flushing
+        """
+        self.lines += lines
+        self.bytes += nr_bytes
+        self.render_seconds += render
+        self.write_seconds += write
+        self.writes += 1
+        self._buckets[bisect.bisect_left(WRITE_BUCKETS, write)] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current values of metrics
+
+        Returns:
+            Dict[str, Any] -- metrics of pattern, with cumulative
+                              counts of write latency buckets
+        """
+        buckets = []
+        total = 0
+        for i in self._buckets:
+            total += i
+            buckets.append(total)
+
+        snapshot = {
+            "pattern": self.name,
+            "shard": self.shard,
+            "lines": self.lines,
+            "bytes": self.bytes,
+            "render_seconds": self.render_seconds,
+            "write_seconds": self.write_seconds,
+            "writes": self.writes,
+            "write_buckets": buckets,
+        }
+        if self.scheduler is not None:
+            stats = self.scheduler.stats()
+            snapshot.update({
+                "target_eps": stats["target_eps"],
+                "achieved_eps": stats["achieved_eps"],
+                "lag_p50": stats["lag_p50"],
+                "lag_p99": stats["lag_p99"],
+                "dropped": stats["dropped"],
+                "late": stats["late"],
+            })
+        return snapshot
+
+
+class Registry:
+    """Metrics of all patterns of a run"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._patterns: Dict[Tuple[str, int], PatternMetrics] = {}
+        # shared dicts where process workers push their snapshots
+        self._remotes: List[Any] = []
+
+    def register(
+        self,
+        name: str,
+        shard: int = 0,
+        scheduler: Optional[RateScheduler] = None,
+    ) -> PatternMetrics:
+        """Return new metrics of a pattern, replacing previous ones
+
+        Arguments:
+            name {str} -- name of pattern
+
+        Keyword Arguments:
+            shard {int} -- shard of pattern (default: {0})
+            scheduler {Optional[RateScheduler]} -- scheduler of pattern
+                                                   (default: {None})
+
+        Returns:
+            PatternMetrics -- metrics of pattern
+        """
+        metrics = PatternMetrics(name, shard, scheduler)
+        with self._lock:
+            self._patterns[(name, shard)] = metrics
+        return metrics
+
+    def add_remote(self, store: Any) -> None:
+        """Add a shared dict of snapshots pushed by process workers, or
+        by the workers of a controller
+
+        Arguments:
+            store {Any} -- dict proxy of a multiprocessing Manager, or
+                           any object with values()
+        """
+        with self._lock:
+            self._remotes.append(store)
+
+    def remove_remote(self, store: Any) -> None:
+        """Remove a shared dict of snapshots
+
+        Arguments:
+            store {Any} -- dict proxy added by add_remote
+        """
+        with self._lock:
+            self._remotes = [i for i in self._remotes if i is not store]
+
+    def clear(self) -> None:
+        """Remove all metrics"""
+        with self._lock:
+            self._patterns.clear()
+            self._remotes.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return the snapshots of all patterns
+
+        Returns:
+            List[Dict[str, Any]] -- snapshot foreach pattern and shard
+        """
+        with self._lock:
+            patterns = list(self._patterns.values())
+            remotes = list(self._remotes)
+
+        snapshots = [i.snapshot() for i in patterns]
+        for store in remotes:
+            try:
+                snapshots.extend(store.values())
+            except (EOFError, OSError):  # pragma: no cover
+                # manager already shut down at the end of run
+                pass
+        return sorted(snapshots, key=lambda i: (i["pattern"], i["shard"]))
+
+    def prometheus(self) -> str:
+        """Return the metrics of all patterns in Prometheus text format
+
+        Returns:
+            str -- exposition of metrics
+        """
+        return format_prometheus(self.snapshot())
+
+
+REGISTRY = Registry()
+
+
+def register_pattern(
+    pattern_conf: Dict[str, Any],
+    scheduler: Optional[RateScheduler] = None,
+) -> Optional[PatternMetrics]:
+    """Return the metrics of a pattern, None when metrics are disabled
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+
+    Keyword Arguments:
+        scheduler {Optional[RateScheduler]} -- scheduler of pattern (default: {None})
+
+    Returns:
+        Optional[PatternMetrics] -- metrics of pattern
+    """
+    if not pattern_conf.get("metrics", False):
+        return None
+    return REGISTRY.register(
+        pattern_conf["name"], pattern_conf.get("shard", 0), scheduler)
+
+
+def _labels(snapshot: Dict[str, Any], **extra: Any) -> str:
+    pattern = str(snapshot["pattern"]).replace("\\", "\\\\").replace('"', '\\"')
+    labels = [f'pattern="{pattern}"', f'shard="{snapshot["shard"]}"']
+    if "worker" in snapshot:
+        # snapshots pushed by the workers of a controller
+        labels.append(f'worker="{snapshot["worker"]}"')
+    labels.extend(f'{k}="{v}"' for k, v in extra.items())
+    return "{" + ",".join(labels) + "}"
+
+
+# metrics taken as they are from snapshots: name, type, key, help
+_SIMPLE_METRICS = (
+    ("rlog_lines_total", "counter", "lines", "Logs written"),
+    ("rlog_bytes_total", "counter", "bytes", "Bytes written"),
+    ("rlog_render_seconds_total", "counter", "render_seconds",
+     "Seconds spent rendering logs"),
+    ("rlog_target_eps", "gauge", "target_eps", "Target events per second"),
+    ("rlog_achieved_eps", "gauge", "achieved_eps", "Achieved events per second"),
+    ("rlog_dropped_total", "counter", "dropped", "Events dropped by shed lag policy"),
+    ("rlog_late_total", "counter", "late",
+     "Events emitted later than a tick or an interval"),
+)
+
+
+def format_prometheus(snapshots: List[Dict[str, Any]]) -> str:
+    """Return snapshots of patterns in Prometheus text format
+
+    Arguments:
+        snapshots {List[Dict[str, Any]]} -- snapshots of patterns
+
+    Returns:
+        str -- exposition of metrics
+    """
+    lines = []
+    for name, kind, key, help_text in _SIMPLE_METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{name}{_labels(i)} {i[key]}" for i in snapshots if key in i)
+
+    lines.append("# HELP rlog_lag_seconds Lag of events behind their deadline")
+    lines.append("# TYPE rlog_lag_seconds gauge")
+    for i in snapshots:
+        if "lag_p50" in i:
+            for quantile, key in (("0.5", "lag_p50"), ("0.99", "lag_p99")):
+                lines.append(
+                    f"rlog_lag_seconds{_labels(i, quantile=quantile)} {i[key]}")
+
+    name = "rlog_write_duration_seconds"
+    lines.append(f"# HELP {name} Latency of writes and flushes")
+    lines.append(f"# TYPE {name} histogram")
+    for i in snapshots:
+        for bound, count in zip(WRITE_BUCKETS + ("+Inf",), i["write_buckets"]):
+            lines.append(f"{name}_bucket{_labels(i, le=bound)} {count}")
+        lines.append(f"{name}_sum{_labels(i)} {i['write_seconds']}")
+        lines.append(f"{name}_count{_labels(i)} {i['writes']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _handler(registry: Registry) -> type:
+    # imported only when metrics are served, not at every start
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            log.debug(f"{self.address_string()} - {format % args}")
+
+    return MetricsHandler
+
+
+def serve(
+    port: int,
+    host: str = DEFAULT_HOST,
+    registry: Registry = REGISTRY,
+) -> "ThreadingHTTPServer":
+    """Start the HTTP /metrics endpoint in a daemon thread
+
+    Arguments:
+        port {int} -- TCP port, 0 for a random free port
+
+    Keyword Arguments:
+        host {str} -- address to listen on (default: {DEFAULT_HOST})
+        registry {Registry} -- metrics served (default: {REGISTRY})
+
+    Returns:
+        ThreadingHTTPServer -- running server, stop it with shutdown
+    """
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), _handler(registry))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    log.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+class StatsReporter:
+    """Write the snapshots of all patterns as JSON lines every interval"""
+
+    def __init__(
+        self,
+        interval: float,
+        registry: Registry = REGISTRY,
+        stream: Optional[TextIO] = None,
+    ) -> None:
+        """
+        Arguments:
+            interval {float} -- seconds between stats
+
+        Keyword Arguments:
+            registry {Registry} -- metrics written (default: {REGISTRY})
+            stream {Optional[TextIO]} -- output, None for stderr (default: {None})
+        """
+        self.interval = interval
+        self.registry = registry
+        self.stream = stream
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "StatsReporter":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Write the last stats and stop"""
+        self._stop.set()
+        self._thread.join()
+
+    def write(self) -> None:
+        """Write a JSON line foreach pattern"""
+        stream = self.stream or sys.stderr
+        now = time.time()
+        for i in self.registry.snapshot():
+            stats = {k: v for k, v in i.items() if k != "write_buckets"}
+            stats["time"] = now
+            stream.write(json.dumps(stats) + "\n")
+        stream.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
+        self.write()
+
+
+def push_metrics(
+    store: Any,
+    stop: threading.Event,
+    interval: float = PUSH_INTERVAL,
+) -> None:
+    """Push the snapshots of registry in a shared dict every interval,
+    until stop is set. Run by process workers.
+
+    Arguments:
+        store {Any} -- dict proxy of a multiprocessing Manager
+        stop {threading.Event} -- set when the worker ends
+
+    Keyword Arguments:
+        interval {float} -- seconds between pushes (default: {PUSH_INTERVAL})
+    """
+    while True:
+        stopped = stop.wait(interval)
+        for i in REGISTRY.snapshot():
+            store[f"{i['pattern']}/{i['shard']}"] = i
+        if stopped:
+            break
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Asyncio multiplexer for rlog_generator.
+
+All patterns run in a single thread: every pattern is a coroutine that
+sleeps until the next deadline of its scheduler, so the next emission of
+all patterns is kept in the timer heap of one event loop. Thousands of
+low eps patterns cost almost nothing and all of them start together.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, TextIO, Tuple, Union
+
+from . import compiler, corpus, metrics
+from . import rlog_generator as generator
+from .scheduler import RateScheduler
+
+
+log = logging.getLogger(__name__)
+
+
+async def _run_pattern(
+    plan: compiler.CompiledPattern,
+    scheduler: RateScheduler,
+    flush: Union[str, int],
+    f: TextIO,
+    pattern_metrics: Optional[metrics.PatternMetrics] = None,
+    arena: Optional[corpus.Corpus] = None,
+) -> int:
+    """Coroutine that writes the logs of a pattern at the pace given by
+    its scheduler, like rlog_generator.emit
+    """
+    render = plan.render
+    unflushed = 0
+    clock = scheduler.clock
+    first = True
+
+    while True:
+        delay = scheduler.next_wakeup() - clock()
+        # yield to other patterns also when this one is late
+        await asyncio.sleep(max(0.0, delay))
+
+        batch = scheduler.take(clock())
+        if batch == 0:
+            break
+        if arena is None:
+            unflushed = generator.write_logs(
+                f, render, batch, flush, unflushed, pattern_metrics)
+        else:
+            unflushed = generator.write_corpus(
+                f, arena, batch, flush, unflushed, pattern_metrics)
+        if first:
+            generator.log_first_log(scheduler.name)
+            first = False
+
+    f.flush()
+    generator.check_rate(scheduler)
+    return scheduler.emitted
+
+
+async def _run_patterns(patterns: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    prepared: List[Tuple[
+        str, compiler.CompiledPattern, RateScheduler, Union[str, int], TextIO]] = []
+    arenas: Dict[str, Optional[corpus.Corpus]] = {}
+    try:
+        # all patterns are ready before the first log is generated
+        for key, conf in patterns.items():
+            plan, scheduler, flush = generator.prepare_pattern(conf)
+            arenas[key] = corpus.build_corpus(conf, plan, conf.get("start_at"))
+            f = generator.open_output(conf, flush)
+            prepared.append((key, plan, scheduler, flush, f))
+
+        if prepared:
+            generator.wait_until(patterns[prepared[0][0]].get("start_at"))
+        start = prepared[0][2].clock() if prepared else 0.0
+        for _, _, scheduler, _, _ in prepared:
+            scheduler.begin(start)
+
+        res = await asyncio.gather(*(
+            _run_pattern(
+                plan, scheduler, flush, f,
+                metrics.register_pattern(patterns[key], scheduler), arenas[key])
+            for key, plan, scheduler, flush, f in prepared))
+        return {key: nr_logs for (key, *_), nr_logs in zip(prepared, res)}
+    finally:
+        for *_, f in prepared:
+            f.close()
+
+
+def run_asyncio(patterns: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """Run all patterns on a single asyncio event loop
+
+    Arguments:
+        patterns {Dict[str, Dict[str, Any]]} -- configuration patterns
+
+    Returns:
+        Dict[str, int] -- number of logs generated foreach pattern
+    """
+    log.info(f"Multiplexing {len(patterns)} patterns on one event loop")
+    return asyncio.run(_run_patterns(patterns))
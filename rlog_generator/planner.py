@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Validation and dry-run planning of rlog_generator runs.
+
+Every enabled pattern is compiled and each of its templates rendered
+once, so undefined fields, unknown functions and wrong arguments are
+reported before the run. The plan also renders each pattern for about
+a second and estimates from the rate found the CPU cores, the output
+bandwidth and the size of the configured run.
+"""
+
+import logging
+import os
+import random
+import shutil
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import backfill, compiler, profiles, replay, rotation, sinks
+from . import rlog_generator as generator
+
+
+DEFAULT_SECONDS = 1.0
+
+# logs rendered at a time while measuring
+CHUNK_SIZE = 1000
+
+# fraction of cores or disk above which a plan has little headroom
+HEADROOM = 0.8
+
+
+log = logging.getLogger(__name__)
+
+
+def validate_pattern(pattern_conf: Dict[str, Any]) -> compiler.CompiledPattern:
+    """Validate a pattern: compile it and render each of its templates
+    and steps of sequences once
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+
+    Raises:
+        ValueError: raised when the pattern is not valid
+
+    Returns:
+        CompiledPattern -- plan of pattern
+    """
+    if not pattern_conf.get("name"):
+        raise ValueError("pattern has no name")
+    try:
+        backfill.validate(pattern_conf)
+        rotation.validate(pattern_conf)
+        generator.shard_pattern(pattern_conf, generator.DEFAULT_SHARD_EPS)
+        plan, _, _ = generator.prepare_pattern(pattern_conf)
+
+        # functions are called with their arguments only when rendered
+        ts = time.time()
+        for template in plan.templates:
+            template.render(ts)
+        for sequence in plan.sequences:
+            entity = sequence.start()
+            for step in range(len(sequence.steps)):
+                sequence.render(step, entity, ts)
+    except (AttributeError, KeyError, OSError, TypeError) as e:
+        raise ValueError(f"{type(e).__name__}: {e}")
+    return plan
+
+
+def measure(
+    plan: compiler.CompiledPattern,
+    seconds: float = DEFAULT_SECONDS,
+) -> Dict[str, float]:
+    """Render a pattern unthrottled for seconds and return its rate
+
+    Arguments:
+        plan {CompiledPattern} -- plan of pattern
+
+    Keyword Arguments:
+        seconds {float} -- duration of measure (default: {DEFAULT_SECONDS})
+
+    Returns:
+        Dict[str, float] -- lines per second of a core and mean bytes of a line
+    """
+    render = plan.render
+    lines = nr_bytes = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        chunk = "\n".join([render() for _ in range(CHUNK_SIZE)]) + "\n"
+        nr_bytes += len(chunk.encode())
+        lines += CHUNK_SIZE
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+    return {"lines_per_sec": lines / (now - start), "bytes_per_line": nr_bytes / lines}
+
+
+def estimate(
+    pattern_conf: Dict[str, Any],
+    rate: Dict[str, float],
+    backfill_seconds: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Return the cost of the run of a pattern
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+        rate {Dict[str, float]} -- rate of pattern given by measure
+
+    Keyword Arguments:
+        backfill_seconds {Optional[float]} -- seconds of backfill range,
+                                              None for a real time run (default: {None})
+
+    Returns:
+        Dict[str, Any] -- estimates of pattern
+    """
+    eps = float(pattern_conf.get("eps", 1))
+    lines_per_sec = rate["lines_per_sec"]
+    bytes_per_line = rate["bytes_per_line"]
+    if backfill_seconds is None:
+        duration = float(pattern_conf.get("time_period", 60))
+    else:
+        duration = backfill_seconds
+
+    profile = None
+    if replay.is_timed(pattern_conf):
+        timed = replay.compile_replay(pattern_conf)
+        if backfill_seconds is None:
+            duration = float(pattern_conf.get("time_period", timed.period))
+        profile = timed.profile(duration)
+    elif pattern_conf.get("profile") is not None:
+        profile = profiles.build_profile(
+            pattern_conf["name"], pattern_conf["profile"], eps, duration,
+            time.time(), random.Random(0))
+
+    lines = eps * duration
+    peak_eps = eps
+    if profile is not None:
+        # the scheduler must keep the peak of profile
+        lines = profile.total
+        peak_eps = max(profile.counts) / profile.step
+
+    if backfill_seconds is None:
+        # real time: the share of a core needed to keep the eps
+        cores = peak_eps / lines_per_sec
+        bytes_per_sec = peak_eps * bytes_per_line
+        run_seconds = duration
+    else:
+        # backfill: a core as fast as possible
+        cores = 1.0
+        bytes_per_sec = lines_per_sec * bytes_per_line
+        run_seconds = lines / lines_per_sec
+
+    output = sinks.output_conf(pattern_conf)["type"]
+    return {
+        "name": pattern_conf["name"],
+        "output": output,
+        "path": (
+            pattern_conf.get("path") if output in (sinks.FILE, sinks.FIFO) else None),
+        "compress": pattern_conf.get("compress"),
+        "eps": lines / duration,
+        "peak_eps": peak_eps,
+        "lines_per_sec": lines_per_sec,
+        "bytes_per_line": bytes_per_line,
+        "cores": cores,
+        "bytes_per_sec": bytes_per_sec,
+        "lines": lines,
+        "bytes": lines * bytes_per_line,
+        "seconds": run_seconds,
+    }
+
+
+def _existing_folder(path: str) -> str:
+    folder = os.path.dirname(os.path.abspath(path))
+    while not os.path.isdir(folder):
+        folder = os.path.dirname(folder)
+    return folder
+
+
+def check(
+    estimates: List[Dict[str, Any]],
+    executor: str = generator.THREAD,
+    backfill_seconds: Optional[float] = None,
+) -> List[str]:
+    """Return the warnings of a plan: more cores than available, eps
+    that a pattern can't reach, files bigger than the free disk
+
+    Arguments:
+        estimates {List[Dict[str, Any]]} -- estimates of patterns
+
+    Keyword Arguments:
+        executor {str} -- executor of run (default: {THREAD})
+        backfill_seconds {Optional[float]} -- seconds of backfill range,
+                                              None for a real time run (default: {None})
+
+    Returns:
+        List[str] -- warnings
+    """
+    warnings = []
+    host_cores = os.cpu_count() or 1
+    # threads and asyncio run on a single core
+    cores = host_cores if executor == generator.PROCESS else 1
+
+    if backfill_seconds is None:
+        for i in estimates:
+            if i["cores"] > 1 and executor != generator.PROCESS:
+                warnings.append(
+                    f"[{i['name']}] - eps {i['peak_eps']:.0f} "
+                    f"needs {i['cores']:.2f} cores, "
+                    f"but a pattern runs on a single core with {executor} executor: "
+                    "use the process executor")
+        total = sum(i["cores"] for i in estimates)
+        if total > cores:
+            warnings.append(
+                f"the run needs {total:.2f} cores, {executor} executor has {cores}: "
+                "the eps can't be reached")
+        elif total > cores * HEADROOM:
+            warnings.append(
+                f"the run needs {total:.2f} of {cores} cores, "
+                "little headroom for writes and the OS")
+
+    # files on the same disk share its free space
+    disks: Dict[int, Tuple[str, float]] = {}
+    for i in estimates:
+        if i["output"] != sinks.FILE or not i["path"]:
+            continue
+        folder = _existing_folder(i["path"])
+        device = os.stat(folder).st_dev
+        _, size = disks.get(device, (folder, 0.0))
+        disks[device] = (folder, size + i["bytes"])
+    for folder, size in disks.values():
+        free = shutil.disk_usage(folder).free
+        if size > free:
+            warnings.append(
+                f"the files written on the disk of {folder} need {size / 1e9:.2f} GB "
+                f"(uncompressed), only {free / 1e9:.2f} GB are free")
+        elif size > free * HEADROOM:
+            warnings.append(
+                f"the files written on the disk of {folder} need {size / 1e9:.2f} GB "
+                f"(uncompressed) of {free / 1e9:.2f} GB free")
+    return warnings
+
+
+def run_plan(
+    path_patterns: str,
+    executor: str = generator.THREAD,
+    seconds: float = DEFAULT_SECONDS,
+    backfill_seconds: Optional[float] = None,
+    measure_rate: bool = True,
+) -> Dict[str, Any]:
+    """Validate all enabled patterns of a folder and, when measure_rate,
+    estimate the cost of their run
+
+    Arguments:
+        path_patterns {str} -- path of log patterns
+
+    Keyword Arguments:
+        executor {str} -- executor of run (default: {THREAD})
+        seconds {float} -- seconds of measure of each pattern
+                           (default: {DEFAULT_SECONDS})
+        backfill_seconds {Optional[float]} -- seconds of backfill range,
+                                              None for a real time run (default: {None})
+        measure_rate {bool} -- measure and estimate, otherwise only
+                               validate (default: {True})
+
+    Raises:
+        ValueError: raised when the backfill range or the executor are not valid
+
+    Returns:
+        Dict[str, Any] -- errors, estimates and warnings of plan
+    """
+    if backfill_seconds is not None:
+        if backfill_seconds <= 0:
+            raise ValueError("backfill start must be before end")
+        if executor == generator.ASYNCIO:
+            raise ValueError("backfill is not supported by asyncio executor")
+    patterns = generator.load_patterns(path_patterns)
+    errors = []
+    estimates = []
+    for key, conf in sorted(patterns.items()):
+        try:
+            plan = validate_pattern(conf)
+        except ValueError as e:
+            errors.append(f"{key}: {e}")
+            continue
+        log.info(f"{key}: valid")
+        if measure_rate:
+            estimates.append(estimate(conf, measure(plan, seconds), backfill_seconds))
+
+    return {
+        "patterns": len(patterns),
+        "errors": errors,
+        "estimates": estimates,
+        "warnings": (
+            check(estimates, executor, backfill_seconds) if measure_rate else []),
+        "host_cores": os.cpu_count() or 1,
+        "backfill": backfill_seconds is not None,
+    }
+
+
+def _size(nr_bytes: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if nr_bytes < 1000:
+            return f"{nr_bytes:.1f} {unit}"
+        nr_bytes /= 1000
+    return f"{nr_bytes:.1f} TB"
+
+
+def format_plan(result: Dict[str, Any]) -> str:
+    """Return the report of a plan
+
+    Arguments:
+        result {Dict[str, Any]} -- result of run_plan
+
+    Returns:
+        str -- report
+    """
+    rows = [
+        f"{result['patterns']} enabled patterns, "
+        f"{len(result['errors'])} with errors"]
+    rows.extend(f"error: {i}" for i in result["errors"])
+
+    estimates = result["estimates"]
+    if estimates:
+        rows.append("")
+        rows.append(
+            f"{'pattern':<30} {'eps':>8} {'max lines/s':>12} {'cores':>6} "
+            f"{'MB/s':>8} {'size':>10} {'time':>9}  output")
+        for i in estimates:
+            rows.append(
+                f"{i['name']:<30} {i['eps']:>8.0f} {i['lines_per_sec']:>12.0f} "
+                f"{i['cores']:>6.2f} {i['bytes_per_sec'] / 1e6:>8.2f} "
+                f"{_size(i['bytes']):>10} {i['seconds']:>8.0f}s  "
+                f"{i['path'] or i['output']}")
+        total_bytes = sum(i["bytes"] for i in estimates)
+        if result["backfill"]:
+            rows.append(
+                f"{'total':<30} {'':>8} {'':>12} {'':>6} {'':>8} "
+                f"{_size(total_bytes):>10} "
+                f"{max(i['seconds'] for i in estimates):>8.0f}s")
+        else:
+            rows.append(
+                f"{'total':<30} {sum(i['eps'] for i in estimates):>8.0f} {'':>12} "
+                f"{sum(i['cores'] for i in estimates):>6.2f} "
+                f"{sum(i['bytes_per_sec'] for i in estimates) / 1e6:>8.2f} "
+                f"{_size(total_bytes):>10}")
+        rows.append(f"host cores: {result['host_cores']}; sizes are uncompressed")
+
+    rows.extend(f"warning: {i}" for i in result["warnings"])
+    return "\n".join(rows)
@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Load profiles for rlog_generator.
+
+A profile changes the eps of a pattern over its period: segments of
+ramps, steps, sine and diurnal curves, scheduled bursts and Poisson
+arrivals. Values of profile are factors of the eps of pattern, so shards
+and workers, that split the eps, keep the same profile.
+
+The rate is evaluated once per step of the period, and the events of
+each step are accumulated in a schedule: the scheduler only looks up
+the deadline of an event, or the events due at a time, in this table.
+"""
+
+import bisect
+import logging
+import math
+import random
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# segments of profile
+CONSTANT = "constant"
+RAMP = "ramp"
+STEPS = "steps"
+SINE = "sine"
+DIURNAL = "diurnal"
+SEGMENTS = (CONSTANT, RAMP, STEPS, SINE, DIURNAL)
+
+# arrivals of events in a step
+UNIFORM = "uniform"
+POISSON = "poisson"
+
+# seconds of a step of schedule
+DEFAULT_STEP = 0.1
+
+# steps are longer for long periods, to bound the memory of schedule
+MAX_STEPS = 1000000
+
+# default hour of the peak of diurnal shape
+DEFAULT_DIURNAL_PEAK = 14
+
+# above this mean Poisson counts are drawn from a normal distribution
+POISSON_NORMAL = 30
+
+
+log = logging.getLogger(__name__)
+
+
+def diurnal_factor(ts: float, amplitude: float, peak_hour: float) -> float:
+    """Return the factor of eps at a time of day: a cosine with period
+    of a day and maximum at peak_hour UTC, that averages 1 over a day
+
+    Arguments:
+        ts {float} -- time as seconds since the epoch
+        amplitude {float} -- amplitude of shape in [0, 1]
+        peak_hour {float} -- hour of maximum eps
+
+    Returns:
+        float -- factor of eps
+    """
+    hour = (ts % 86400) / 3600
+    return 1 + amplitude * math.cos(2 * math.pi * (hour - peak_hour) / 24)
+
+
+def poisson(mean: float, rng: Any = random) -> int:
+    """Return a random count of a Poisson distribution
+
+    Arguments:
+        mean {float} -- mean count
+
+    Keyword Arguments:
+        rng {Any} -- random generator (default: {random})
+
+    Returns:
+        int -- count
+    """
+    if mean <= 0:
+        return 0
+    if mean > POISSON_NORMAL:
+        return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+    # Knuth: multiply uniforms until below e^-mean
+    limit = math.exp(-mean)
+    count = 0
+    product = rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def _number(
+    name: str,
+    conf: Dict[str, Any],
+    key: str,
+    default: Optional[float] = None,
+) -> float:
+    value = conf.get(key, default)
+    if value is None:
+        raise ValueError(
+            f"[{name}] - {conf.get('type', 'burst')} of profile requires {key}")
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"[{name}] - {key} of profile must be a number, not {value!r}")
+    if value < 0:
+        raise ValueError(
+            f"[{name}] - {key} of profile must not be negative, not {value}")
+    return value
+
+
+def _segment(
+    name: str,
+    conf: Dict[str, Any],
+) -> Tuple[Optional[float], Callable[[float, float], float]]:
+    """Return the duration of a segment, None until the end of period,
+    and its factor of eps at a time since the start of segment and a
+    time since the epoch
+    """
+    if not isinstance(conf, dict):
+        raise ValueError(f"[{name}] - segment of profile must be a dict, not {conf!r}")
+    kind = conf.get("type")
+    if kind not in SEGMENTS:
+        raise ValueError(
+            f"[{name}] - type of segment must be one of {', '.join(SEGMENTS)}, "
+            f"not {kind!r}")
+    duration = _number(name, conf, "duration") if "duration" in conf else None
+    if duration == 0:
+        raise ValueError(f"[{name}] - duration of segment must be greater than 0")
+
+    if kind == CONSTANT:
+        factor = _number(name, conf, "factor", 1)
+        return duration, lambda t, ts: factor
+
+    if kind == RAMP:
+        if duration is None:
+            raise ValueError(f"[{name}] - ramp segment of profile requires duration")
+        first = _number(name, conf, "from")
+        last = _number(name, conf, "to")
+        return duration, lambda t, ts: first + (last - first) * t / duration
+
+    if kind == STEPS:
+        factors = conf.get("factors")
+        if not isinstance(factors, list) or not factors:
+            raise ValueError(
+                f"[{name}] - steps segment of profile requires a list of factors")
+        factors = [_number(name, {"factor": i}, "factor") for i in factors]
+        # duration is the one of each step
+        each = duration if duration is not None else 1.0
+        last = len(factors) - 1
+        return each * len(factors), lambda t, ts: factors[min(int(t / each), last)]
+
+    if kind == SINE:
+        low = _number(name, conf, "min")
+        high = _number(name, conf, "max")
+        period = _number(name, conf, "period")
+        if period == 0:
+            raise ValueError(
+                f"[{name}] - period of sine segment must be greater than 0")
+        middle = (low + high) / 2
+        amplitude = (high - low) / 2
+        # starts at min, like a morning ramp up
+        return duration, lambda t, ts: (
+            middle - amplitude * math.cos(2 * math.pi * t / period))
+
+    amplitude = _number(name, conf, "amplitude", 0.5)
+    if amplitude > 1:
+        raise ValueError(
+            f"[{name}] - amplitude of diurnal segment must be in [0, 1], "
+            f"not {amplitude}")
+    peak_hour = float(conf.get("peak_hour", DEFAULT_DIURNAL_PEAK))
+    return duration, lambda t, ts: diurnal_factor(ts, amplitude, peak_hour)
+
+
+def _burst(
+    name: str,
+    conf: Dict[str, Any],
+) -> Tuple[float, float, float, Optional[float]]:
+    """Return start, duration, factor and repetition of a burst"""
+    if not isinstance(conf, dict):
+        raise ValueError(f"[{name}] - burst of profile must be a dict, not {conf!r}")
+    every = _number(name, conf, "every") if "every" in conf else None
+    if every == 0:
+        raise ValueError(f"[{name}] - every of burst must be greater than 0")
+    return (
+        _number(name, conf, "at", 0),
+        _number(name, conf, "duration"),
+        _number(name, conf, "factor"),
+        every)
+
+
+def rate_function(
+    name: str,
+    profile_conf: Dict[str, Any],
+    origin: float,
+) -> Callable[[float], float]:
+    """Return the factor of eps of a profile at a time since the start
+
+    Arguments:
+        name {str} -- name of pattern
+        profile_conf {Dict[str, Any]} -- profile of pattern
+        origin {float} -- start of period as seconds since the epoch
+
+    Raises:
+        ValueError: raised when the profile is not valid
+
+    Returns:
+        Callable[[float], float] -- factor of eps at a time
+    """
+    if not isinstance(profile_conf, dict):
+        raise ValueError(f"[{name}] - profile must be a dict, not {profile_conf!r}")
+    segments = [_segment(name, i) for i in profile_conf.get("segments") or []]
+    bursts = [_burst(name, i) for i in profile_conf.get("bursts") or []]
+    repeat = bool(profile_conf.get("repeat", False))
+
+    bounds: List[float] = []
+    end = 0.0
+    for i, (duration, _) in enumerate(segments):
+        if duration is None:
+            if i != len(segments) - 1:
+                raise ValueError(
+                    f"[{name}] - only the last segment of profile can be "
+                    "without duration")
+            end = math.inf
+        else:
+            end += duration
+        bounds.append(end)
+    if repeat and math.isinf(end):
+        raise ValueError(
+            f"[{name}] - a repeated profile requires the duration of all segments")
+
+    def rate(t: float) -> float:
+        factor = 1.0
+        if segments:
+            local = t % end if repeat else t
+            i = bisect.bisect_right(bounds, local)
+            # after the segments the eps of pattern
+            if i < len(segments):
+                begin = bounds[i - 1] if i else 0.0
+                factor = segments[i][1](local - begin, origin + t)
+        for at, duration, burst, every in bursts:
+            since = t - at
+            if since >= 0 and (since % every if every else since) < duration:
+                factor *= burst
+        return factor
+
+    return rate
+
+
+class Profile:
+    """Schedule of the events of a profile: the events of each step are
+    accumulated, and inside a step they are evenly spaced
+    """
+
+    __slots__ = ("step", "period", "counts", "cumulative", "total")
+
+    def __init__(self, counts: "array[float]", step: float) -> None:
+        """
+        Arguments:
+            counts {array[float]} -- events foreach step
+            step {float} -- seconds of a step
+        """
+        self.step = step
+        self.period = len(counts) * step
+        self.counts = counts
+        cumulative = array("d", [0.0])
+        total = 0.0
+        for i in counts:
+            total += i
+            cumulative.append(total)
+        self.cumulative = cumulative
+        self.total = int(total)
+
+    def events(self, t: float) -> float:
+        """Return the events scheduled before a time
+
+        Arguments:
+            t {float} -- seconds since the start
+
+        Returns:
+            float -- events before t, fractional inside a step
+        """
+        if t <= 0:
+            return 0.0
+        k = int(t / self.step)
+        if k >= len(self.counts):
+            return self.cumulative[-1]
+        return self.cumulative[k] + (t / self.step - k) * self.counts[k]
+
+    def time_of(self, index: float) -> float:
+        """Return the time of an event
+
+        Arguments:
+            index {float} -- index of event
+
+        Returns:
+            float -- seconds since the start
+        """
+        k = bisect.bisect_right(self.cumulative, index) - 1
+        if k >= len(self.counts):
+            return self.period
+        return (k + (index - self.cumulative[k]) / self.counts[k]) * self.step
+
+    def rate(self, t: float) -> float:
+        """Return the eps of the step of a time
+
+        Arguments:
+            t {float} -- seconds since the start
+
+        Returns:
+            float -- events per second
+        """
+        k = min(max(0, int(t / self.step)), len(self.counts) - 1)
+        return self.counts[k] / self.step
+
+
+def build_profile(
+    name: str,
+    profile_conf: Dict[str, Any],
+    eps: float,
+    period: float,
+    origin: float,
+    rng: Any = random,
+) -> Profile:
+    """Return the schedule of a profile for a period
+
+    Arguments:
+        name {str} -- name of pattern
+        profile_conf {Dict[str, Any]} -- profile of pattern
+        eps {float} -- eps of pattern, the rate of factor 1
+        period {float} -- seconds of period
+        origin {float} -- start of period as seconds since the epoch
+
+    Keyword Arguments:
+        rng {Any} -- random generator of Poisson arrivals (default: {random})
+
+    Raises:
+        ValueError: raised when the profile is not valid
+
+    Returns:
+        Profile -- schedule of profile
+    """
+    rate = rate_function(name, profile_conf, origin)
+    arrivals = profile_conf.get("arrivals", UNIFORM)
+    if arrivals not in (UNIFORM, POISSON):
+        raise ValueError(
+            f"[{name}] - arrivals must be '{UNIFORM}' or '{POISSON}', "
+            f"not {arrivals!r}")
+    step = _number(name, profile_conf, "step", DEFAULT_STEP)
+    if step == 0:
+        raise ValueError(f"[{name}] - step of profile must be greater than 0")
+    if period <= 0:
+        raise ValueError(
+            f"[{name}] - period of profile must be greater than 0, not {period}")
+    # steps of the same length that fill the period
+    nr_steps = min(MAX_STEPS, max(1, math.ceil(period / step)))
+    step = period / nr_steps
+
+    counts = array("d", bytes(8 * nr_steps))
+    for k in range(nr_steps):
+        # rate at the middle of step
+        mean = eps * rate((k + 0.5) * step) * step
+        counts[k] = poisson(mean, rng) if arrivals == POISSON else mean
+    profile = Profile(counts, step)
+    log.debug(
+        f"[{name}] - profile of {nr_steps} steps of {step} s, {profile.total} events, "
+        f"mean {profile.total / period:.1f} eps")
+    return profile
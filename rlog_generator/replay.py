@@ -0,0 +1,710 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Replay of real log files for rlog_generator.
+
+The lines of a log file are replayed in their order, with their
+original timing multiplied by a speed factor, or at the eps of pattern.
+The file is memory-mapped like a dictionary, and its timestamps are
+detected once when it is loaded: the position of the timestamp of each
+line and its time are kept in arrays, so a replayed line only splices
+in the new timestamp. The timing of lines becomes the schedule of a
+load profile, followed by the scheduler in real time and by backfill.
+
+Templates and fields of a pattern can also be inferred from a file.
+"""
+
+import bisect
+import calendar
+import collections
+import datetime
+import logging
+import math
+import os
+import re
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import datefmt, dictionaries, profiles
+
+
+# kinds of timestamp
+AUTO = "auto"
+NONE = "none"
+ISO_8601 = "iso8601"
+CLF = "clf"
+RFC3164 = "rfc3164"
+EPOCH = "epoch"
+TIMESTAMPS = (ISO_8601, CLF, RFC3164, EPOCH)
+
+# lines read to detect the kind of timestamp
+DETECT_LINES = 1000
+
+# lines read to infer a pattern
+INFER_LINES = 100000
+DEFAULT_MAX_TEMPLATES = 20
+
+# fields with more distinct values are generated by a function
+DEFAULT_MAX_VALUES = 100
+
+# seconds parsed once and cached, the cache is cleared when bigger
+_SECONDS_CACHE = 100000
+
+_MONTHS = {
+    name: number for number, name in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+         "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+_MONTH = b"|".join(i.encode() for i in _MONTHS)
+
+# regexes of timestamps by kind, on bytes
+TIMESTAMP_REGEXES = {
+    ISO_8601: re.compile(
+        rb"(\d{4})-(\d{2})-(\d{2})([T ])(\d{2}):(\d{2}):(\d{2})"
+        rb"(?:([.,])(\d{1,9}))?(Z|[+-]\d{2}:?\d{2})?"),
+    CLF: re.compile(
+        rb"(\d{2})/(" + _MONTH + rb")/(\d{4}):(\d{2}):(\d{2}):(\d{2}) ([+-]\d{4})"),
+    RFC3164: re.compile(
+        rb"(" + _MONTH + rb") ( \d|\d{2}) (\d{2}):(\d{2}):(\d{2})"),
+    EPOCH: re.compile(rb"(?<![\d.])(1\d{9})(\d{3}|\.\d{1,6})?(?![\d])"),
+}
+
+# variable tokens of inferred templates, the first that matches wins
+_TOKENS = re.compile(
+    r"(?P<uuid>\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b)"
+    r"|(?P<email>\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b)"
+    r"|(?P<ip>(?<![\d.])(?:\d{1,3}\.){3}\d{1,3}(?![\d.]))"
+    r"|(?P<number>(?<![\w.-])\d+(?![\w.]))")
+
+# function of a token with too many distinct values
+_TOKEN_FUNCTIONS = {
+    "uuid": "func_fake_uuid", "email": "func_fake_email", "ip": "func_fake_ip"}
+
+
+log = logging.getLogger(__name__)
+
+
+def _zone(text: bytes) -> int:
+    """Return the seconds of a zone offset, like +0200 or -05:30"""
+    text = text.replace(b":", b"")
+    seconds = int(text[1:3]) * 3600 + int(text[3:5]) * 60
+    return -seconds if text[:1] == b"-" else seconds
+
+
+def _cached(parse: Callable[[Any], float]) -> Callable[[Any], float]:
+    # lines of the same second share the parse of their second
+    cache: Dict[Any, float] = {}
+
+    def cached(key: Any) -> float:
+        seconds = cache.get(key)
+        if seconds is None:
+            if len(cache) > _SECONDS_CACHE:
+                cache.clear()
+            seconds = cache[key] = parse(key)
+        return seconds
+
+    return cached
+
+
+def _parser(kind: str, year: int) -> Callable[["re.Match[bytes]"], float]:
+    """Return the function of a match of timestamp to seconds since the epoch
+
+    Arguments:
+        kind {str} -- kind of timestamp
+        year {int} -- year of timestamps without year
+
+    Returns:
+        Callable[[re.Match[bytes]], float] -- parser of a match
+    """
+    if kind == ISO_8601:
+        def iso_seconds(key: Tuple[bytes, Optional[bytes]]) -> float:
+            text, zone = key
+            fields = (int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                      int(text[11:13]), int(text[14:16]), int(text[17:19]))
+            if zone is None:
+                # without zone, the local time of the host
+                return time.mktime(fields + (0, 0, -1))
+            return calendar.timegm(fields) - (0 if zone == b"Z" else _zone(zone))
+
+        seconds = _cached(iso_seconds)
+
+        def iso(m: "re.Match[bytes]") -> float:
+            fraction = m.group(9)
+            ts = seconds((m.group(0)[:19], m.group(10)))
+            return ts + float(b"0." + fraction) if fraction else ts
+
+        return iso
+
+    if kind == CLF:
+        def clf_seconds(text: bytes) -> float:
+            fields = (int(text[7:11]), _MONTHS[text[3:6].decode()], int(text[0:2]),
+                      int(text[12:14]), int(text[15:17]), int(text[18:20]))
+            return calendar.timegm(fields) - _zone(text[21:26])
+
+        seconds = _cached(clf_seconds)
+        return lambda m: seconds(m.group(0))
+
+    if kind == RFC3164:
+        def syslog_seconds(text: bytes) -> float:
+            fields = (year, _MONTHS[text[0:3].decode()], int(text[4:6]),
+                      int(text[7:9]), int(text[10:12]), int(text[13:15]))
+            return time.mktime(fields + (0, 0, -1))
+
+        seconds = _cached(syslog_seconds)
+        return lambda m: seconds(m.group(0))
+
+    def epoch(m: "re.Match[bytes]") -> float:
+        rest = m.group(2)
+        if rest and rest[:1] != b".":
+            return int(m.group(0)) / 1000
+        return float(m.group(0))
+
+    return epoch
+
+
+def timestamp_formatter(kind: str, m: "re.Match[bytes]") -> Callable[[float], str]:
+    """Return the formatter of timestamps in the style of a match: the
+    same separators, digits of fraction and zone
+
+    Arguments:
+        kind {str} -- kind of timestamp
+        m {re.Match[bytes]} -- match of TIMESTAMP_REGEXES of kind
+
+    Returns:
+        Callable[[float], str] -- formatter of seconds since the epoch
+    """
+    if kind == ISO_8601:
+        fraction = m.group(9) or b""
+        fmt = f"%Y-%m-%d{m.group(4).decode()}%H:%M:%S"
+        if fraction:
+            fmt += m.group(8).decode() + "%f"
+        zone = m.group(10)
+        if zone is None:
+            formatter = datefmt.CachedFormatter(fmt, datefmt.LOCAL)
+            shift = 0
+            suffix = ""
+        else:
+            formatter = datefmt.CachedFormatter(fmt, datefmt.UTC)
+            shift = 0 if zone == b"Z" else _zone(zone)
+            suffix = zone.decode()
+        digits = len(fraction)
+        if digits > 6:
+            suffix = "0" * (digits - 6) + suffix
+        cut = 6 - digits if 0 < digits < 6 else 0
+        if cut:
+            return lambda ts: formatter(ts + shift)[:-cut] + suffix
+        return lambda ts: formatter(ts + shift) + suffix
+
+    if kind == CLF:
+        formatter = datefmt.CachedFormatter("%d/%b/%Y:%H:%M:%S", datefmt.UTC)
+        zone = m.group(7)
+        shift = _zone(zone)
+        suffix = " " + zone.decode()
+        return lambda ts: formatter(ts + shift) + suffix
+
+    if kind == RFC3164:
+        formatter = datefmt.CachedFormatter("%b %d %H:%M:%S", datefmt.LOCAL)
+
+        def syslog(ts: float) -> str:
+            text = formatter(ts)
+            # the day is padded with a space
+            return text[:4] + " " + text[5:] if text[4] == "0" else text
+
+        return syslog
+
+    rest = m.group(2) or b""
+    if rest and rest[:1] != b".":
+        return lambda ts: str(int(ts * 1000))
+    digits = len(rest) - 1
+    if digits > 0:
+        return lambda ts: f"{ts:.{digits}f}"
+    return lambda ts: str(int(ts))
+
+
+def detect_timestamp(lines: List[bytes]) -> Optional[str]:
+    """Return the kind of timestamp found in most lines
+
+    Arguments:
+        lines {List[bytes]} -- sample of lines
+
+    Returns:
+        Optional[str] -- kind of timestamp, None when lines have none
+    """
+    best = None
+    best_count = 0
+    for kind in TIMESTAMPS:
+        search = TIMESTAMP_REGEXES[kind].search
+        count = sum(1 for i in lines if search(i))
+        # kinds are tried from the most specific, an epoch is the last
+        if count > best_count:
+            best, best_count = kind, count
+    if best_count * 2 < len(lines):
+        return None
+    return best
+
+
+class ReplayFile:
+    """Lines of a log file, memory-mapped, with the time and the position
+    of the timestamp of each line
+    """
+
+    def __init__(self, path: str, timestamp: str = AUTO) -> None:
+        """
+        Arguments:
+            path {str} -- path of log file
+
+        Keyword Arguments:
+            timestamp {str} -- kind of timestamp: 'auto' to detect it,
+                               'none' to replay lines as they are (default: {AUTO})
+
+        Raises:
+            ValueError: raised when the file can't be read or the kind
+                        of timestamp is not valid or not found
+        """
+        if timestamp not in (AUTO, NONE) + TIMESTAMPS:
+            raise ValueError(
+                f"timestamp must be one of {', '.join((AUTO, NONE) + TIMESTAMPS)}, "
+                f"not {timestamp!r}")
+        self.path = path
+        self.lines = dictionaries.open_dictionary(path)
+        n = len(self.lines)
+        data = self.lines.data
+        bounds = self.lines.bounds
+
+        if timestamp == AUTO:
+            sample = [data[slice(*bounds(i))] for i in range(min(n, DETECT_LINES))]
+            kind = detect_timestamp(sample)
+            log.debug(f"Replay {path}: timestamps {kind or 'not found'}")
+        else:
+            kind = None if timestamp == NONE else timestamp
+        self.kind = kind
+
+        # position of timestamp in each line, -1 without timestamp
+        self.starts = array("i", bytes(4 * n))
+        self.ends = array("i", bytes(4 * n))
+        self.times = array("d", bytes(8 * n))
+        self.format: Optional[Callable[[float], str]] = None
+        if kind is None:
+            return
+
+        begin = time.perf_counter()
+        year = time.localtime(os.path.getmtime(path)).tm_year
+        parse = _parser(kind, year)
+        search = TIMESTAMP_REGEXES[kind].search
+        starts, ends, times = self.starts, self.ends, self.times
+        last = None
+        found = 0
+        for i in range(n):
+            start, end = bounds(i)
+            m = search(data, start, end)
+            if m is None:
+                # like the lines of a stack trace, at the time of previous line
+                starts[i] = -1
+                times[i] = last if last is not None else math.nan
+                continue
+            if self.format is None:
+                self.format = timestamp_formatter(kind, m)
+            starts[i] = m.start() - start
+            ends[i] = m.end() - start
+            last = times[i] = parse(m)
+            found += 1
+        if not found:
+            raise ValueError(f"no {kind} timestamp found in {path}")
+
+        # lines before the first timestamp get its time
+        first = next(t for t in times if not math.isnan(t))
+        for i in range(n):
+            if not math.isnan(times[i]):
+                break
+            times[i] = first
+        if kind == RFC3164:
+            self._fix_years()
+        log.debug(
+            f"Replay {path}: {found} {kind} timestamps of {n} lines "
+            f"parsed in {time.perf_counter() - begin:.3f} s")
+
+    def _fix_years(self) -> None:
+        # syslog timestamps have no year: the year is that of the file,
+        # and lines after it, like December in a file of January, are
+        # moved a year back
+        limit = os.path.getmtime(self.path) + 86400
+        times = self.times
+        for i in range(len(times)):
+            if times[i] > limit:
+                day = datetime.datetime.fromtimestamp(times[i])
+                before = day.replace(year=day.year - 1)
+                times[i] = time.mktime(before.timetuple()) + times[i] % 1
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def line(self, index: int, ts: Optional[float] = None) -> str:
+        """Return a line, with its timestamp replaced by ts
+
+        Arguments:
+            index {int} -- index of line
+
+        Keyword Arguments:
+            ts {Optional[float]} -- new time of line, None to keep the
+                                    original one (default: {None})
+
+        Returns:
+            str -- line
+        """
+        start, end = self.lines.bounds(index)
+        data = self.lines.data
+        begin = self.starts[index]
+        if ts is None or self.format is None or begin < 0:
+            return data[start:end].decode("utf-8", "replace")
+        return (
+            data[start:start + begin].decode("utf-8", "replace")
+            + self.format(ts)
+            + data[start + self.ends[index]:end].decode("utf-8", "replace"))
+
+
+_files: Dict[Tuple[str, str], ReplayFile] = {}
+
+
+def open_replay(path: str, timestamp: str = AUTO) -> ReplayFile:
+    """Return the replay file of path, loaded once per process
+
+    Arguments:
+        path {str} -- path of log file
+
+    Keyword Arguments:
+        timestamp {str} -- kind of timestamp (default: {AUTO})
+
+    Raises:
+        ValueError: raised when the file can't be replayed
+
+    Returns:
+        ReplayFile -- lines of file
+    """
+    key = (os.path.realpath(path), timestamp)
+    replay_file = _files.get(key)
+    if replay_file is None:
+        replay_file = _files[key] = ReplayFile(key[0], timestamp)
+    return replay_file
+
+
+class Replay:
+    """Replay of the lines of a file by a pattern. A shard replays one
+    line every shards lines, so the shards of a pattern replay the file
+    once.
+    """
+
+    __slots__ = (
+        "name", "file", "speed", "shard", "shards", "period", "_index", "_times")
+
+    def __init__(
+        self,
+        name: str,
+        replay_file: ReplayFile,
+        speed: Optional[float] = None,
+        shard: int = 0,
+        shards: int = 1,
+    ) -> None:
+        """
+        Arguments:
+            name {str} -- name of pattern
+            replay_file {ReplayFile} -- lines of file
+
+        Keyword Arguments:
+            speed {Optional[float]} -- factor of original timing, None
+                                       to replay at the eps of pattern (default: {None})
+            shard {int} -- number of shard (default: {0})
+            shards {int} -- number of shards of pattern (default: {1})
+
+        Raises:
+            ValueError: raised when speed is used without timestamps
+        """
+        self.name = name
+        self.file = replay_file
+        self.speed = speed
+        self.shard = shard
+        self.shards = shards
+        self._index = shard
+        self._times: Optional[List[float]] = None
+        self.period = 0.0
+        if speed is not None:
+            if replay_file.kind is None:
+                raise ValueError(
+                    f"[{name}] - speed of replay requires the timestamps of lines")
+            times = replay_file.times
+            origin = min(times)
+            span = max(times) - origin
+            n = len(times)
+            # a pass lasts the span of file and the mean interval of
+            # lines, so the first line of next pass isn't on the last one
+            gap = span / (n - 1) if n > 1 and span > 0 else 1.0
+            self.period = (span + gap) / speed
+            self._times = sorted(
+                (times[i] - origin) / speed for i in range(shard, n, shards))
+
+    def render(self, ts: Optional[float] = None) -> str:
+        """Return the next line of file, from the first after the last
+
+        Keyword Arguments:
+            ts {Optional[float]} -- time of log as seconds since the epoch,
+                                    None for now (default: {None})
+
+        Returns:
+            str -- log line
+        """
+        index = self._index
+        self._index += self.shards
+        if self._index >= len(self.file):
+            self._index = self.shard
+        return self.file.line(index, time.time() if ts is None else ts)
+
+    def profile(
+        self,
+        period: float,
+        step: float = profiles.DEFAULT_STEP,
+    ) -> profiles.Profile:
+        """Return the schedule of the lines replayed in a period, again
+        from the start when the period is longer than a pass
+
+        Arguments:
+            period {float} -- seconds of period
+
+        Keyword Arguments:
+            step {float} -- seconds of a step of schedule (default: {DEFAULT_STEP})
+
+        Returns:
+            Profile -- schedule of lines
+        """
+        times = self._times or []
+        cycle = self.period
+        per_cycle = len(times)
+
+        def events(t: float) -> int:
+            # lines before t, the first of next pass is at the end of period
+            passes = int(t // cycle)
+            return passes * per_cycle + bisect.bisect_left(times, t - passes * cycle)
+
+        nr_steps = min(profiles.MAX_STEPS, max(1, math.ceil(period / step)))
+        step = period / nr_steps
+        counts = array("d", bytes(8 * nr_steps))
+        previous = 0
+        for k in range(nr_steps):
+            current = events(period if k == nr_steps - 1 else (k + 1) * step)
+            counts[k] = current - previous
+            previous = current
+        profile = profiles.Profile(counts, step)
+        log.debug(
+            f"[{self.name}] - replay at speed {self.speed}: "
+            f"{profile.total} lines in {period:.1f} s, "
+            f"a pass every {cycle:.1f} s")
+        return profile
+
+
+def is_timed(pattern_conf: Dict[str, Any]) -> bool:
+    """Return True when a pattern replays a file at its original timing,
+    not at the eps of pattern
+    """
+    conf = pattern_conf.get("replay")
+    return (
+        pattern_conf.get("generator_type") == "replay"
+        and isinstance(conf, dict) and conf.get("speed") is not None)
+
+
+def compile_replay(pattern_conf: Dict[str, Any]) -> Replay:
+    """Return the replay of a pattern, from 'replay' in configuration
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+
+    Raises:
+        ValueError: raised when the replay is not valid
+
+    Returns:
+        Replay -- replay of pattern
+    """
+    name = pattern_conf["name"]
+    conf = pattern_conf.get("replay")
+    if isinstance(conf, str):
+        conf = {"file": conf}
+    if not isinstance(conf, dict) or not conf.get("file"):
+        raise ValueError(
+            f"[{name}] - generator type 'replay' requires 'replay' with the 'file' "
+            "to replay")
+    speed = conf.get("speed")
+    if speed is not None:
+        speed = float(speed)
+        if speed <= 0:
+            raise ValueError(
+                f"[{name}] - speed of replay must be greater than 0, not {speed}")
+        if pattern_conf.get("profile") is not None:
+            raise ValueError(
+                f"[{name}] - speed of replay gives the timing of logs, "
+                "it can't be used with a profile")
+
+    path = os.path.join(
+        pattern_conf.get("pattern_dir", "."), os.path.expanduser(conf["file"]))
+    replay_file = open_replay(path, conf.get("timestamp", AUTO))
+    return Replay(
+        name, replay_file, speed,
+        shard=pattern_conf.get("shard", 0),
+        shards=pattern_conf.get("shards", 1))
+
+
+def _braces(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _template_date(kind: str, m: "re.Match[bytes]") -> Tuple[str, Optional[str]]:
+    """Return the placeholder of a timestamp in a template, and the
+    function of its date field when it isn't the datetime of template
+    """
+    if kind == ISO_8601:
+        fmt = f"%Y-%m-%d{m.group(4).decode()}%H:%M:%S"
+        if m.group(9):
+            fmt += m.group(8).decode() + "%f"
+        zone = m.group(10)
+        if zone is None or " " in fmt:
+            # the datetime of template is local, like a timestamp without zone
+            return "{:" + fmt + "}" + (zone or b"").decode(), None
+        # arguments of functions can't have spaces
+        return "{date}" + ("Z" if zone == b"Z" else "+00:00"), f"func_format_date {fmt}"
+    if kind == CLF:
+        return "{date} +0000", "func_format_date %d/%b/%Y:%H:%M:%S"
+    if kind == RFC3164:
+        return "{:%b %d %H:%M:%S}", None
+    return "{date}", "func_fake_unix_time"
+
+
+def infer_pattern(
+    path: str,
+    name: Optional[str] = None,
+    max_templates: int = DEFAULT_MAX_TEMPLATES,
+    max_values: int = DEFAULT_MAX_VALUES,
+    nr_lines: int = INFER_LINES,
+) -> Dict[str, Any]:
+    """Infer a template pattern from the lines of a log file: numbers,
+    IP addresses, UUIDs and emails are fields, the other text of lines
+    with the same fields in the same places is a template
+
+    Arguments:
+        path {str} -- path of log file
+
+    Keyword Arguments:
+        name {Optional[str]} -- name of pattern, None for the name of file
+                                (default: {None})
+        max_templates {int} -- templates kept, the most frequent
+                               (default: {DEFAULT_MAX_TEMPLATES})
+        max_values {int} -- distinct values of a field kept as a
+                            weighted list, more are generated by a function
+                            (default: {DEFAULT_MAX_VALUES})
+        nr_lines {int} -- lines read from the start of file (default: {INFER_LINES})
+
+    Raises:
+        ValueError: raised when the file can't be read
+
+    Returns:
+        Dict[str, Any] -- configuration pattern
+    """
+    lines = dictionaries.open_dictionary(os.path.realpath(path))
+    data = lines.data
+    n = min(len(lines), nr_lines)
+    sample = [data[slice(*lines.bounds(i))] for i in range(n)]
+    kind = detect_timestamp(sample[:DETECT_LINES])
+    if name is None:
+        name = os.path.splitext(os.path.basename(path))[0]
+
+    shapes: "collections.Counter[str]" = collections.Counter()
+    values: Dict[str, "collections.Counter[str]"] = collections.defaultdict(
+        collections.Counter)
+    date_field = None
+    times = []
+    parse = _parser(kind, time.localtime().tm_year) if kind else None
+    for raw in sample:
+        head = b""
+        rest = raw
+        m = TIMESTAMP_REGEXES[kind].search(raw) if kind else None
+        if m is not None:
+            placeholder, date_field = _template_date(kind, m)  # type: ignore
+            head = raw[:m.start()]
+            rest = raw[m.end():]
+            times.append(parse(m))  # type: ignore
+
+        # text before the timestamp has fields too
+        template = []
+        seen: "collections.Counter[str]" = collections.Counter()
+        for chunk, is_head in ((head, True), (rest, False)):
+            text = chunk.decode("utf-8", "replace")
+            position = 0
+            for token in _TOKENS.finditer(text):
+                token_kind = token.lastgroup or "number"
+                seen[token_kind] += 1
+                field = f"{token_kind}_{seen[token_kind]}"
+                template.extend(
+                    [_braces(text[position:token.start()]), "{" + field + "}"])
+                values[field][token.group(0)] += 1
+                position = token.end()
+            template.append(_braces(text[position:]))
+            if is_head and m is not None:
+                template.append(placeholder)
+        shapes["".join(template)] += 1
+
+    templates = [
+        {"template": t, "weight": c} for t, c in shapes.most_common(max_templates)]
+    used = set()
+    for i in templates:
+        used.update(re.findall(r"(?<!\{)\{([a-z]+_\d+|date)\}", i["template"]))
+
+    fields: Dict[str, Any] = {}
+    # fields by kind and number, number_10 after number_9
+    def order(field: str) -> Tuple[str, int]:
+        kind, number = field.split("_")
+        return kind, int(number)
+
+    for field in sorted(used - {"date"}, key=order):
+        counter = values[field]
+        token_kind = field.split("_")[0]
+        if len(counter) <= max_values:
+            ranked = counter.most_common()
+            if len({c for _, c in ranked}) == 1:
+                fields[field] = [v for v, _ in ranked]
+            else:
+                fields[field] = {
+                    "value": [v for v, _ in ranked], "weights": [c for _, c in ranked]}
+        elif token_kind == "number":
+            numbers = [int(i) for i in counter]
+            fields[field] = f"func_randint {min(numbers)} {max(numbers)}"
+        else:
+            fields[field] = {
+                "value": _TOKEN_FUNCTIONS[token_kind], "cardinality": len(counter)}
+    if "date" in used and date_field is not None:
+        fields["date"] = date_field
+
+    eps = 1.0
+    if len(times) > 1 and max(times) > min(times):
+        eps = round(len(sample) / (max(times) - min(times)), 2)
+    log.info(
+        f"Inferred {len(shapes)} templates from {n} lines of {path}, "
+        f"kept {len(templates)}")
+    return {
+        "name": name,
+        "enabled": True,
+        "path": f"./out/{name}.log",
+        "eps": eps,
+        "time_period": 60,
+        "generator_type": "template",
+        "template": templates,
+        "fields": fields,
+    }
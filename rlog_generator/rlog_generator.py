@@ -18,23 +18,53 @@ limitations under the License.
 Main module for random log generator.
 """
 
+import datetime
 import glob
+import io
 import logging
+import math
+import multiprocessing
 import os
+import queue
 import random
+import threading
 import time
 from concurrent import futures
 from pathlib import Path
-from typing import Any, Dict
-from tqdm import trange
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple, Union
 
-from . import utils
+from . import (
+    STARTED, backfill, compiler, corpus, metrics, profiles, replay, rotation, sinks,
+    utils, writer)
+from .scheduler import CATCH_UP, DEFAULT_MAX_LAG_MS, RateScheduler
+from .writer import QueueWriter, SharedWriter
 
-
-TEMPLATE = "template"
-RAW = "raw"
 MAX_CONCUR_REQ = 100
 
+# pacing modes
+LINE = "line"
+BATCH = "batch"
+
+# flush policies, a number of bytes is also allowed
+FLUSH_LINE = "line"
+FLUSH_TICK = "tick"
+
+DEFAULT_TICK_MS = 10
+
+# achieved eps lower than target of this fraction are reported
+EPS_TOLERANCE = 0.01
+
+# execution backends
+THREAD = "thread"
+PROCESS = "process"
+ASYNCIO = "asyncio"
+
+# output of shards of the same pattern
+SHARD_SPLIT = "split"
+SHARD_SHARED = "shared"
+
+DEFAULT_SHARD_EPS = 20000
+
 
 log = logging.getLogger(__name__)
 
@@ -54,161 +84,721 @@ def validate_path(path: str) -> None:
         raise ValueError(f"Path {abs_path} is not in an allowed directory")
 
 
-def log_generator(pattern_conf: Dict[str, Any]) -> int:
-    """This function generates a random log file from
-    configuration pattern
+def parse_flush(flush: Union[str, int, None], pacing: str) -> Union[str, int]:
+    """Return the flush policy of a pattern
+
+    Arguments:
+        flush {Union[str, int, None]} -- flush value in pattern configuration
+        pacing {str} -- pacing mode of pattern
+
+    Raises:
+        ValueError: raised when flush value is not valid
+
+    Returns:
+        Union[str, int] -- 'line', 'tick' or number of bytes
+    """
+    if flush is None:
+        return FLUSH_TICK if pacing == BATCH else FLUSH_LINE
+    if flush in (FLUSH_LINE, FLUSH_TICK):
+        return flush
+    try:
+        nr_bytes = int(flush)
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"flush must be '{FLUSH_LINE}', '{FLUSH_TICK}' or a number of bytes, "
+            f"not {flush!r}")
+    if nr_bytes <= 0:
+        raise ValueError(f"flush bytes must be greater than 0, not {nr_bytes}")
+    return nr_bytes
+
+
+def write_logs(
+    f: TextIO,
+    render: Callable[[], str],
+    batch: int,
+    flush: Union[str, int],
+    unflushed: int = 0,
+    pattern_metrics: Optional[metrics.PatternMetrics] = None,
+) -> int:
+    """Write a batch of new logs with a single write, unless logs are
+    flushed one by one
+
+    Arguments:
+        f {TextIO} -- output file
+        render {Callable[[], str]} -- function that returns a new log
+        batch {int} -- number of logs to write
+        flush {Union[str, int]} -- flush policy
+
+    Keyword Arguments:
+        unflushed {int} -- bytes written and not flushed yet (default: {0})
+        pattern_metrics {Optional[PatternMetrics]} -- metrics of pattern,
+                                                      None to not measure
+                                                      (default: {None})
+
+    Returns:
+        int -- bytes written and not flushed yet
+    """
+    clock = time.perf_counter
+
+    if flush == FLUSH_LINE:
+        for _ in range(batch):
+            if pattern_metrics is None:
+                f.write(render() + "\n")
+                # Ensure each line is written immediately
+                f.flush()
+            else:
+                start = clock()
+                line = render() + "\n"
+                rendered = clock()
+                f.write(line)
+                f.flush()
+                pattern_metrics.observe(
+                    1, len(line), rendered - start, clock() - rendered)
+        return 0
+
+    start = clock() if pattern_metrics is not None else 0.0
+    if batch == 1:
+        chunk = render() + "\n"
+    else:
+        chunk = "\n".join([render() for _ in range(batch)]) + "\n"
+    rendered = clock() if pattern_metrics is not None else 0.0
+
+    f.write(chunk)
+    unflushed += len(chunk)
+    if flush == FLUSH_TICK or unflushed >= flush:
+        f.flush()
+        unflushed = 0
+
+    if pattern_metrics is not None:
+        pattern_metrics.observe(batch, len(chunk), rendered - start, clock() - rendered)
+    return unflushed
+
+
+def write_corpus(
+    f: TextIO,
+    arena: corpus.Corpus,
+    batch: int,
+    flush: Union[str, int],
+    unflushed: int = 0,
+    pattern_metrics: Optional[metrics.PatternMetrics] = None,
+) -> int:
+    """Write a batch of logs taken from the corpus of a pattern, like
+    write_logs. Logs of a batch have the same timestamp, so with the
+    flush of each line a batch is flushed at once.
+
+    Arguments:
+        f {TextIO} -- output file
+        arena {Corpus} -- corpus of pattern
+        batch {int} -- number of logs to write
+        flush {Union[str, int]} -- flush policy
+
+    Keyword Arguments:
+        unflushed {int} -- bytes written and not flushed yet (default: {0})
+        pattern_metrics {Optional[PatternMetrics]} -- metrics of pattern,
+                                                      None to not measure
+                                                      (default: {None})
+
+    Returns:
+        int -- bytes written and not flushed yet
+    """
+    clock = time.perf_counter
+    start = clock() if pattern_metrics is not None else 0.0
+    views = arena.take(batch)
+    rendered = clock() if pattern_metrics is not None else 0.0
+
+    write = corpus.writer_of(f)
+    size = 0
+    for view in views:
+        write(view)
+        size += len(view)
+    unflushed += size
+    if flush == FLUSH_LINE or flush == FLUSH_TICK or unflushed >= flush:
+        f.flush()
+        unflushed = 0
+
+    if pattern_metrics is not None:
+        pattern_metrics.observe(batch, size, rendered - start, clock() - rendered)
+    return unflushed
+
+
+def log_first_log(name: str) -> None:
+    """Log the time from the start to the first log of a pattern
+
+    Arguments:
+        name {str} -- name of pattern
+    """
+    log.debug(
+        f"[{name}] - First log written "
+        f"{(time.perf_counter() - STARTED) * 1000:.1f} ms after start")
+
+
+def emit(
+    f: TextIO,
+    render: Callable[[], str],
+    scheduler: RateScheduler,
+    flush: Union[str, int],
+    progress: Any = None,
+    pattern_metrics: Optional[metrics.PatternMetrics] = None,
+    arena: Optional[corpus.Corpus] = None,
+) -> int:
+    """Write the logs of a pattern at the pace given by scheduler.
+    All logs due at the same time are written with a single write.
+
+    Arguments:
+        f {TextIO} -- output file
+        render {Callable[[], str]} -- function that returns a new log
+        scheduler {RateScheduler} -- scheduler of pattern
+        flush {Union[str, int]} -- flush policy
+
+    Keyword Arguments:
+        progress {Any} -- tqdm progress bar (default: {None})
+        pattern_metrics {Optional[PatternMetrics]} -- metrics of pattern
+                                                      (default: {None})
+        arena {Optional[Corpus]} -- corpus of pattern, logs are taken from it
+                                    instead of rendered (default: {None})
+
+    Returns:
+        int -- number of logs written
+    """
+    unflushed = 0
+    next_batch = scheduler.next_batch
+    first = True
+
+    while True:
+        batch = next_batch()
+        if batch == 0:
+            break
+
+        if arena is None:
+            unflushed = write_logs(f, render, batch, flush, unflushed, pattern_metrics)
+        else:
+            unflushed = write_corpus(f, arena, batch, flush, unflushed, pattern_metrics)
+        if first:
+            log_first_log(scheduler.name)
+            first = False
+
+        if progress is not None:  # pragma: no cover
+            progress.update(batch)
+
+    f.flush()
+    return scheduler.emitted
+
+
+def prepare_pattern(
+    pattern_conf: Dict[str, Any],
+) -> Tuple[compiler.CompiledPattern, RateScheduler, Union[str, int]]:
+    """Validate a configuration pattern and return what is needed to
+    generate its logs
 
     Arguments:
         pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
 
     Raises:
-        ValueError: raised when generator_type value is not valid
+        ValueError: raised when the pattern is not valid
 
     Returns:
-        int -- number of logs generated
+        Tuple[CompiledPattern, RateScheduler, Union[str, int]] -- plan,
+            scheduler and flush policy of pattern
     """
     name = pattern_conf["name"]
-    path = pattern_conf["path"]
-    
-    # Validate path for security
-    validate_path(path)
-    
-    log_path = os.path.dirname(path)
+    output = sinks.output_conf(pattern_conf)
+
     log.debug(f"[{name}] - Generating logging for {name}")
-    log.debug(f"[{name}] - Generating logging in {path}")
+    if output["type"] in (sinks.FILE, sinks.FIFO):
+        path = pattern_conf["path"]
+        # Validate path for security
+        validate_path(path)
+        log.debug(f"[{name}] - Generating logging in {path}")
     eps = pattern_conf.get("eps", 1)
     log.debug(f"[{name}] - EPS: {eps}")
     time_period = pattern_conf.get("time_period", 60)
     log.debug(f"[{name}] - time period: {time_period}")
     generator_type = pattern_conf.get("generator_type", "raw")
     log.debug(f"[{name}] - generator type: {generator_type}")
-    remove_file = pattern_conf.get("remove_file", False)
+    if "shard" in pattern_conf:
+        log.debug(
+            f"[{name}] - shard {pattern_conf['shard'] + 1}/{pattern_conf['shards']}")
+
+    # compile pattern once, the loop only runs the plan
+    start = time.perf_counter()
+    plan = compiler.compile_pattern(pattern_conf)
+    log.debug(f"[{name}] - Compiled in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if "correction" in pattern_conf:
+        log.warning(
+            f"[{name}] - correction is deprecated and ignored, "
+            "the scheduler keeps the eps without corrections")
+
+    # calculate nr logs
+    profile = None
+    realtime = pattern_conf.get("backfill") is None
+    if plan.replay is not None and plan.replay.speed is not None and realtime:
+        # lines at their original timing, by default for a pass of file
+        time_period = pattern_conf.get("time_period", plan.replay.period)
+        profile = plan.replay.profile(time_period)
+        nr_logs = profile.total
+    elif pattern_conf.get("profile") is not None and realtime:
+        # backfill builds the profile of its time range
+        profile = profiles.build_profile(
+            name, pattern_conf["profile"], eps, time_period,
+            pattern_conf.get("start_at") or time.time(), plan.rng)
+        nr_logs = profile.total
+    else:
+        nr_logs = int(eps * time_period)
+    log.debug(f"[{name}] - Total logs to generate is {nr_logs}")
 
-    # eps correction percentage
-    correction = float(pattern_conf.get("correction", 1.12))
-    log.debug(f"EPS correction percentage: {correction}")
+    pacing = pattern_conf.get("pacing", LINE)
+    if pacing not in (LINE, BATCH):
+        raise ValueError(f"pacing must be '{LINE}' or '{BATCH}', not {pacing!r}")
+    log.debug(f"[{name}] - pacing: {pacing}")
+    flush = parse_flush(pattern_conf.get("flush"), pacing)
+    log.debug(f"[{name}] - flush: {flush}")
+    tick = float(pattern_conf.get("tick_ms", DEFAULT_TICK_MS)) / 1000
+    if tick <= 0:
+        raise ValueError(f"tick_ms must be greater than 0, not {tick * 1000}")
+
+    scheduler = RateScheduler(
+        name=name,
+        eps=eps,
+        total=nr_logs,
+        tick=tick if pacing == BATCH else None,
+        policy=pattern_conf.get("lag_policy", CATCH_UP),
+        max_lag=float(pattern_conf.get("max_lag_ms", DEFAULT_MAX_LAG_MS)) / 1000,
+        report_interval=pattern_conf.get("report_interval"),
+        profile=profile)
+    log.debug(f"[{name}] - lag policy: {scheduler.policy}")
+
+    return plan, scheduler, flush
+
+
+def open_output(
+    pattern_conf: Dict[str, Any],
+    flush: Union[str, int],
+    clock: Callable[[], float] = time.monotonic,
+) -> TextIO:
+    """Prepare and open the output file of a pattern
 
-    # calculate nr logs and sleep
-    eps = int(round(eps * (1 + correction / 100), 0))
-    log.debug(f"EPS corrected: {eps}")
-    nr_logs = eps * time_period
-    log.debug(f"[{name}] - Total logs to generate is {nr_logs}")
-    sleep_time = 1 / eps
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+        flush {Union[str, int]} -- flush policy
+
+    Keyword Arguments:
+        clock {Callable[[], float]} -- clock of rotate_interval, the time
+                                       of logs in backfill
+                                       (default: {time.monotonic})
+
+    Returns:
+        TextIO -- output file opened in append mode, or a sink
+                  with the same interface
+    """
+    name = pattern_conf["name"]
 
-    log.debug(f"[{name}] - Ideal sleep time between logs is {sleep_time}")
+    output_queue = pattern_conf.get("output_queue")
+    if output_queue is not None:
+        # pattern sharing its output, written by a SharedWriter
+        return QueueWriter(output_queue)
 
-    progress_bar = pattern_conf.get("progress_bar", False)
+    # with a flush every N bytes the buffer must hold them
+    buffer_bytes = flush if isinstance(flush, int) else 0
+    output = sinks.output_conf(pattern_conf)
+    if output["type"] != sinks.FILE:
+        return sinks.open_sink(pattern_conf, output, buffer_bytes)
 
-    if remove_file:
+    path = rotation.output_path(pattern_conf)
+    log_path = os.path.dirname(path)
+
+    if pattern_conf.get("remove_file", False):
         try:
             os.remove(path)
             log.debug(f"[{name}] - File {path} removed")
         except OSError:
             log.debug(f"[{name}] - File {path} doesn't exist")
 
-    # create folder log
-    if not os.path.exists(log_path):
-        log.debug(f"[{name}] - Created path {log_path}")
-        os.makedirs(log_path)
+    # create folder log, patterns sharing it can create it at the same time
+    os.makedirs(log_path, exist_ok=True)
 
-    if progress_bar:  # pragma: no cover
-        range_func = trange
-        range_kvargs = {"desc": f"{name} logs loop"}
-    else:
-        range_func = range
-        range_kvargs = {}
-
-    if generator_type == TEMPLATE:
-        log.debug(f"[{name}] - Generating logs from template")
-        fields = pattern_conf["fields"]
-
-        if not isinstance(pattern_conf["template"], list):
-            raise ValueError("template must be a list of templates")
-
-        # Initial conditions to fix sleep time
-        wait = 0
-        elapsed_end = 0
-
-        # Open file once outside the loop
-        with open(path, "a") as f:
-            for i in range_func(nr_logs, **range_kvargs):
-                start = time.time()
-                
-                template = random.choice(pattern_conf["template"])
-                log_str = utils.get_template_log(template, fields)
-                f.write(log_str + "\n")
-                # Ensure each line is written immediately
-                f.flush()
-                
-                elapsed_first = time.time() - start
-
-                start = time.time()
-                wait = sleep_time - elapsed_first - elapsed_end
-                try:
-                    time.sleep(wait)
-                except ValueError:
-                    pass
-                finally:
-                    elapsed_end = time.time() - start - wait
-
-    elif generator_type == RAW:
-        log.debug(f"[{name}] - Generating logs from raw examples")
-        
-        if "examples" not in pattern_conf or not pattern_conf["examples"]:
-            raise ValueError(f"[{name}] - Generator type 'raw' requires 'examples' field with sample logs")
-            
-        examples = pattern_conf["examples"]
-        
-        # Initial conditions to fix sleep time
-        wait = 0
-        elapsed_end = 0
-        
-        # Open file once outside the loop
-        with open(path, "a") as f:
-            for i in range_func(nr_logs, **range_kvargs):
-                start = time.time()
-                
-                log_str = random.choice(examples)
-                f.write(log_str + "\n")
-                # Ensure each line is written immediately
-                f.flush()
-                
-                elapsed_first = time.time() - start
-                
-                start = time.time()
-                wait = sleep_time - elapsed_first - elapsed_end
-                try:
-                    time.sleep(wait)
-                except ValueError:
-                    pass
-                finally:
-                    elapsed_end = time.time() - start - wait
-    else:
-        raise ValueError(f"Generator type {generator_type} doesn't exist")
+    buffering = max(buffer_bytes, io.DEFAULT_BUFFER_SIZE) if buffer_bytes else -1
+    return rotation.open_file(pattern_conf, path, buffering, clock)
+
+
+def wait_until(start_at: Optional[float]) -> None:
+    """Sleep until a wall clock time, like the start of run given by a
+    controller to all its workers
+
+    Arguments:
+        start_at {Optional[float]} -- seconds since the epoch, None to not wait
+    """
+    if start_at is not None:
+        delay = start_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def check_rate(scheduler: RateScheduler) -> None:
+    """Log a warning when a pattern didn't reach its eps
+
+    Arguments:
+        scheduler {RateScheduler} -- scheduler of pattern
+    """
+    if scheduler.achieved_eps() < scheduler.target_eps() * (1 - EPS_TOLERANCE):
+        log.warning(f"Rate not reached: {scheduler.report()}")
 
+
+def log_generator(pattern_conf: Dict[str, Any]) -> int:
+    """This function generates a random log file from
+    configuration pattern
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+
+    Raises:
+        ValueError: raised when generator_type value is not valid
+
+    Returns:
+        int -- number of logs generated
+    """
+    if pattern_conf.get("backfill") is not None:
+        return backfill.backfill_generator(pattern_conf)
+
+    name = pattern_conf["name"]
+    plan, scheduler, flush = prepare_pattern(pattern_conf)
+    pattern_metrics = metrics.register_pattern(pattern_conf, scheduler)
+    # rendered before the start, it can take a while
+    arena = corpus.build_corpus(pattern_conf, plan, pattern_conf.get("start_at"))
+
+    log.debug(f"[{name}] - Generating logs from {plan.generator_type}")
+
+    # Open file once outside the loop
+    with open_output(pattern_conf, flush) as f:
+        wait_until(pattern_conf.get("start_at"))
+        if pattern_conf.get("progress_bar", False):  # pragma: no cover
+            # imported only when needed, it's slow to import
+            from tqdm import tqdm
+            with tqdm(total=scheduler.total, desc=f"{name} logs loop") as progress:
+                nr_logs = emit(
+                    f, plan.render, scheduler, flush, progress, pattern_metrics, arena)
+        else:
+            nr_logs = emit(
+                f, plan.render, scheduler, flush,
+                pattern_metrics=pattern_metrics, arena=arena)
+
+    check_rate(scheduler)
     return nr_logs
 
 
-def core(path_patterns: str, max_concur_req: int, progress_bar: bool = False) -> int:
+def shard_path(path: str, shard: int) -> str:
+    """Return the path of the file of a shard: the shard number is added
+    before the extension, like out/dns.log -> out/dns.1.log
+
+    Arguments:
+        path {str} -- path of pattern
+        shard {int} -- number of shard
+
+    Returns:
+        str -- path of shard file
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.{shard}{ext}"
+
+
+def shard_pattern(pattern_conf: Dict[str, Any], shard_eps: int) -> List[Dict[str, Any]]:
+    """Split a pattern in shards, each one generating a part of the eps
+    of pattern. The number of shards is given by 'shards' in pattern
+    configuration, otherwise it is computed so that no shard goes over
+    shard_eps. Every shard has its own seed, derived from the seed of
+    pattern when it has one.
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+        shard_eps {int} -- max eps of a shard, when shards is not given
+
+    Raises:
+        ValueError: raised when shards or shard_output are not valid
+
+    Returns:
+        List[Dict[str, Any]] -- configurations of shards
+    """
+    eps = pattern_conf.get("eps", 1)
+    # the lines of a timed replay are split between shards, not the eps
+    timed = replay.is_timed(pattern_conf)
+    if timed and "shard" in pattern_conf:
+        # already the part of a worker of a distributed run
+        return [dict(pattern_conf)]
+    shards = int(pattern_conf.get("shards", max(1, math.ceil(eps / shard_eps))))
+    if shards < 1:
+        raise ValueError(f"shards must be greater than 0, not {shards}")
+    if not timed:
+        shards = max(1, min(shards, int(eps)))
+
+    shard_output = pattern_conf.get("shard_output", SHARD_SPLIT)
+    if shard_output not in (SHARD_SPLIT, SHARD_SHARED):
+        raise ValueError(
+            f"shard_output must be '{SHARD_SPLIT}' or '{SHARD_SHARED}', "
+            f"not {shard_output!r}")
+
+    system_random = random.SystemRandom()
+    seed = pattern_conf.get("seed")
+    confs = []
+    for shard in range(shards):
+        conf = dict(pattern_conf)
+        if not timed:
+            conf["eps"] = eps // shards + (1 if shard < eps % shards else 0)
+        conf["shard"] = shard
+        conf["shards"] = shards
+        if seed is None:
+            conf["seed"] = system_random.getrandbits(64)
+        elif shards > 1:
+            # a single shard keeps the output of the other executors
+            conf["seed"] = utils.derive_seed(seed, shard)
+        if shards > 1 and shard_output == SHARD_SPLIT and sinks.is_file(pattern_conf):
+            conf["path"] = shard_path(pattern_conf["path"], shard)
+        confs.append(conf)
+    return confs
+
+
+def _process_log_generator(pattern_conf: Dict[str, Any]) -> int:
+    """Entry point of process workers: the state of random generators
+    inherited from parent is replaced by the seed of shard
+    """
+    utils.seed_globals(pattern_conf["seed"])
+
+    store = pattern_conf.get("metrics_store")
+    pusher = None
+    if store is not None:
+        # metrics inherited from parent, or left by a previous task
+        metrics.REGISTRY.clear()
+        stop = threading.Event()
+        pusher = threading.Thread(
+            target=metrics.push_metrics, args=(store, stop), daemon=True)
+        pusher.start()
+    try:
+        return log_generator(pattern_conf)
+    finally:
+        if pusher is not None:
+            stop.set()
+            pusher.join()
+        sinks.close_pools()
+
+
+def share_destinations(
+    confs: List[Dict[str, Any]],
+    make_queue: Callable[[], Any],
+) -> List[SharedWriter]:
+    """Start a shared writer foreach destination of more patterns, and
+    send the logs of these patterns to the queue of its writer
+
+    Arguments:
+        confs {List[Dict[str, Any]]} -- configuration patterns, changed in place
+        make_queue {Callable[[], Any]} -- function that returns a new bounded queue
+
+    Returns:
+        List[SharedWriter] -- started writers, to stop when patterns end
+    """
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for conf in confs:
+        key = writer.destination(conf)
+        if key is not None:
+            groups.setdefault(key, []).append(conf)
+
+    writers = []
+    for key, group in groups.items():
+        if len(group) < 2:
+            continue
+
+        conf = dict(group[0])
+        conf["remove_file"] = any(i.get("remove_file", False) for i in group)
+        if "path" in conf:
+            validate_path(conf["path"])
+        f = open_output(conf, FLUSH_TICK)
+
+        chunks = make_queue()
+        for i in group:
+            i["remove_file"] = False
+            i["output_queue"] = chunks
+
+        name = key[-1]
+        names = ", ".join(sorted({i["name"] for i in group}))
+        log.info(f"{len(group)} patterns or shards share {name}: {names}")
+        writers.append(SharedWriter(name, f, chunks).start())
+    return writers
+
+
+def run_processes(
+    patterns: Dict[str, Dict[str, Any]],
+    max_workers: int,
+    shard_eps: int = DEFAULT_SHARD_EPS,
+) -> Dict[str, int]:
+    """Run all patterns on a pool of processes. High eps patterns are
+    split in shards and every shard is a task of the pool.
+
+    Arguments:
+        patterns {Dict[str, Dict[str, Any]]} -- configuration patterns
+        max_workers {int} -- max number of processes
+        shard_eps {int} -- max eps of a shard (default: {DEFAULT_SHARD_EPS})
+
+    Returns:
+        Dict[str, int] -- number of logs generated foreach pattern
+    """
+    tasks = []
+
+    with multiprocessing.Manager() as manager:
+        store = None
+        if any(conf.get("metrics", False) for conf in patterns.values()):
+            # snapshots pushed by workers, read by the parent registry
+            store = manager.dict()
+            metrics.REGISTRY.add_remote(store)
+
+        for key, conf in patterns.items():
+            shards = shard_pattern(conf, shard_eps)
+            if store is not None:
+                for shard in shards:
+                    shard["metrics_store"] = store
+            log.info(f"[{conf['name']}] - Split in {len(shards)} shards")
+
+            tasks.extend((key, shard) for shard in shards)
+
+        # shards of shard_output shared, and patterns with the same path
+        writers = share_destinations(
+            [conf for _, conf in tasks], lambda: manager.Queue(writer.QUEUE_SIZE))
+
+        workers = int(min(len(tasks), max_workers))
+        log.info(f"Activate {workers} parallel processes for {len(tasks)} tasks")
+        if workers > (os.cpu_count() or 1):
+            log.warning(f"{workers} processes are more than {os.cpu_count()} CPUs")
+        if workers < len(tasks):
+            log.warning(
+                f"Only {workers} of {len(tasks)} tasks run at the same time, "
+                "the others start when the first ones end")
+
+        results: Dict[str, int] = {key: 0 for key in patterns}
+        try:
+            with futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                res = executor.map(_process_log_generator, [conf for _, conf in tasks])
+                for (key, _), nr_logs in zip(tasks, res):
+                    results[key] += nr_logs
+        finally:
+            for i in writers:
+                i.stop()
+            if store is not None:
+                # keep the last snapshots after the manager shuts down
+                metrics.REGISTRY.remove_remote(store)
+                metrics.REGISTRY.add_remote(dict(store))
+
+    return results
+
+
+def load_patterns(
+    path_patterns: str,
+    use_cache: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    """Return the enabled configuration patterns of a folder
+
+    Arguments:
+        path_patterns {str} -- path of log patterns
+
+    Keyword Arguments:
+        use_cache {bool} -- load patterns parsed by previous runs (default: {True})
+
+    Returns:
+        Dict[str, Dict[str, Any]] -- enabled patterns by file name
+    """
+    # Load all configuration patterns
+    start = time.perf_counter()
+    patterns = {
+        os.path.basename(i): utils.load_pattern(i, use_cache) for i in glob.iglob(
+            os.path.join(path_patterns, "*.yml"))}
+    log.debug(
+        f"Loaded {len(patterns)} pattern files "
+        f"in {(time.perf_counter() - start) * 1000:.1f} ms, "
+        f"{(time.perf_counter() - STARTED) * 1000:.1f} ms after start")
+    # filter patterns not enabled
+    return {k: v for k, v in patterns.items() if v.get("enabled", False)}
+
+
+def core(
+    path_patterns: str,
+    max_concur_req: int,
+    progress_bar: bool = False,
+    executor: str = THREAD,
+    shard_eps: int = DEFAULT_SHARD_EPS,
+    report_interval: Optional[float] = None,
+    backfill_range: Optional[Tuple[datetime.datetime, datetime.datetime]] = None,
+    metrics_port: Optional[int] = None,
+    metrics_host: str = metrics.DEFAULT_HOST,
+    stats_interval: Optional[float] = None,
+    seed: Optional[int] = None,
+    pattern_cache: bool = True,
+) -> int:
     """This function runs the core of tool.
     All threads are generated here. A thread foreach log file.
+    With the process executor every log file runs in a process and high
+    eps patterns are split in more processes. With the asyncio executor
+    all log files are generated by a single event loop.
 
     Arguments:
         path_patterns {str} -- path of log patterns
         max_concur_req {int} -- max concurrent log generator
         progress_bar {bool} -- enable/disable progress bar
+        executor {str} -- execution backend: 'thread', 'process' or 'asyncio'
+        shard_eps {int} -- max eps of a process, used by process executor
+        report_interval {Optional[float]} -- seconds between rate reports of patterns
+        backfill_range {Optional[Tuple[datetime, datetime]]} -- generate as fast
+            as possible the logs of this time range instead of real time logs
+        metrics_port {Optional[int]} -- port of HTTP /metrics endpoint, None to disable
+        metrics_host {str} -- address of HTTP /metrics endpoint
+        stats_interval {Optional[float]} -- seconds between JSON stats on stderr
+        seed {Optional[int]} -- seed of run: each pattern gets a seed derived
+            from it and its name, unless it has its own seed
+        pattern_cache {bool} -- load patterns parsed by previous runs, if
+            their files didn't change
+
+    Raises:
+        ValueError: raised when executor value is not valid
 
     Returns:
         int -- Total number of logs generated
     """
 
-    # Load all configuration patterns
-    patterns = {
-        os.path.basename(i): utils.load_config(i) for i in glob.iglob(
-            os.path.join(path_patterns, "*.yml"))}
-    # filter patterns not enabled
-    patterns = {k: v for k, v in patterns.items() if v.get("enabled", False)}
+    patterns = load_patterns(path_patterns, pattern_cache)
+    return run(
+        patterns, max_concur_req, progress_bar, executor, shard_eps, report_interval,
+        backfill_range, metrics_port, metrics_host, stats_interval, seed)
+
+
+def run(
+    patterns: Dict[str, Dict[str, Any]],
+    max_concur_req: int,
+    progress_bar: bool = False,
+    executor: str = THREAD,
+    shard_eps: int = DEFAULT_SHARD_EPS,
+    report_interval: Optional[float] = None,
+    backfill_range: Optional[Tuple[datetime.datetime, datetime.datetime]] = None,
+    metrics_port: Optional[int] = None,
+    metrics_host: str = metrics.DEFAULT_HOST,
+    stats_interval: Optional[float] = None,
+    seed: Optional[int] = None,
+    start_at: Optional[float] = None,
+    collect_metrics: bool = False,
+) -> int:
+    """Run the enabled configuration patterns, the arguments are the
+    same of core
+
+    Arguments:
+        patterns {Dict[str, Dict[str, Any]]} -- enabled patterns by file name
+        max_concur_req {int} -- max concurrent log generator
+
+    Keyword Arguments:
+        start_at {Optional[float]} -- wall clock time of first logs, None
+                                      to start as soon as ready (default: {None})
+        collect_metrics {bool} -- collect metrics also without endpoint
+                                  and stats (default: {False})
 
+    Raises:
+        ValueError: raised when executor value is not valid
+
+    Returns:
+        int -- Total number of logs generated
+    """
     if len(patterns) == 0:
         log.error("There aren't logs to generate. Check pattern files")
         return 0
@@ -217,11 +807,75 @@ def core(path_patterns: str, max_concur_req: int, progress_bar: bool = False) ->
 
     # add commons extra values foreach log
     commons = {
-        'progress_bar': progress_bar}
+        'progress_bar': progress_bar,
+        'report_interval': report_interval,
+        'backfill': None,
+        'start_at': start_at,
+        'metrics': (
+            collect_metrics or metrics_port is not None
+            or stats_interval is not None)}
+
+    if backfill_range is not None:
+        start, end = (i.timestamp() for i in backfill_range)
+        if start >= end:
+            raise ValueError("backfill start must be before end")
+        if executor == ASYNCIO:
+            raise ValueError("backfill is not supported by asyncio executor")
+        commons['backfill'] = (start, end)
+        log.info(f"Backfilling from {backfill_range[0]} to {backfill_range[1]}")
 
     for i in patterns:
         for k, v in commons.items():
             patterns[i][k] = v
+        if seed is not None and "seed" not in patterns[i]:
+            patterns[i]["seed"] = utils.derive_seed(seed, patterns[i]["name"])
+
+    if executor not in (THREAD, PROCESS, ASYNCIO):
+        raise ValueError(f"Executor {executor} doesn't exist")
+
+    server = None
+    reporter = None
+    metrics.REGISTRY.clear()
+    if metrics_port is not None:
+        server = metrics.serve(metrics_port, metrics_host)
+    if stats_interval is not None:
+        reporter = metrics.StatsReporter(stats_interval).start()
+
+    writers: List[SharedWriter] = []
+    try:
+        if executor != PROCESS:
+            # process executor shares destinations through a manager
+            writers = share_destinations(
+                list(patterns.values()), lambda: queue.Queue(writer.QUEUE_SIZE))
+        return _run(patterns, executor, max_concur_req, shard_eps)
+    finally:
+        for i in writers:
+            i.stop()
+        if reporter is not None:
+            reporter.stop()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        sinks.close_pools()
+
+
+def _run(
+    patterns: Dict[str, Dict[str, Any]],
+    executor: str,
+    max_concur_req: int,
+    shard_eps: int,
+) -> int:
+    """Run all patterns on an executor and return the number of logs"""
+    if executor in (PROCESS, ASYNCIO):
+        if executor == PROCESS:
+            results = run_processes(patterns, max_concur_req, shard_eps)
+        else:
+            # asyncio is imported only by its executor
+            from . import multiplexer
+            results = multiplexer.run_asyncio(patterns)
+        for key, nr_logs in results.items():
+            log.info(f"[{patterns[key]['name']}] - Generated {nr_logs} logs")
+        return sum(results.values())
 
     # calculate max concurrent threads
     concur_req = int(min(MAX_CONCUR_REQ, len(patterns), max_concur_req))
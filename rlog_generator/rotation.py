@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Rotated and compressed file output for rlog_generator.
+
+A file is rotated by size or interval with logrotate naming: the current
+segment becomes path.1, the older ones are shifted to path.2, path.3 and
+so on. The writer only renames the full segment and opens a new file;
+a background thread compresses segments (gzip, or zstd if the zstandard
+package is installed) and shifts them in order. Without rotation, the
+output can be compressed while it is written, useful with backfill.
+"""
+
+import gzip
+import io
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Dict, Optional, TextIO
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+SUFFIXES = {GZIP: ".gz", ZSTD: ".zst"}
+
+DEFAULT_LEVELS = {GZIP: 6, ZSTD: 3}
+
+# size of blocks copied when a segment is compressed
+COPY_BYTES = 1024 * 1024
+
+
+log = logging.getLogger(__name__)
+
+
+def validate(pattern_conf: Dict[str, Any]) -> None:
+    """Validate rotation and compression of a pattern
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+
+    Raises:
+        ValueError: raised when rotation or compression are not valid
+    """
+    name = pattern_conf["name"]
+    for key in ("rotate_bytes", "rotate_interval", "rotate_keep"):
+        value = pattern_conf.get(key)
+        if value is not None and float(value) <= 0:
+            raise ValueError(f"[{name}] - {key} must be greater than 0, not {value}")
+
+    compress = pattern_conf.get("compress")
+    if compress is None:
+        return
+    if compress not in SUFFIXES:
+        raise ValueError(
+            f"[{name}] - compress must be '{GZIP}' or '{ZSTD}', not {compress!r}")
+    if compress == ZSTD and zstandard is None:
+        raise ValueError(f"[{name}] - compress {ZSTD} needs the zstandard package")
+
+
+def is_rotated(pattern_conf: Dict[str, Any]) -> bool:
+    """Return True if the output file of a pattern is rotated"""
+    return bool(pattern_conf.get("rotate_bytes") or pattern_conf.get("rotate_interval"))
+
+
+def output_path(pattern_conf: Dict[str, Any]) -> str:
+    """Return the path of the file written: path, with the suffix of
+    compression when the file is compressed while it is written
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+
+    Returns:
+        str -- path of output file
+    """
+    path = pattern_conf["path"]
+    compress = pattern_conf.get("compress")
+    if (compress is None or is_rotated(pattern_conf)
+            or path.endswith(SUFFIXES[compress])):
+        return path
+    return path + SUFFIXES[compress]
+
+
+def _open_binary(path: str, compress: str, level: int) -> BinaryIO:
+    if compress == GZIP:
+        return gzip.open(path, "ab", compresslevel=level)
+    return zstandard.ZstdCompressor(level=level).stream_writer(open(path, "ab"))
+
+
+def open_compressed(path: str, compress: str, level: Optional[int] = None) -> TextIO:
+    """Open a file for appending text compressed while it is written
+
+    Arguments:
+        path {str} -- path of file
+        compress {str} -- 'gzip' or 'zstd'
+
+    Keyword Arguments:
+        level {Optional[int]} -- compression level, None for default (default: {None})
+
+    Returns:
+        TextIO -- compressed file
+    """
+    level = DEFAULT_LEVELS[compress] if level is None else level
+    return io.TextIOWrapper(_open_binary(path, compress, level), write_through=False)
+
+
+def compress_file(
+    source: str,
+    target: str,
+    compress: str,
+    level: Optional[int] = None,
+) -> None:
+    """Compress source in target and remove source
+
+    Arguments:
+        source {str} -- path of file to compress
+        target {str} -- path of compressed file
+        compress {str} -- 'gzip' or 'zstd'
+
+    Keyword Arguments:
+        level {Optional[int]} -- compression level, None for default (default: {None})
+    """
+    level = DEFAULT_LEVELS[compress] if level is None else level
+    with open(source, "rb") as fi, _open_binary(target, compress, level) as fo:
+        shutil.copyfileobj(fi, fo, COPY_BYTES)
+    os.remove(source)
+
+
+class Rotator:
+    """Thread that compresses and shifts the rotated segments of a file,
+    in the order they are rotated
+    """
+
+    def __init__(
+        self,
+        path: str,
+        keep: Optional[int] = None,
+        compress: Optional[str] = None,
+        level: Optional[int] = None,
+    ) -> None:
+        """
+        Arguments:
+            path {str} -- path of rotated file
+
+        Keyword Arguments:
+            keep {Optional[int]} -- number of segments kept, None to keep
+                                    all (default: {None})
+            compress {Optional[str]} -- 'gzip', 'zstd' or None (default: {None})
+            level {Optional[int]} -- compression level, None for default
+                                     (default: {None})
+        """
+        self.path = path
+        self.keep = keep
+        self.compress = compress
+        self.level = level
+        self.suffix = SUFFIXES[compress] if compress else ""
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "Rotator":
+        self._thread.start()
+        return self
+
+    def submit(self, segment: str) -> None:
+        """Queue a segment renamed by the writer"""
+        self._queue.put(segment)
+
+    def stop(self) -> None:
+        """Process all queued segments and stop"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def segment(self, index: int) -> str:
+        """Return the path of the segment at index, 1 for the newest"""
+        return f"{self.path}.{index}{self.suffix}"
+
+    def _shift(self) -> None:
+        last = 1
+        while os.path.exists(self.segment(last)):
+            last += 1
+        # last is the first free index
+        if self.keep is not None:
+            for i in range(self.keep, last):
+                os.remove(self.segment(i))
+            last = min(last, self.keep)
+        for i in range(last - 1, 0, -1):
+            os.rename(self.segment(i), self.segment(i + 1))
+
+    def _process(self, segment: str) -> None:
+        if self.compress:
+            compressed = segment + self.suffix
+            start = time.perf_counter()
+            compress_file(segment, compressed, self.compress, self.level)
+            log.debug(f"Compressed {segment} in {time.perf_counter() - start:.2f} s")
+            segment = compressed
+        self._shift()
+        os.rename(segment, self.segment(1))
+
+    def _run(self) -> None:
+        while True:
+            segment = self._queue.get()
+            if segment is None:
+                break
+            try:
+                self._process(segment)
+            except OSError as e:
+                log.error(f"Error rotating {segment}: {e}")
+
+
+class RotatingFile:
+    """File-like object that appends to path and rotates it when it
+    exceeds max_bytes or when interval seconds are elapsed on its clock.
+    Rotation happens between writes, so lines are never split between
+    segments. Text is written encoded in UTF-8, so sizes are in bytes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: Optional[int] = None,
+        interval: Optional[float] = None,
+        keep: Optional[int] = None,
+        compress: Optional[str] = None,
+        level: Optional[int] = None,
+        buffering: int = -1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Arguments:
+            path {str} -- path of file
+
+        Keyword Arguments:
+            max_bytes {Optional[int]} -- max size of a segment (default: {None})
+            interval {Optional[float]} -- max seconds of a segment (default: {None})
+            keep {Optional[int]} -- number of rotated segments kept,
+                                    None to keep all (default: {None})
+            compress {Optional[str]} -- compression of rotated segments
+                                        (default: {None})
+            level {Optional[int]} -- compression level, None for default
+                                     (default: {None})
+            buffering {int} -- buffering of file (default: {-1})
+            clock {Callable[[], float]} -- seconds of interval, the time of
+                                           logs in backfill
+                                           (default: {time.monotonic})
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self._buffering = buffering
+        self._clock = clock
+        self._rotator = Rotator(path, keep, compress, level).start()
+        self._f = open(path, "ab", buffering=buffering)
+        self._size = os.path.getsize(path)
+        # time of the next rotation by interval on clock
+        self.deadline = clock() + interval if interval else None
+        self.rotations = 0
+
+    def rotate(self) -> None:
+        """Close the current segment and open a new one"""
+        self._f.close()
+        segment = f"{self.path}.{time.time_ns()}.rotating"
+        os.rename(self.path, segment)
+        self._rotator.submit(segment)
+        self._f = open(self.path, "ab", buffering=self._buffering)
+        self._size = 0
+        if self.interval:
+            self.deadline = self._clock() + self.interval
+        self.rotations += 1
+
+    def write(self, data: str) -> int:
+        encoded = data.encode("utf-8")
+        if self._size and (
+            (self.max_bytes and self._size + len(encoded) > self.max_bytes)
+                or (self.deadline is not None and self._clock() >= self.deadline)):
+            self.rotate()
+        self._size += len(encoded)
+        self._f.write(encoded)
+        return len(data)
+
+    def flush(self) -> None:
+        self._f.flush()
+
+    def close(self) -> None:
+        """Close the file and wait for the compression of segments"""
+        self._f.close()
+        self._rotator.stop()
+
+    def __enter__(self) -> "RotatingFile":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def open_file(
+    pattern_conf: Dict[str, Any],
+    path: str,
+    buffering: int = -1,
+    clock: Callable[[], float] = time.monotonic,
+) -> TextIO:
+    """Open the output file of a pattern: rotated, compressed while it's
+    written or a plain file
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+        path {str} -- path of file, see output_path
+
+    Keyword Arguments:
+        buffering {int} -- buffering of file (default: {-1})
+        clock {Callable[[], float]} -- clock of rotate_interval
+                                       (default: {time.monotonic})
+
+    Raises:
+        ValueError: raised when rotation or compression are not valid
+
+    Returns:
+        TextIO -- file opened in append mode
+    """
+    validate(pattern_conf)
+    compress = pattern_conf.get("compress")
+    level = pattern_conf.get("compress_level")
+    level = int(level) if level is not None else None
+
+    if is_rotated(pattern_conf):
+        max_bytes = pattern_conf.get("rotate_bytes")
+        interval = pattern_conf.get("rotate_interval")
+        keep = pattern_conf.get("rotate_keep")
+        return RotatingFile(
+            path,
+            max_bytes=int(max_bytes) if max_bytes else None,
+            interval=float(interval) if interval else None,
+            keep=int(keep) if keep else None,
+            compress=compress,
+            level=level,
+            buffering=buffering,
+            clock=clock)
+
+    if compress is not None:
+        return open_compressed(path, compress, level)
+
+    return open(path, "a", buffering=buffering)
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Rate scheduler for rlog_generator.
+
+The event i of a pattern has the absolute deadline start + i / eps on a
+monotonic clock, so the time spent to generate and write logs, or a late
+wake up, never moves the following deadlines. With a load profile the
+deadline of event i is looked up in the schedule of profile.
+"""
+
+import logging
+import math
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .profiles import Profile
+
+# policies when the generator is behind its deadlines
+CATCH_UP = "catch_up"
+SHED = "shed"
+
+DEFAULT_MAX_LAG_MS = 1000
+
+# max number of lag samples kept to compute percentiles
+LAG_SAMPLES = 10000
+
+
+log = logging.getLogger(__name__)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Return the q-th percentile of values, with nearest rank method
+
+    Arguments:
+        values {List[float]} -- sorted values
+        q {float} -- percentile in [0, 100]
+
+    Returns:
+        float -- percentile value, 0 if there aren't values
+    """
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[rank - 1]
+
+
+class RateScheduler:
+    """Pace the events of a pattern against absolute deadlines and
+    measure the achieved rate and the emission lag
+    """
+
+    def __init__(
+        self,
+        name: str,
+        eps: float,
+        total: int,
+        tick: Optional[float] = None,
+        policy: str = CATCH_UP,
+        max_lag: float = DEFAULT_MAX_LAG_MS / 1000,
+        report_interval: Optional[float] = None,
+        profile: Optional[Profile] = None,
+        clock: Callable[[], float] = time.perf_counter,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Arguments:
+            name {str} -- name of pattern
+            eps {float} -- target events per second
+            total {int} -- number of events to schedule
+
+        Keyword Arguments:
+            tick {Optional[float]} -- seconds between batches, None to
+                                      schedule one event at a time (default: {None})
+            policy {str} -- 'catch_up' emits late events as soon as possible,
+                            'shed' drops events later than max_lag (default: {CATCH_UP})
+            max_lag {float} -- seconds of lag before shedding events (default: {1})
+            report_interval {Optional[float]} -- seconds between periodic
+                                                 reports, None to disable
+                                                 (default: {None})
+            profile {Optional[Profile]} -- schedule of events, None for
+                                           constant eps (default: {None})
+            clock {Callable[[], float]} -- monotonic clock
+                                           (default: {time.perf_counter})
+            sleep {Callable[[float], None]} -- sleep function (default: {time.sleep})
+
+        Raises:
+            ValueError: raised when a parameter is not valid
+        """
+        if eps <= 0:
+            raise ValueError(f"eps must be greater than 0, not {eps}")
+        if policy not in (CATCH_UP, SHED):
+            raise ValueError(f"policy must be '{CATCH_UP}' or '{SHED}', not {policy!r}")
+        if max_lag < 0:
+            raise ValueError(f"max lag must not be negative, not {max_lag}")
+
+        self.name = name
+        self.eps = eps
+        self.total = total
+        self.tick = tick
+        self.policy = policy
+        self.max_lag = max_lag
+        self.report_interval = report_interval
+        self.profile = profile
+        if profile is not None:
+            # offset of event and events before a time since the start
+            self._offset = profile.time_of
+            self._events = profile.events
+        self._clock = clock
+        self._sleep = sleep
+
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        # index of next event to schedule
+        self.index = 0
+        self.emitted = 0
+        self.dropped = 0
+        # events emitted later than a tick, or an interval without tick
+        self.late = 0
+        self.lags: List[float] = []
+        self._nr_lags = 0
+        self._sampler = random.Random(0)
+        self._next_report = math.inf
+
+    def deadline(self, index: int) -> float:
+        """Return the absolute deadline of an event
+
+        Arguments:
+            index {int} -- index of event
+
+        Returns:
+            float -- deadline on scheduler clock
+        """
+        return self.start + self._offset(index)
+
+    def _offset(self, index: float) -> float:
+        return index / self.eps
+
+    def _events(self, elapsed: float) -> float:
+        return elapsed * self.eps
+
+    def _record_lag(self, lag: float) -> None:
+        # reservoir sampling, so percentiles cost a bounded memory
+        self._nr_lags += 1
+        if len(self.lags) < LAG_SAMPLES:
+            self.lags.append(lag)
+        else:
+            i = self._sampler.randrange(self._nr_lags)
+            if i < LAG_SAMPLES:
+                self.lags[i] = lag
+
+    def begin(self, start: Optional[float] = None) -> None:
+        """Set the start of scheduling, it's called by the first
+        next_wakeup when not called before
+
+        Keyword Arguments:
+            start {Optional[float]} -- start time on scheduler clock,
+                                       None for now (default: {None})
+        """
+        self.start = self._clock() if start is None else start
+        if self.report_interval:
+            self._next_report = self.start + self.report_interval
+
+    def next_wakeup(self) -> float:
+        """Return when the next events are due: the deadline of next
+        event without tick, the next tick boundary, but not before the
+        next event, otherwise. When all events are scheduled it is the
+        end of the period.
+
+        Returns:
+            float -- absolute time on scheduler clock
+        """
+        if self.start is None:
+            self.begin()
+
+        if self.index >= self.total:
+            return self.deadline(self.total)
+
+        target = self.deadline(self.index)
+        if self.tick is not None:
+            elapsed = max(0.0, self._clock() - self.start)
+            ticks = math.floor(elapsed / self.tick) + 1
+            target = max(target, self.start + ticks * self.tick)
+        return target
+
+    def take(self, now: float) -> int:
+        """Return how many events are due at now: always one without
+        tick, all events due in the tick otherwise. It returns 0 when
+        all events are scheduled.
+
+        Arguments:
+            now {float} -- current time on scheduler clock, not before next_wakeup
+
+        Returns:
+            int -- number of events to emit now
+        """
+        if self.index >= self.total:
+            if self.end is None:
+                self.end = now
+                log.info(self.report())
+            return 0
+
+        if self.policy == SHED and now - self.deadline(self.index) > self.max_lag:
+            late = self._events(now - self.max_lag - self.start)
+            first = min(self.total, math.floor(late) + 1)
+            if first > self.index:
+                self.dropped += first - self.index
+                self.index = first
+            if self.index >= self.total:
+                return self.take(now)
+
+        self._record_lag(max(0.0, now - self.deadline(self.index)))
+
+        if self.tick is None:
+            count = 1
+        else:
+            due = min(self.total, math.floor(self._events(now - self.start)) + 1)
+            count = max(1, due - self.index)
+
+        late_after = self.tick if self.tick is not None else 1 / self.eps
+        late = math.floor(self._events(now - late_after - self.start)) + 1 - self.index
+        if late > 0:
+            self.late += min(late, count)
+
+        self.index += count
+        self.emitted += count
+
+        if now >= self._next_report:
+            self._next_report += self.report_interval
+            log.info(self.report())
+
+        return count
+
+    def next_batch(self) -> int:
+        """Sleep until the next events are due and return how many
+        they are, see next_wakeup and take. When all events are scheduled
+        it sleeps until the end of the period and returns 0.
+
+        Returns:
+            int -- number of events to emit now
+        """
+        deadline = self.next_wakeup()
+        now = self._clock()
+        if deadline > now:
+            self._sleep(deadline - now)
+            now = self._clock()
+        return self.take(now)
+
+    def clock(self) -> float:
+        """Return the current time on scheduler clock
+
+        Returns:
+            float -- current time
+        """
+        return self._clock()
+
+    def target_eps(self) -> float:
+        """Return the events per second scheduled until now: eps, or
+        the mean eps of profile since the start
+
+        Returns:
+            float -- target eps
+        """
+        if self.profile is None or self.start is None:
+            return self.eps
+        end = self.end if self.end is not None else self._clock()
+        elapsed = min(end - self.start, self.profile.period)
+        return self.profile.events(elapsed) / elapsed if elapsed > 0 else self.eps
+
+    def achieved_eps(self) -> float:
+        """Return the events per second emitted until now
+
+        Returns:
+            float -- achieved eps
+        """
+        if self.start is None:
+            return 0.0
+        end = self.end if self.end is not None else self._clock()
+        elapsed = end - self.start
+        return self.emitted / elapsed if elapsed > 0 else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the statistics of scheduler
+
+        Returns:
+            Dict[str, Any] -- target and achieved eps, lag percentiles in
+                              seconds, emitted, dropped and late events
+        """
+        lags = sorted(self.lags)
+        return {
+            "name": self.name,
+            "target_eps": self.target_eps(),
+            "achieved_eps": self.achieved_eps(),
+            "lag_p50": percentile(lags, 50),
+            "lag_p99": percentile(lags, 99),
+            "emitted": self.emitted,
+            "dropped": self.dropped,
+            "late": self.late,
+        }
+
+    def report(self) -> str:
+        """Return a human readable report of statistics
+
+        Returns:
+            str -- report of scheduler
+        """
+        stats = self.stats()
+        accuracy = (
+            stats["achieved_eps"] / stats["target_eps"] * 100
+            if stats["target_eps"] else 100.0)
+        return (
+            f"[{self.name}] - target {stats['target_eps']:g} eps, "
+            f"achieved {stats['achieved_eps']:.1f} eps ({accuracy:.2f}%), "
+            f"lag p50 {stats['lag_p50'] * 1000:.2f} ms, "
+            f"p99 {stats['lag_p99'] * 1000:.2f} ms, "
+            f"emitted {self.emitted}, dropped {self.dropped}, late {self.late}")
@@ -0,0 +1,1080 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Output sinks for rlog_generator.
+
+The output of a pattern is selected by 'output' in pattern configuration,
+a file by default. All sinks are file-like objects: logs are buffered by
+write and sent by flush, so the flush policy of the pattern decides how
+many logs go in a datagram or in a send. TCP connections are pooled by
+destination and shared by all the patterns of a process. The syslog
+outputs prepend a RFC5424 or RFC3164 header to each log, unless the logs
+are already RFC5424 lines.
+
+The Elasticsearch output collects logs in _bulk requests, by count,
+bytes or time, compressed with gzip and sent by the threads of a pool of
+keep-alive HTTP connections, that bounds the requests in flight.
+"""
+
+import base64
+import gzip
+import http.client
+import json
+import logging
+import os
+import queue
+import socket
+import ssl
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from json.encoder import encode_basestring
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+from urllib.parse import quote, urlsplit
+
+from . import formats
+
+
+# types of output
+FILE = "file"
+STDOUT = "stdout"
+FIFO = "fifo"
+SYSLOG_UDP = "syslog_udp"
+SYSLOG_TCP = "syslog_tcp"
+TCP = "tcp"
+ELASTICSEARCH = "elasticsearch"
+
+SINK_TYPES = (FILE, STDOUT, FIFO, SYSLOG_UDP, SYSLOG_TCP, TCP, ELASTICSEARCH)
+
+# framing of messages on TCP
+OCTET_COUNTING = "octet_counting"
+LF = "lf"
+
+# headers of syslog outputs
+HEADER_RFC5424 = "rfc5424"
+HEADER_RFC3164 = "rfc3164"
+HEADER_NONE = "none"
+HEADERS = (HEADER_RFC5424, HEADER_RFC3164, HEADER_NONE)
+
+DEFAULT_FACILITY = 1
+DEFAULT_SEVERITY = 6
+
+# bytes buffered before a send even without flush
+DEFAULT_BUFFER_BYTES = 64 * 1024
+
+# max payload of a datagram, an Ethernet frame without IP and UDP headers
+DEFAULT_DATAGRAM_BYTES = 1472
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_RECONNECT_MS = 100
+DEFAULT_MAX_BACKOFF_MS = 10000
+
+# failed attempts of a send before the pattern stops, about 40 s of backoff
+DEFAULT_RETRIES = 10
+
+# limits of a _bulk request, sent at the first one reached
+DEFAULT_BATCH_EVENTS = 1000
+DEFAULT_BATCH_BYTES = 5 * 1024 * 1024
+DEFAULT_BATCH_INTERVAL = 1.0
+
+# gzip level of _bulk bodies, fast with a good ratio on logs
+GZIP_LEVEL = 1
+
+# statuses of Elasticsearch asking to send again later
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# only errors and statuses of items in _bulk responses
+BULK_FILTER = "errors,items.*.status,items.*.error"
+
+
+log = logging.getLogger(__name__)
+
+
+def output_conf(pattern_conf: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the output configuration of a pattern, a file in 'path'
+    when 'output' is missing
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+
+    Raises:
+        ValueError: raised when output is not valid
+
+    Returns:
+        Dict[str, Any] -- output configuration with its type
+    """
+    name = pattern_conf["name"]
+    output = pattern_conf.get("output") or {"type": FILE}
+    if isinstance(output, str):
+        output = {"type": output}
+    if not isinstance(output, dict):
+        raise ValueError(f"[{name}] - output must be a type or a dict, not {output!r}")
+
+    output = dict(output)
+    output.setdefault("type", FILE)
+    sink_type = output["type"]
+    if sink_type not in SINK_TYPES:
+        raise ValueError(
+            f"[{name}] - output type must be one of {', '.join(SINK_TYPES)}, "
+            f"not {sink_type!r}")
+
+    if sink_type in (FILE, FIFO) and not pattern_conf.get("path"):
+        raise ValueError(f"[{name}] - path is required by {sink_type} output")
+    if sink_type in (SYSLOG_UDP, SYSLOG_TCP, TCP):
+        if "host" not in output or "port" not in output:
+            raise ValueError(
+                f"[{name}] - host and port are required by {sink_type} output")
+        framing = output.get(
+            "framing", OCTET_COUNTING if sink_type == SYSLOG_TCP else LF)
+        if framing not in (OCTET_COUNTING, LF):
+            raise ValueError(
+                f"[{name}] - framing must be '{OCTET_COUNTING}' or '{LF}', "
+                f"not {framing!r}")
+        output["framing"] = framing
+    if sink_type in (SYSLOG_UDP, SYSLOG_TCP):
+        # logs of rfc5424 format already have their header
+        header = output.get(
+            "header",
+            HEADER_NONE if pattern_conf.get("format") == formats.RFC5424
+            else HEADER_RFC5424)
+        if header not in HEADERS:
+            raise ValueError(
+                f"[{name}] - header must be one of {', '.join(HEADERS)}, "
+                f"not {header!r}")
+        facility = int(output.get("facility", DEFAULT_FACILITY))
+        severity = int(output.get("severity", DEFAULT_SEVERITY))
+        if not 0 <= facility <= 23 or not 0 <= severity <= 7:
+            raise ValueError(
+                f"[{name}] - facility must be in [0, 23] and severity in [0, 7], "
+                f"not {facility} and {severity}")
+        output["header"] = header
+    if sink_type == ELASTICSEARCH:
+        url = urlsplit(str(output.get("url", "")))
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError(
+                f"[{name}] - url of {sink_type} output must be http(s)://host[:port], "
+                f"not {output.get('url')!r}")
+        if not output.get("index"):
+            raise ValueError(f"[{name}] - index is required by {sink_type} output")
+        # JSON logs are the documents, other logs their message
+        output["documents"] = pattern_conf.get("format") == formats.JSON
+    return output
+
+
+def is_file(pattern_conf: Dict[str, Any]) -> bool:
+    """Return True if the output of a pattern is a regular file"""
+    output = pattern_conf.get("output") or FILE
+    return (output if isinstance(output, str) else output.get("type", FILE)) == FILE
+
+
+class Sink:
+    """Base of sinks: a file-like object that buffers writes"""
+
+    def write(self, data: str) -> int:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class StreamSink(Sink):
+    """Sink on a stream that is not closed with the sink, like stdout"""
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+
+    def write(self, data: str) -> int:
+        return self._stream.write(data)
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+
+def _lines(data: str, partial: str) -> Tuple[List[str], str]:
+    """Split written data in complete lines, without newline, and the
+    rest of an incomplete line
+    """
+    lines = (partial + data).split("\n")
+    return lines[:-1], lines[-1]
+
+
+class SyslogHeader:
+    """Header of syslog messages, RFC5424 or RFC3164, with the time of
+    send. It's formatted again only when the second changes.
+    """
+
+    def __init__(
+        self,
+        kind: str = HEADER_RFC5424,
+        facility: int = DEFAULT_FACILITY,
+        severity: int = DEFAULT_SEVERITY,
+        hostname: Optional[str] = None,
+        app_name: str = "rlog_generator",
+    ) -> None:
+        """
+        Keyword Arguments:
+            kind {str} -- 'rfc5424' or 'rfc3164' (default: {HEADER_RFC5424})
+            facility {int} -- syslog facility (default: {DEFAULT_FACILITY})
+            severity {int} -- syslog severity (default: {DEFAULT_SEVERITY})
+            hostname {Optional[str]} -- host name, None for the name of
+                                        this host (default: {None})
+            app_name {str} -- application name (default: {"rlog_generator"})
+        """
+        hostname = hostname or socket.gethostname() or "-"
+        # header values can't have spaces
+        hostname, app_name = (
+            "_".join(i.split()) or "-" for i in (hostname, app_name))
+        self._pri = f"<{facility * 8 + severity}>"
+        if kind == HEADER_RFC5424:
+            self._pri += "1 "
+            self._suffix = f" {hostname} {app_name} - - - "
+            self._time = self._rfc5424
+        else:
+            self._suffix = f" {hostname} {app_name}: "
+            self._time = self._rfc3164
+        self._second = -1
+        self._header = b""
+
+    @staticmethod
+    def _rfc5424(second: int) -> str:
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(second))
+
+    @staticmethod
+    def _rfc3164(second: int) -> str:
+        now = time.localtime(second)
+        # day of month padded with a space
+        return time.strftime(f"%b {now.tm_mday:>2} %H:%M:%S", now)
+
+    def __call__(self) -> bytes:
+        second = int(time.time())
+        if second != self._second:
+            self._second = second
+            self._header = (self._pri + self._time(second) + self._suffix).encode()
+        return self._header
+
+
+class UdpSink(Sink):
+    """Sink that sends logs as syslog datagrams. Logs are sent one per
+    datagram, or packed newline separated up to datagram_bytes with batch,
+    each one after the syslog header, if any.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        batch: bool = False,
+        datagram_bytes: int = DEFAULT_DATAGRAM_BYTES,
+        buffer_bytes: int = DEFAULT_BUFFER_BYTES,
+        header: Optional[SyslogHeader] = None,
+    ) -> None:
+        """
+        Arguments:
+            host {str} -- address of collector
+            port {int} -- UDP port of collector
+
+        Keyword Arguments:
+            batch {bool} -- pack more logs in a datagram (default: {False})
+            datagram_bytes {int} -- max bytes of a batched datagram
+                                    (default: {DEFAULT_DATAGRAM_BYTES})
+            buffer_bytes {int} -- bytes buffered before sending
+                                  without flush (default: {DEFAULT_BUFFER_BYTES})
+            header {Optional[SyslogHeader]} -- header of each log, None to send
+                                               raw logs (default: {None})
+        """
+        family, kind, proto, _, address = socket.getaddrinfo(
+            host, port, type=socket.SOCK_DGRAM)[0]
+        self._socket = socket.socket(family, kind, proto)
+        # connected, so the destination is resolved once
+        self._socket.connect(address)
+        self._send = self._socket.send
+        self.batch = batch
+        self.datagram_bytes = datagram_bytes
+        self.buffer_bytes = buffer_bytes
+        self.header = header
+        self.errors = 0
+        self._pending: List[str] = []
+        self._partial = ""
+        self._size = 0
+
+    def write(self, data: str) -> int:
+        lines, self._partial = _lines(data, self._partial)
+        self._pending.extend(lines)
+        self._size += len(data)
+        if self._size >= self.buffer_bytes:
+            self.flush()
+        return len(data)
+
+    def _datagrams(self, messages: List[bytes]) -> List[bytes]:
+        if not self.batch:
+            return messages
+        datagrams = []
+        current: List[bytes] = []
+        size = 0
+        for i in messages:
+            if current and size + len(i) + 1 > self.datagram_bytes:
+                datagrams.append(b"\n".join(current))
+                current = []
+                size = 0
+            current.append(i)
+            size += len(i) + 1
+        if current:
+            datagrams.append(b"\n".join(current))
+        return datagrams
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        header = self.header() if self.header is not None else b""
+        messages = [header + i.encode() for i in self._pending]
+        self._pending = []
+        self._size = len(self._partial)
+
+        send = self._send
+        for i in self._datagrams(messages):
+            try:
+                send(i)
+            except OSError as e:
+                # datagrams are lost anyway when nobody listens
+                self.errors += 1
+                if self.errors == 1:
+                    log.warning(f"Error sending datagram: {e}")
+
+    def close(self) -> None:
+        self.flush()
+        self._socket.close()
+
+
+class ConnectionPool:
+    """Persistent TCP connections to a destination, created when needed
+    up to size and reconnected with exponential backoff
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+        reconnect_ms: float = DEFAULT_RECONNECT_MS,
+        max_backoff_ms: float = DEFAULT_MAX_BACKOFF_MS,
+        retries: Optional[int] = DEFAULT_RETRIES,
+    ) -> None:
+        """
+        Arguments:
+            host {str} -- address of destination
+            port {int} -- TCP port of destination
+
+        Keyword Arguments:
+            size {int} -- max number of connections (default: {DEFAULT_POOL_SIZE})
+            timeout {float} -- seconds of timeout of connect and send
+                               (default: {DEFAULT_TIMEOUT})
+            reconnect_ms {float} -- first wait before reconnecting
+                                    (default: {DEFAULT_RECONNECT_MS})
+            max_backoff_ms {float} -- max wait before reconnecting
+                                      (default: {DEFAULT_MAX_BACKOFF_MS})
+            retries {Optional[int]} -- max failed attempts of a send,
+                                       None to retry forever
+                                       (default: {DEFAULT_RETRIES})
+
+        Raises:
+            ValueError: raised when size is not valid
+        """
+        if size < 1:
+            raise ValueError(f"pool size must be greater than 0, not {size}")
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.reconnect = reconnect_ms / 1000
+        self.max_backoff = max_backoff_ms / 1000
+        self.retries = retries
+        self._idle: "queue.LifoQueue[socket.socket]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self.reconnects = 0
+
+    def _connect(self) -> socket.socket:
+        conn = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn
+
+    def _acquire(self) -> Optional[socket.socket]:
+        """Return an idle connection, None when a new one can be created"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return None
+        # all connections in use, wait for one
+        return self._idle.get()
+
+    def send(self, data: bytes) -> None:
+        """Send data on a connection of pool. On errors data is sent
+        again on a new connection, after a backoff.
+
+        Arguments:
+            data {bytes} -- data to send
+
+        Raises:
+            ConnectionError: raised when retries are exhausted
+        """
+        conn = self._acquire()
+        backoff = self.reconnect
+        failures = 0
+        while True:
+            try:
+                if conn is None:
+                    conn = self._connect()
+                conn.sendall(data)
+                self._idle.put(conn)
+                return
+            except OSError as e:
+                if conn is not None:
+                    conn.close()
+                    conn = None
+                failures += 1
+                self.reconnects += 1
+                if self.retries is not None and failures > self.retries:
+                    with self._lock:
+                        self._created -= 1
+                    raise ConnectionError(
+                        f"Error sending to {self.host}:{self.port} "
+                        f"after {failures} attempts: {e}")
+                log.warning(
+                    f"Error sending to {self.host}:{self.port}: {e}, "
+                    f"reconnecting in {backoff:.2f} s")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def close(self) -> None:
+        """Close all idle connections"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pools: Dict[Tuple[str, int], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(host: str, port: int, **kwargs: Any) -> ConnectionPool:
+    """Return the connection pool of a destination, shared by all sinks
+    of the process. Options are taken from the sink that creates it.
+
+    Arguments:
+        host {str} -- address of destination
+        port {int} -- TCP port of destination
+
+    Returns:
+        ConnectionPool -- pool of destination
+    """
+    with _pools_lock:
+        pool = _pools.get((host, port))
+        if pool is None:
+            pool = _pools[(host, port)] = ConnectionPool(host, port, **kwargs)
+        return pool
+
+
+def close_pools() -> None:
+    """Close the connections of all pools"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+        for http_pool in _http_pools.values():
+            http_pool.close()
+        _http_pools.clear()
+
+
+class TcpSink(Sink):
+    """Sink that sends logs on pooled TCP connections, framed with octet
+    counting (RFC6587) or a newline, each one after the syslog header,
+    if any
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        framing: str = OCTET_COUNTING,
+        buffer_bytes: int = DEFAULT_BUFFER_BYTES,
+        header: Optional[SyslogHeader] = None,
+    ) -> None:
+        """
+        Arguments:
+            pool {ConnectionPool} -- connections to destination
+
+        Keyword Arguments:
+            framing {str} -- 'octet_counting' or 'lf' (default: {OCTET_COUNTING})
+            buffer_bytes {int} -- bytes buffered before sending
+                                  without flush (default: {DEFAULT_BUFFER_BYTES})
+            header {Optional[SyslogHeader]} -- header of each log, None to send
+                                               raw logs (default: {None})
+        """
+        self._pool = pool
+        self.framing = framing
+        self.buffer_bytes = buffer_bytes
+        self.header = header
+        self._buffer = bytearray()
+        self._partial = ""
+
+    def write(self, data: str) -> int:
+        if self.framing == LF and self.header is None:
+            self._buffer += data.encode()
+        else:
+            lines, self._partial = _lines(data, self._partial)
+            header = self.header() if self.header is not None else b""
+            buffer = self._buffer
+            for i in lines:
+                message = header + i.encode()
+                if self.framing == LF:
+                    buffer += message
+                    buffer += b"\n"
+                else:
+                    buffer += b"%d " % len(message)
+                    buffer += message
+        if len(self._buffer) >= self.buffer_bytes:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self._buffer:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            self._pool.send(data)
+
+
+class HttpPool:
+    """Keep-alive HTTP connections to a server, one for each of up to
+    size threads that send requests, so at most size requests are in
+    flight and the callers wait for a free thread
+    """
+
+    def __init__(
+        self,
+        url: str,
+        size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+        verify_certs: bool = True,
+        ca_certs: Optional[str] = None,
+    ) -> None:
+        """
+        Arguments:
+            url {str} -- http(s)://host[:port] of server
+
+        Keyword Arguments:
+            size {int} -- max number of connections and of requests
+                          in flight (default: {DEFAULT_POOL_SIZE})
+            timeout {float} -- seconds of timeout of connect and response
+                               (default: {DEFAULT_TIMEOUT})
+            verify_certs {bool} -- verify the certificate of an https server
+                                   (default: {True})
+            ca_certs {Optional[str]} -- file of CA certificates, None for
+                                        the ones of system (default: {None})
+
+        Raises:
+            ValueError: raised when size is not valid
+        """
+        if size < 1:
+            raise ValueError(f"pool size must be greater than 0, not {size}")
+        parts = urlsplit(url)
+        self.url = f"{parts.scheme}://{parts.netloc}"
+        self.size = size
+        self._connect: Callable[[], http.client.HTTPConnection]
+        if parts.scheme == "https":
+            context = ssl.create_default_context(cafile=ca_certs)
+            if not verify_certs:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            self._connect = lambda: http.client.HTTPSConnection(
+                parts.hostname, parts.port, timeout=timeout, context=context)
+        else:
+            self._connect = lambda: http.client.HTTPConnection(
+                parts.hostname, parts.port, timeout=timeout)
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="http")
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._connections: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> "Future[Any]":
+        """Call a function in a thread of pool, waiting while size
+        requests are in flight
+
+        Arguments:
+            fn {Callable[..., Any]} -- function that sends requests
+
+        Returns:
+            Future[Any] -- result of function
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes,
+        headers: Dict[str, str],
+    ) -> Tuple[int, bytes]:
+        """Send a request on the connection of the calling thread. On
+        errors the connection is closed, and opened again by the next request.
+
+        Arguments:
+            method {str} -- HTTP method
+            path {str} -- path and query of request
+            body {bytes} -- body of request
+            headers {Dict[str, str]} -- headers of request
+
+        Raises:
+            OSError: raised on errors of connection
+            HTTPException: raised on errors of protocol
+
+        Returns:
+            Tuple[int, bytes] -- status and body of response
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._lock:
+                self._connections.append(conn)
+        try:
+            conn.request(method, path, body, headers)
+            response = conn.getresponse()
+            # the response must be read to reuse the connection
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+
+    def close(self) -> None:
+        """Wait for the requests in flight and close all connections"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+_http_pools: Dict[Tuple[str, str, int], HttpPool] = {}
+
+
+def get_http_pool(url: str, **kwargs: Any) -> HttpPool:
+    """Return the HTTP pool of a server, shared by all sinks of the
+    process. Options are taken from the sink that creates it.
+
+    Arguments:
+        url {str} -- http(s)://host[:port] of server
+
+    Returns:
+        HttpPool -- pool of server
+    """
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    key = (parts.scheme, parts.hostname or "", port)
+    with _pools_lock:
+        pool = _http_pools.get(key)
+        if pool is None:
+            pool = _http_pools[key] = HttpPool(url, **kwargs)
+        return pool
+
+
+class BulkSink(Sink):
+    """Sink that indexes logs in Elasticsearch with _bulk requests.
+    Batches are sent by the threads of an HTTP pool while the pattern
+    goes on; items rejected with 429 are sent again after a backoff,
+    other rejected items are counted and logged.
+    """
+
+    def __init__(
+        self,
+        pool: HttpPool,
+        index: str,
+        pipeline: Optional[str] = None,
+        data_stream: bool = False,
+        documents: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+        batch_events: int = DEFAULT_BATCH_EVENTS,
+        batch_bytes: int = DEFAULT_BATCH_BYTES,
+        batch_interval: float = DEFAULT_BATCH_INTERVAL,
+        compress: bool = True,
+        backoff_ms: float = DEFAULT_RECONNECT_MS,
+        max_backoff_ms: float = DEFAULT_MAX_BACKOFF_MS,
+        retries: Optional[int] = DEFAULT_RETRIES,
+        name: str = "",
+    ) -> None:
+        """
+        Arguments:
+            pool {HttpPool} -- connections to Elasticsearch
+            index {str} -- target index, alias or data stream
+
+        Keyword Arguments:
+            pipeline {Optional[str]} -- ingest pipeline of documents (default: {None})
+            data_stream {bool} -- index is a data stream, documents are
+                                  created and never updated (default: {False})
+            documents {bool} -- logs are JSON documents, otherwise the
+                                message of a document (default: {False})
+            headers {Optional[Dict[str, str]]} -- more headers of requests,
+                                                  like Authorization (default: {None})
+            batch_events {int} -- max logs of a request
+                                  (default: {DEFAULT_BATCH_EVENTS})
+            batch_bytes {int} -- max bytes of a request before compression
+                                 (default: {DEFAULT_BATCH_BYTES})
+            batch_interval {float} -- max seconds a log waits in a batch,
+                                      checked at each write and flush
+                                      (default: {DEFAULT_BATCH_INTERVAL})
+            compress {bool} -- compress requests with gzip (default: {True})
+            backoff_ms {float} -- first wait before sending again
+                                  (default: {DEFAULT_RECONNECT_MS})
+            max_backoff_ms {float} -- max wait before sending again
+                                      (default: {DEFAULT_MAX_BACKOFF_MS})
+            retries {Optional[int]} -- max failed attempts of a request,
+                                       None to retry forever
+                                       (default: {DEFAULT_RETRIES})
+            name {str} -- name of pattern, for logging (default: {""})
+
+        Raises:
+            ValueError: raised when the limits of batches are not valid
+        """
+        if batch_events < 1 or batch_bytes < 1 or batch_interval < 0:
+            raise ValueError(
+                f"[{name}] - batch_events and batch_bytes must be greater than 0 "
+                f"and batch_interval not negative")
+        self._pool = pool
+        self.index = index
+        self.documents = documents
+        self.batch_events = batch_events
+        self.batch_bytes = batch_bytes
+        self.batch_interval = batch_interval
+        self.compress = compress
+        self.backoff = backoff_ms / 1000
+        self.max_backoff = max_backoff_ms / 1000
+        self.retries = retries
+        self.name = name
+
+        self._path = f"/{quote(index, safe='')}/_bulk?filter_path={BULK_FILTER}"
+        if pipeline:
+            self._path += f"&pipeline={quote(pipeline, safe='')}"
+        self._headers = {"Content-Type": "application/x-ndjson", **(headers or {})}
+        if compress:
+            self._headers["Content-Encoding"] = "gzip"
+        self._action = b'{"create":{}}\n' if data_stream else b'{"index":{}}\n'
+
+        self._items: List[bytes] = []
+        self._size = 0
+        self._started = 0.0
+        self._partial = ""
+        self._futures: List["Future[None]"] = []
+        self._lock = threading.Lock()
+        self.indexed = 0
+        self.rejected = 0
+        self.retried = 0
+
+    def write(self, data: str) -> int:
+        lines, self._partial = _lines(data, self._partial)
+        if not lines:
+            return len(data)
+        if not self._items:
+            self._started = time.monotonic()
+        action = self._action
+        if self.documents:
+            prefix = action
+            suffix = b"\n"
+        else:
+            # the time of write, an ingest pipeline can parse the one of message
+            now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            prefix = action + b'{"@timestamp":"' + now.encode() + b'","message":'
+            suffix = b"}\n"
+        items = self._items
+        for i in lines:
+            text = i if self.documents else encode_basestring(i)
+            item = prefix + text.encode() + suffix
+            items.append(item)
+            self._size += len(item)
+            if len(items) >= self.batch_events or self._size >= self.batch_bytes:
+                self._submit()
+                items = self._items
+                self._started = time.monotonic()
+        return len(data)
+
+    def flush(self) -> None:
+        # the flush policy of pattern doesn't cut batches, their limits do
+        if self._items and time.monotonic() - self._started >= self.batch_interval:
+            self._submit()
+        self._raise()
+
+    def _raise(self) -> None:
+        """Raise the error of a failed request in the thread of pattern"""
+        for i in self._futures:
+            if i.done() and i.exception() is not None:
+                raise i.exception()  # type: ignore
+        self._futures = [i for i in self._futures if not i.done()]
+
+    def _submit(self) -> None:
+        items = self._items
+        self._items = []
+        self._size = 0
+        self._raise()
+        self._futures.append(self._pool.submit(self._send, items))
+
+    def _results(self, items: List[bytes], data: bytes) -> List[bytes]:
+        """Count the results of the items of a _bulk response and return
+        the items to send again
+        """
+        response = json.loads(data)
+        if not response.get("errors"):
+            with self._lock:
+                self.indexed += len(items)
+            return []
+
+        again = []
+        indexed = 0
+        rejected = []
+        for item, result in zip(items, response.get("items", [])):
+            # {"index": {"status": 201}}, or "create"
+            result = next(iter(result.values()))
+            status = result.get("status", 0)
+            if status < 300:
+                indexed += 1
+            elif status in RETRY_STATUSES:
+                again.append(item)
+            else:
+                rejected.append(result.get("error"))
+        with self._lock:
+            first = self.rejected == 0
+            self.indexed += indexed
+            self.rejected += len(rejected)
+        if rejected and first:
+            log.warning(
+                f"[{self.name}] - document rejected by {self.index}: {rejected[0]}")
+        for i in rejected:
+            log.debug(f"[{self.name}] - document rejected by {self.index}: {i}")
+        return again
+
+    def _send(self, items: List[bytes]) -> None:
+        """Send a batch in a thread of pool, again after a backoff on
+        errors of connection and 429 responses
+
+        Raises:
+            ValueError: raised when Elasticsearch refuses the request
+            ConnectionError: raised when retries are exhausted
+        """
+        backoff = self.backoff
+        failures = 0
+        while True:
+            body = b"".join(items)
+            if self.compress:
+                body = gzip.compress(body, GZIP_LEVEL)
+            try:
+                status, data = self._pool.request(
+                    "POST", self._path, body, self._headers)
+            except (OSError, http.client.HTTPException) as e:
+                status, data = 0, str(e).encode()
+
+            if status == 200:
+                items = self._results(items, data)
+                if not items:
+                    return
+                reason = f"{len(items)} documents rejected with 429"
+            elif status in RETRY_STATUSES or status == 0:
+                reason = f"HTTP {status}" if status else data.decode()
+            else:
+                # a wrong request, like a missing index or bad credentials
+                raise ValueError(
+                    f"[{self.name}] - _bulk request to {self._pool.url}/{self.index} "
+                    f"failed with HTTP {status}: {data[:500].decode(errors='replace')}")
+
+            failures += 1
+            with self._lock:
+                self.retried += 1
+            if self.retries is not None and failures > self.retries:
+                if status == 200:
+                    with self._lock:
+                        self.rejected += len(items)
+                    log.warning(
+                        f"[{self.name}] - {reason} after {failures} attempts, dropped")
+                    return
+                raise ConnectionError(
+                    f"[{self.name}] - Error sending to {self._pool.url} "
+                    f"after {failures} attempts: {reason}")
+            log.warning(
+                f"[{self.name}] - Error sending to {self._pool.url}: {reason}, "
+                f"sending again in {backoff:.2f} s")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def close(self) -> None:
+        if self._items:
+            self._submit()
+        try:
+            for i in self._futures:
+                i.result()
+        finally:
+            log.info(
+                f"[{self.name}] - {self.indexed} logs indexed in {self.index}, "
+                f"{self.rejected} rejected, {self.retried} requests sent again")
+
+
+def open_fifo(path: str, buffering: int = -1) -> TextIO:
+    """Open a named pipe for writing, creating it if it doesn't exist.
+    It blocks until a reader opens the pipe.
+
+    Arguments:
+        path {str} -- path of named pipe
+
+    Keyword Arguments:
+        buffering {int} -- buffering of file (default: {-1})
+
+    Raises:
+        ValueError: raised when path exists and it isn't a named pipe
+
+    Returns:
+        TextIO -- named pipe opened for writing
+    """
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        os.mkfifo(path)
+    elif not stat.S_ISFIFO(os.stat(path).st_mode):
+        raise ValueError(f"{path} exists and it isn't a named pipe")
+    log.info(f"Waiting for a reader of {path}")
+    return open(path, "w", buffering=buffering)
+
+
+def open_sink(
+    pattern_conf: Dict[str, Any],
+    output: Dict[str, Any],
+    buffer_bytes: int,
+) -> Any:
+    """Open a sink that is not a regular file
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+        output {Dict[str, Any]} -- output configuration, see output_conf
+        buffer_bytes {int} -- min bytes buffered, given by flush policy
+
+    Returns:
+        Any -- file-like object
+    """
+    name = pattern_conf["name"]
+    sink_type = output["type"]
+    buffer_bytes = max(
+        buffer_bytes, int(output.get("buffer_bytes", DEFAULT_BUFFER_BYTES)))
+    log.debug(f"[{name}] - Output {sink_type}")
+
+    if sink_type == STDOUT:
+        return StreamSink(sys.stdout)
+    if sink_type == FIFO:
+        return open_fifo(pattern_conf["path"], buffer_bytes)
+
+    if sink_type == ELASTICSEARCH:
+        return open_bulk_sink(pattern_conf, output)
+
+    host = output["host"]
+    port = int(output["port"])
+    header = None
+    if output.get("header", HEADER_NONE) != HEADER_NONE:
+        header = SyslogHeader(
+            output["header"],
+            facility=int(output.get("facility", DEFAULT_FACILITY)),
+            severity=int(output.get("severity", DEFAULT_SEVERITY)),
+            hostname=output.get("hostname"),
+            app_name=str(output.get("app_name", name)))
+    if sink_type == SYSLOG_UDP:
+        return UdpSink(
+            host, port,
+            batch=bool(output.get("batch", False)),
+            datagram_bytes=int(output.get("datagram_bytes", DEFAULT_DATAGRAM_BYTES)),
+            buffer_bytes=buffer_bytes,
+            header=header)
+
+    # retries: null in the output retries forever
+    retries = output.get("retries", DEFAULT_RETRIES)
+    pool = get_pool(
+        host, port,
+        size=int(output.get("pool_size", DEFAULT_POOL_SIZE)),
+        timeout=float(output.get("timeout", DEFAULT_TIMEOUT)),
+        reconnect_ms=float(output.get("reconnect_ms", DEFAULT_RECONNECT_MS)),
+        max_backoff_ms=float(output.get("max_backoff_ms", DEFAULT_MAX_BACKOFF_MS)),
+        retries=int(retries) if retries is not None else None)
+    return TcpSink(
+        pool, framing=output["framing"], buffer_bytes=buffer_bytes, header=header)
+
+
+def open_bulk_sink(pattern_conf: Dict[str, Any], output: Dict[str, Any]) -> BulkSink:
+    """Open a sink to Elasticsearch
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+        output {Dict[str, Any]} -- output configuration, see output_conf
+
+    Returns:
+        BulkSink -- sink of _bulk requests
+    """
+    headers = {}
+    if output.get("api_key"):
+        headers["Authorization"] = f"ApiKey {output['api_key']}"
+    elif output.get("username"):
+        credentials = f"{output['username']}:{output.get('password', '')}".encode()
+        headers["Authorization"] = f"Basic {base64.b64encode(credentials).decode()}"
+
+    pool = get_http_pool(
+        output["url"],
+        size=int(output.get("pool_size", DEFAULT_POOL_SIZE)),
+        timeout=float(output.get("timeout", DEFAULT_TIMEOUT)),
+        verify_certs=bool(output.get("verify_certs", True)),
+        ca_certs=output.get("ca_certs"))
+    retries = output.get("retries", DEFAULT_RETRIES)
+    return BulkSink(
+        pool, str(output["index"]),
+        pipeline=output.get("pipeline"),
+        data_stream=bool(output.get("data_stream", False)),
+        documents=output["documents"],
+        headers=headers,
+        batch_events=int(output.get("batch_events", DEFAULT_BATCH_EVENTS)),
+        batch_bytes=int(output.get("batch_bytes", DEFAULT_BATCH_BYTES)),
+        batch_interval=float(output.get("batch_interval", DEFAULT_BATCH_INTERVAL)),
+        compress=bool(output.get("gzip", True)),
+        backoff_ms=float(output.get("backoff_ms", DEFAULT_RECONNECT_MS)),
+        max_backoff_ms=float(output.get("max_backoff_ms", DEFAULT_MAX_BACKOFF_MS)),
+        retries=int(retries) if retries is not None else None,
+        name=pattern_conf["name"])
@@ -19,23 +19,100 @@ Utils module for rlog_generator.
 """
 
 import datetime
+import hashlib
 import logging
+import os
 import random
 import socket
 import struct
 import sys
-from typing import Any, Callable, Dict, List, Optional, TypeVar, Union, cast
+import time
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar,
+    Union, cast)
 
-from faker import Faker
 import yaml
 
+from . import cache
+
+if TYPE_CHECKING:  # pragma: no cover
+    from faker import Faker
+
 log = logging.getLogger(__name__)
 
-# Initialize Faker once for performance
-_faker = Faker()
+# Faker is slow to import and to create with all its providers, so it's
+# imported only when a function needs it, with the providers it needs
+_faker: Optional["Faker"] = None
+
+# seed of default Faker, to ensure consistent output
+_faker_seed = 42
+
+# C loader of PyYAML, when it's built with libyaml
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Random functions use the global random and the default Faker, unless
+# they are given the random generator (rng) or the Faker (faker) of a pattern
+
+
+def _default_faker() -> "Faker":
+    global _faker
+    if _faker is None:
+        _faker = new_faker(_faker_seed)
+    return _faker
+
+
+def seed_globals(seed: int) -> None:
+    """Seed the global random and the default Faker, used by functions
+    called without the generators of a pattern
+
+    Arguments:
+        seed {int} -- seed
+    """
+    global _faker_seed
+    random.seed(seed)
+    _faker_seed = seed
+    if _faker is not None:
+        _faker.seed_instance(seed)
+
+
+def derive_seed(seed: int, *keys: Any) -> int:
+    """Return a seed derived from seed and keys, the same in every
+    process and run, so patterns and shards get independent streams
 
-# Set locale to ensure consistent output
-_faker.seed_instance(42)
+    Arguments:
+        seed {int} -- seed of run
+        *keys -- keys of stream, like the name of pattern and the shard
+
+    Returns:
+        int -- 64 bit seed
+    """
+    data = ":".join(str(i) for i in (seed,) + keys).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+def new_faker(seed: int, providers: Optional[Iterable[str]] = None) -> "Faker":
+    """Return a Faker with its own random generator, seeded with seed
+
+    Arguments:
+        seed {int} -- seed of Faker
+
+    Keyword Arguments:
+        providers {Optional[Iterable[str]]} -- names of Faker providers,
+                                               None for all (default: {None})
+
+    Returns:
+        Faker -- Faker instance
+    """
+    start = time.perf_counter()
+    from faker import Faker
+
+    if providers is None:
+        faker = Faker()
+    else:
+        faker = Faker(providers=[f"faker.providers.{i}" for i in sorted(providers)])
+    faker.seed_instance(seed)
+    log.debug(f"Faker created in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return faker
 
 
 def load_config(yaml_file: str) -> Dict[str, Any]:
@@ -49,10 +126,38 @@ def load_config(yaml_file: str) -> Dict[str, Any]:
     """
     with open(yaml_file, 'r') as f:
         log.debug(f"Loading file {yaml_file}")
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YamlLoader)
+
+
+def load_pattern(yaml_file: str, use_cache: bool = True) -> Dict[str, Any]:
+    """Return a configuration pattern given its YAML file, with the
+    folder of file in 'pattern_dir', for the relative paths of pattern
 
+    Arguments:
+        yaml_file {str} -- path of YAML file
 
-def randint(min_value: Union[int, str], max_value: Union[int, str]) -> int:
+    Keyword Arguments:
+        use_cache {bool} -- load the pattern parsed by a previous run,
+                            if the file didn't change (default: {True})
+
+    Returns:
+        Dict[str, Any] -- Python object of configuration pattern
+    """
+    if use_cache:
+        pattern = cache.cached(yaml_file, load_config)
+    else:
+        pattern = load_config(yaml_file)
+    if isinstance(pattern, dict):
+        pattern.setdefault("pattern_dir", os.path.dirname(os.path.abspath(yaml_file)))
+    return pattern
+
+
+def randint(
+    min_value: Union[int, str],
+    max_value: Union[int, str],
+    *,
+    rng: Optional[random.Random] = None,
+) -> int:
     """Return random integer in range [min_value, max_value],
     including both end points
 
@@ -63,127 +168,127 @@ def randint(min_value: Union[int, str], max_value: Union[int, str]) -> int:
     Returns:
         int -- random integer in range [min_value, max_value]
     """
-    return random.randint(int(min_value), int(max_value))
+    return (rng or random).randint(int(min_value), int(max_value))
 
 
-def randip() -> str:
+def randip(*, rng: Optional[random.Random] = None) -> str:
     """Return random IP address
 
     Returns:
         str -- IP address
     """
-    return socket.inet_ntoa(struct.pack('>I', random.randint(1, 0xffffffff)))
+    return socket.inet_ntoa(struct.pack('>I', (rng or random).randint(1, 0xffffffff)))
 
 
-def fake_ip() -> str:
+def fake_ip(*, faker: Optional["Faker"] = None) -> str:
     """Return random IP address using Faker
     
     Returns:
         str -- IP address
     """
-    return _faker.ipv4()
+    return (faker or _default_faker()).ipv4()
 
 
-def fake_ipv6() -> str:
+def fake_ipv6(*, faker: Optional["Faker"] = None) -> str:
     """Return random IPv6 address
     
     Returns:
         str -- IPv6 address
     """
-    return _faker.ipv6()
+    return (faker or _default_faker()).ipv6()
 
 
-def fake_name() -> str:
+def fake_name(*, faker: Optional["Faker"] = None) -> str:
     """Return random full name
     
     Returns:
         str -- Person name
     """
-    return _faker.name()
+    return (faker or _default_faker()).name()
 
 
-def fake_user_agent() -> str:
+def fake_user_agent(*, faker: Optional["Faker"] = None) -> str:
     """Return random user agent string
     
     Returns:
         str -- User agent
     """
-    return _faker.user_agent()
+    return (faker or _default_faker()).user_agent()
 
 
-def fake_uuid() -> str:
+def fake_uuid(*, faker: Optional["Faker"] = None) -> str:
     """Return random UUID
     
     Returns:
         str -- UUID
     """
-    return str(_faker.uuid4())
+    return str((faker or _default_faker()).uuid4())
 
 
-def fake_email() -> str:
+def fake_email(*, faker: Optional["Faker"] = None) -> str:
     """Return random email address
     
     Returns:
         str -- Email address
     """
-    return _faker.email()
+    return (faker or _default_faker()).email()
 
 
-def fake_url() -> str:
+def fake_url(*, faker: Optional["Faker"] = None) -> str:
     """Return random URL
     
     Returns:
         str -- URL
     """
-    return _faker.url()
+    return (faker or _default_faker()).url()
 
 
-def fake_hostname() -> str:
+def fake_hostname(*, faker: Optional["Faker"] = None) -> str:
     """Return random hostname
     
     Returns:
         str -- Hostname
     """
-    return _faker.hostname()
+    return (faker or _default_faker()).hostname()
 
 
-def fake_mac() -> str:
+def fake_mac(*, faker: Optional["Faker"] = None) -> str:
     """Return random MAC address
     
     Returns:
         str -- MAC address
     """
-    return _faker.mac_address()
+    return (faker or _default_faker()).mac_address()
 
 
-def fake_port() -> int:
+def fake_port(*, faker: Optional["Faker"] = None) -> int:
     """Return random port number
     
     Returns:
         int -- Port number
     """
-    return _faker.port_number()
+    return (faker or _default_faker()).port_number()
 
 
-def fake_unix_time() -> int:
+def fake_unix_time(*, faker: Optional["Faker"] = None) -> int:
     """Return random Unix timestamp
     
     Returns:
         int -- Unix timestamp
     """
-    return int(_faker.unix_time())
+    return int((faker or _default_faker()).unix_time())
 
 
-def fake_file_path() -> str:
+def fake_file_path(*, faker: Optional["Faker"] = None) -> str:
     """Return random file path
     
     Returns:
         str -- File path
     """
-    return _faker.file_path()
+    return (faker or _default_faker()).file_path()
 
 
-def fake_process_name() -> str:
+def fake_process_name(*, rng: Optional[random.Random] = None) -> str:
     """Return random process name
     
     Returns:
@@ -195,53 +300,53 @@ def fake_process_name() -> str:
         "php-fpm", "uwsgi", "gunicorn", "celery", "cron", "rsyslogd",
         "named", "ntpd", "dhcpd", "smbd", "vsftpd", "dovecot", "postfix"
     ]
-    return random.choice(processes)
+    return (rng or random).choice(processes)
 
 
-def fake_log_level() -> str:
+def fake_log_level(*, rng: Optional[random.Random] = None) -> str:
     """Return random log level
     
     Returns:
         str -- Log level
     """
     levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
-    return random.choice(levels)
+    return (rng or random).choice(levels)
 
 
-def fake_http_method() -> str:
+def fake_http_method(*, faker: Optional["Faker"] = None) -> str:
     """Return random HTTP method
     
     Returns:
         str -- HTTP method
     """
-    return _faker.http_method()
+    return (faker or _default_faker()).http_method()
 
 
-def fake_http_status_code() -> int:
+def fake_http_status_code(*, faker: Optional["Faker"] = None) -> int:
     """Return random HTTP status code
     
     Returns:
         int -- HTTP status code
     """
-    return int(_faker.http_status_code())
+    return int((faker or _default_faker()).http_status_code())
 
 
-def fake_user() -> str:
+def fake_user(*, faker: Optional["Faker"] = None) -> str:
     """Return random system username
     
     Returns:
         str -- Username
     """
-    return _faker.user_name()
+    return (faker or _default_faker()).user_name()
 
 
-def fake_country_code() -> str:
+def fake_country_code(*, faker: Optional["Faker"] = None) -> str:
     """Return random country code
     
     Returns:
         str -- Country code
     """
-    return _faker.country_code()
+    return (faker or _default_faker()).country_code()
 
 
 def format_date(*args) -> str:
@@ -254,7 +359,8 @@ def format_date(*args) -> str:
         str -- Formatted date string in UTC
     """
     if not args:
-        return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        return datetime.datetime.now(datetime.timezone.utc).strftime(
+            "%Y-%m-%d %H:%M:%S")
     return datetime.datetime.now(datetime.timezone.utc).strftime(args[0])
 
 
@@ -284,7 +390,48 @@ faker_http_status_code = fake_http_status_code
 faker_user = fake_user
 faker_country_code = fake_country_code
 
-def get_function(function_str: str, module: Any = sys.modules[__name__]) -> FunctionType:
+# Faker providers needed by functions
+FAKER_PROVIDERS: Dict[Callable[..., Any], Tuple[str, ...]] = {
+    fake_ip: ("internet",),
+    fake_ipv6: ("internet",),
+    fake_name: ("person",),
+    fake_user_agent: ("user_agent", "date_time"),
+    fake_uuid: ("misc",),
+    fake_email: ("internet", "person", "company"),
+    fake_url: ("internet", "person", "company"),
+    fake_hostname: ("internet", "person", "company"),
+    fake_mac: ("internet",),
+    fake_port: ("internet",),
+    fake_unix_time: ("date_time",),
+    fake_file_path: ("file", "lorem"),
+    fake_http_method: ("internet",),
+    fake_http_status_code: ("internet",),
+    fake_user: ("internet", "person"),
+    fake_country_code: ("address",),
+}
+
+
+def faker_providers(functions: Iterable[Callable[..., Any]]) -> Optional[List[str]]:
+    """Return the Faker providers needed by functions
+
+    Arguments:
+        functions {Iterable[Callable[..., Any]]} -- functions that use Faker
+
+    Returns:
+        Optional[List[str]] -- names of providers, None for all when a
+                               function is not known
+    """
+    providers = set()
+    for func in functions:
+        if func not in FAKER_PROVIDERS:
+            return None
+        providers.update(FAKER_PROVIDERS[func])
+    return sorted(providers)
+
+def get_function(
+    function_str: str,
+    module: Any = sys.modules[__name__],
+) -> FunctionType:
     """Return the function from its string name as func_name
     Example: with the name 'func_randint' you will get the function name 'randint'
     With the name 'func_fake_ip' you will get the function name 'fake_ip'
@@ -325,7 +472,8 @@ def get_function(function_str: str, module: Any = sys.modules[__name__]) -> Func
                     log.debug(f"Fallback extraction: {function_name}")
                     func = cast(FunctionType, getattr(module, function_name))
                 else:
-                    raise ValueError(f"Cannot extract function name from {function_str}")
+                    raise ValueError(
+                        f"Cannot extract function name from {function_str}")
         
         # Cache the function for future lookups
         _function_cache[function_str] = func
@@ -333,8 +481,9 @@ def get_function(function_str: str, module: Any = sys.modules[__name__]) -> Func
     except Exception as e:
         log.error(f"Error finding function '{function_str}': {e}")
         # List available functions for debugging
-        available_funcs = [name for name in dir(module) 
-                         if callable(getattr(module, name)) and not name.startswith('_')]
+        available_funcs = [
+            name for name in dir(module)
+            if callable(getattr(module, name)) and not name.startswith('_')]
         log.debug(f"Available functions: {available_funcs}")
         raise
 
@@ -414,7 +563,8 @@ def get_template_log(template: str, fields: Dict[str, Union[str, List[Any]]]) ->
 
     Arguments:
         template {str} -- template string in Python formatting string
-        fields {Dict[str, Union[str, List[Any]]]} -- dict field from pattern configuration file
+        fields {Dict[str, Union[str, List[Any]]]} -- dict field from pattern
+                                                     configuration file
 
     Returns:
         str -- random log generated from template
@@ -424,7 +574,10 @@ def get_template_log(template: str, fields: Dict[str, Union[str, List[Any]]]) ->
     return template.format(now, **values)
 
 
-def custom_log(level: str = "WARNING", name: Optional[str] = None) -> logging.Logger:  # pragma: no cover
+def custom_log(  # pragma: no cover
+    level: str = "WARNING",
+    name: Optional[str] = None,
+) -> logging.Logger:
     """Configure and return a logger with custom formatting
     
     Arguments:
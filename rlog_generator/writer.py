@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2019-2025 Würth Phoenix S.r.l.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Shared writers for rlog_generator.
+
+When more patterns, or shards of a pattern, write to the same
+destination, each of them sends its flushed chunks of whole lines to a
+bounded queue and a single writer thread drains the queue, joining the
+chunks waiting in a single write. Lines of different patterns are never
+mixed, and a slow disk fills the queue instead of slowing the generators
+until the queue is full.
+"""
+
+import logging
+import os
+import queue
+import threading
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from . import sinks
+
+
+# max chunks waiting in the queue of a destination
+QUEUE_SIZE = 1024
+
+# max bytes joined in a single write
+COALESCE_BYTES = 1024 * 1024
+
+# bytes buffered by a QueueWriter before it sends them without flush
+MAX_PENDING_BYTES = 1024 * 1024
+
+
+log = logging.getLogger(__name__)
+
+
+class QueueWriter:
+    """File-like object that sends written chunks to a queue each time
+    it is flushed, or when too many bytes are pending. Used by patterns
+    that share an output, which is written only by a SharedWriter.
+    """
+
+    def __init__(self, queue: Any, max_pending: int = MAX_PENDING_BYTES) -> None:
+        self._queue = queue
+        self._max_pending = max_pending
+        self._buffer: List[str] = []
+        self._size = 0
+
+    def write(self, data: str) -> int:
+        self._buffer.append(data)
+        self._size += len(data)
+        if self._size >= self._max_pending:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._queue.put("".join(self._buffer))
+            self._buffer = []
+            self._size = 0
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "QueueWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def destination(pattern_conf: Dict[str, Any]) -> Optional[Tuple[str, ...]]:
+    """Return the key of the destination of a pattern, None when its
+    writes don't need to be serialized, as datagrams and pooled TCP sends
+
+    Arguments:
+        pattern_conf {Dict[str, Any]} -- Python object of configuration pattern
+
+    Returns:
+        Optional[Tuple[str, ...]] -- key of destination
+    """
+    sink_type = sinks.output_conf(pattern_conf)["type"]
+    if sink_type in (sinks.FILE, sinks.FIFO):
+        return (sink_type, os.path.realpath(pattern_conf["path"]))
+    if sink_type == sinks.STDOUT:
+        return (sink_type,)
+    return None
+
+
+class SharedWriter:
+    """Thread that writes to a destination the chunks of all patterns
+    sharing it, until stopped
+    """
+
+    def __init__(self, name: str, f: TextIO, chunks: Any) -> None:
+        """
+        Arguments:
+            name {str} -- name of destination, for logging
+            f {TextIO} -- output opened for the patterns
+            chunks {Any} -- queue of chunks, a multiprocessing Manager
+                            queue when patterns run in processes
+        """
+        self.name = name
+        self.queue = chunks
+        self._f = f
+        self.chunks = 0
+        self.writes = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "SharedWriter":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Write all chunks sent, then close the output"""
+        self.queue.put(None)
+        self._thread.join()
+        log.info(
+            f"Shared writer of {self.name}: {self.chunks} chunks "
+            f"in {self.writes} writes")
+
+    def _run(self) -> None:
+        get = self.queue.get
+        get_nowait = self.queue.get_nowait
+        f = self._f
+        stopped = False
+
+        try:
+            while not stopped:
+                chunk = get()
+                if chunk is None:
+                    break
+                chunks = [chunk]
+                size = len(chunk)
+                # join all chunks already waiting
+                while size < COALESCE_BYTES:
+                    try:
+                        chunk = get_nowait()
+                    except queue.Empty:
+                        break
+                    if chunk is None:
+                        stopped = True
+                        break
+                    chunks.append(chunk)
+                    size += len(chunk)
+
+                f.write("".join(chunks))
+                f.flush()
+                self.chunks += len(chunks)
+                self.writes += 1
+        except Exception as e:
+            log.error(f"Error writing {self.name}: {e}")
+            # discard chunks, so patterns are not blocked on a full queue
+            while not stopped and get() is not None:
+                pass
+        finally:
+            f.close()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+from rlog_generator import backfill
+
+START = 1735689600.0
+
+
+def test_timestamps_count():
+    assert len(list(backfill.timestamps(START, START + 60, 2000))) == 120000
+    assert len(list(backfill.timestamps(START, START + 60, 10))) == 600
+    assert len(list(backfill.timestamps(START, START + 60, 7))) == 420
+
+
+def test_timestamps_no_drift():
+    ts = list(backfill.timestamps(START, START + 3600, 1000))
+    assert ts[0] == START
+    assert ts[1000] == START + 1
+    assert ts[-1] == START + 3600 - 0.001
+    assert all(START <= i < START + 3600 for i in ts)
+
+
+def test_count_timestamps_matches():
+    for eps in (0.5, 3, 10, 333, 2000):
+        expected = backfill.count_timestamps(START, START + 61, eps)
+        assert len(list(backfill.timestamps(START, START + 61, eps))) == expected
+
+
+def test_timestamps_jitter():
+    rng = random.Random(1)
+    ts = list(backfill.timestamps(START, START + 10, 10, jitter=0.5, rng=rng))
+    assert len(ts) == 100
+    for i, value in enumerate(ts):
+        assert START + i / 10 <= value < START + i / 10 + 0.05
+
+
+def test_timestamps_diurnal_day():
+    # the shape averages 1 over a day
+    ts = list(backfill.timestamps(START, START + 86400, 2, diurnal=0.5))
+    assert abs(len(ts) - 172800) <= 1
+    assert ts == sorted(ts)
+
+
+def test_timestamps_diurnal_full_amplitude():
+    # at the trough the interval is bounded, it doesn't skip the range
+    ts = list(backfill.timestamps(START, START + 86400, 1, diurnal=1, peak_hour=12))
+    assert abs(len(ts) - 86400) < 100
+    assert ts[-1] > START + 86400 - 100
+    gaps = [b - a for a, b in zip(ts, ts[1:])]
+    assert max(gaps) <= 1 / backfill.MIN_DIURNAL_FACTOR
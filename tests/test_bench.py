@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+from rlog_generator import bench
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), os.pardir, "examples")
+
+
+def test_run_bench_examples():
+    result = bench.run_bench([EXAMPLES], events=20)
+
+    assert result["events"] == 20
+    assert result["sink"] == bench.NULL
+    assert result["peak_rss_kb"] is None or result["peak_rss_kb"] > 0
+    assert len(result["results"]) == len(bench.load_patterns([EXAMPLES]))
+
+    for i in result["results"]:
+        assert "error" not in i, i
+        assert i["events"] == 20
+        assert i["bytes"] > 0
+        assert i["lines_per_sec"] > 0
+        assert set(i["us_per_line"]) == {"generate", "format", "write", "total"}
+        assert "peak_rss_kb" not in i
+
+
+def test_memory_sink_report_compare(tmp_path):
+    result = bench.run_bench([EXAMPLES], events=10, sink=bench.MEMORY)
+    assert all(i["bytes"] > 0 for i in result["results"])
+
+    path = str(tmp_path / "bench.json")
+    bench.save(result, path)
+    previous = bench.load(path)
+    assert previous == json.loads(json.dumps(result))
+
+    report = bench.format_report(result, previous).splitlines()
+    assert report[0].split()[-1] == "change"
+    assert len(report) == len(result["results"]) + 3
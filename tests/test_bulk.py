@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+from rlog_generator import bulk, compiler
+
+
+def test_randip_bulk_first_octet():
+    ips = bulk.randip_bulk(20000, random.Random(1))
+    assert len(ips) == 20000
+    assert "0.0.0.0" not in ips
+    # like utils.randip, only 0.0.0.0 is excluded
+    assert any(i.startswith("0.") for i in ips)
+
+
+def test_fake_ip_bulk_reserved():
+    ips = bulk.fake_ip_bulk(20000, random.Random(1))
+    assert len(ips) == 20000
+    first = {int(i.split(".")[0]) for i in ips}
+    assert not first & {0, 127} and max(first) < 224
+
+
+def test_pooled_bulk():
+    calls = []
+
+    def generator():
+        calls.append(None)
+        return len(calls)
+
+    draw = bulk.pooled_bulk(generator, 10, random.Random(1))
+    assert not calls
+    values = draw(100) + draw(100)
+    assert len(calls) == 10
+    assert len(values) == 200
+    assert set(values) <= set(range(1, 11))
+
+
+def test_user_agent_pool():
+    context = compiler.Context(seed=1)
+    generator = compiler.compile_function("func_fake_user_agent", context)
+    assert len({generator() for _ in range(10000)}) <= bulk.FAKER_POOL_SIZE
+
+
+def test_user_agent_cardinality_without_pool(monkeypatch):
+    def pooled_bulk(*args, **kwargs):
+        raise AssertionError("the pool of cardinality is drawn from a pool")
+
+    monkeypatch.setattr(bulk, "pooled_bulk", pooled_bulk)
+    context = compiler.Context(seed=1)
+    field = {"value": "func_fake_user_agent", "cardinality": 20}
+    generator = compiler.compile_field("user_agent", field, context)
+    assert len({generator() for _ in range(2000)}) == 20
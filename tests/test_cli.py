@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import subprocess
+import sys
+
+from click.testing import CliRunner
+
+from rlog_generator import cli
+
+PATTERN = """\
+name: p
+enabled: true
+generator_type: template
+output: stdout
+template: ['{status}']
+fields:
+  status: [200, 404]
+"""
+
+
+def test_validate_group_patterns(tmp_path):
+    (tmp_path / "p.yml").write_text(PATTERN)
+    runner = CliRunner()
+    for args in (["-p", str(tmp_path), "validate"], ["validate", "-p", str(tmp_path)]):
+        result = runner.invoke(cli.main, args)
+        assert result.exit_code == 0, result.output
+        assert "1 enabled patterns, 0 with errors" in result.output
+
+
+def test_validate_no_patterns(tmp_path):
+    result = CliRunner().invoke(cli.main, ["-p", str(tmp_path), "validate"])
+    assert result.exit_code == 1
+    assert "0 enabled patterns" in result.output
+
+
+def test_validate_errors(tmp_path):
+    (tmp_path / "p.yml").write_text(PATTERN.replace("{status}", "{missing}"))
+    result = CliRunner().invoke(cli.main, ["-p", str(tmp_path), "validate"])
+    assert result.exit_code == 1
+    assert "1 with errors" in result.output
+
+
+def test_plan_group_patterns(tmp_path):
+    (tmp_path / "p.yml").write_text(PATTERN)
+    result = CliRunner().invoke(cli.main, ["-p", str(tmp_path), "plan", "-s", "0.05"])
+    assert result.exit_code == 0, result.output
+    assert "1 enabled patterns" in result.output
+
+
+def test_bench_group_patterns(tmp_path):
+    (tmp_path / "p.yml").write_text(PATTERN)
+    runner = CliRunner()
+    for args in (["-p", str(tmp_path), "bench"], ["bench", "-p", str(tmp_path)]):
+        result = runner.invoke(cli.main, args + ["-n", "10"])
+        assert result.exit_code == 0, result.output
+        assert result.output.splitlines()[1].startswith("p ")
+
+
+def test_startup_imports():
+    # modules of optional paths aren't imported at every start
+    code = (
+        "import sys, rlog_generator.cli; "
+        "print(' '.join(sorted(sys.modules)))")
+    modules = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True,
+        check=True).stdout.split()
+    for i in ("numpy", "http.server", "asyncio", "rlog_generator.distributed",
+              "rlog_generator.multiplexer"):
+        assert i not in modules
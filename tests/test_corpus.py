@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from rlog_generator import corpus
+
+LINES = ["2024-01-01T00:00:00 a", "no stamp b", "2024-01-01T00:00:01 c"]
+
+
+def joined(views):
+    return b"".join(bytes(i) for i in views).decode()
+
+
+def test_take_each_patches_each_line():
+    c = corpus.Corpus("test", LINES)
+    assert joined(c.take_each([0.0, 1.0, 2.0])) == (
+        "1970-01-01T00:00:00 a\nno stamp b\n1970-01-01T00:00:02 c\n")
+
+
+def test_take_each_wraps():
+    c = corpus.Corpus("test", LINES)
+    c.take_each([0.0, 1.0])
+    views = c.take_each([60.0, 61.0])
+    assert len(views) == 2
+    assert joined(views) == "1970-01-01T00:01:00 c\n1970-01-01T00:01:01 a\n"
+
+
+def test_take_each_too_many_timestamps():
+    c = corpus.Corpus("test", LINES)
+    with pytest.raises(ValueError):
+        c.take_each([0.0] * 4)
+
+
+def test_take_wraps_around():
+    c = corpus.Corpus("test", LINES)
+    text = joined(c.take(4, 3600.0))
+    assert text.splitlines() == [
+        "1970-01-01T01:00:00 a", "no stamp b", "1970-01-01T01:00:00 c",
+        "1970-01-01T01:00:00 a"]
+    assert joined(c.take(1, 0.0)) == "no stamp b\n"
+
+
+def test_lines_without_timestamps():
+    c = corpus.Corpus("test", ["a", "b"])
+    assert joined(c.take(3, 0.0)) == "a\nb\na\n"
+    assert joined(c.take_each([0.0])) == "b\n"
+
+
+def test_no_lines():
+    with pytest.raises(ValueError):
+        corpus.Corpus("test", [])
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import subprocess
+import sys
+import threading
+
+from rlog_generator import distributed
+from rlog_generator import rlog_generator as generator
+
+
+def _pattern(**kwargs):
+    conf = {"name": "p", "output": "stdout", "seed": 1}
+    conf.update(kwargs)
+    return conf
+
+
+def test_split_eps():
+    confs = distributed.split_pattern(_pattern(eps=100), 3)
+    assert [i["eps"] for i in confs] == [34, 33, 33]
+    assert len({i["seed"] for i in confs}) == 3
+
+
+def test_split_low_eps():
+    confs = distributed.split_pattern(_pattern(eps=2), 4, offset=3)
+    assert [i is not None for i in confs] == [True, False, False, True]
+    assert sum(i["eps"] for i in confs if i is not None) == 2
+
+
+def test_split_file_paths():
+    conf = _pattern(eps=10, output="file", path="/tmp/a.log")
+    confs = distributed.split_pattern(conf, 2)
+    assert confs[0]["path"] != confs[1]["path"]
+
+
+def test_split_timed_replay():
+    replay = {"file": "a.log", "speed": 10}
+    conf = _pattern(generator_type="replay", replay=replay, eps=100)
+    confs = distributed.split_pattern(conf, 3)
+    assert [(i["shard"], i["shards"], i["eps"]) for i in confs] == [
+        (0, 3, 100), (1, 3, 100), (2, 3, 100)]
+
+    # without eps the replay runs on all workers too
+    conf = _pattern(generator_type="replay", replay=replay)
+    confs = distributed.split_pattern(conf, 2)
+    assert [(i["shard"], i["shards"]) for i in confs] == [(0, 2), (1, 2)]
+
+    # a worker with the process executor keeps its part
+    assert generator.shard_pattern(confs[1], generator.DEFAULT_SHARD_EPS) == [confs[1]]
+
+
+def test_assign_patterns():
+    patterns = {"a": _pattern(eps=1), "b": _pattern(eps=1)}
+    assignments = distributed.assign_patterns(patterns, 2)
+    assert [sorted(i) for i in assignments] == [["a"], ["b"]]
+
+
+PATTERN = """\
+name: {name}
+enabled: true
+generator_type: template
+path: {path}
+eps: {eps}
+template: ['{{n}}']
+fields:
+  n: func_randint 0 1000000
+"""
+
+
+def test_controller_two_workers(tmp_path, monkeypatch):
+    patterns = tmp_path / "patterns"
+    patterns.mkdir()
+    for name, eps in (("a", 10), ("b", 1)):
+        path = tmp_path / "out" / f"{name}.log"
+        (patterns / f"{name}.yml").write_text(
+            PATTERN.format(name=name, path=path, eps=eps))
+
+    # the ephemeral port of controller, known when it listens
+    listening = threading.Event()
+    addresses = []
+
+    class Listener(distributed.Listener):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            addresses.append(self.address)
+            listening.set()
+
+    monkeypatch.setattr(distributed, "Listener", Listener)
+    results = []
+    start = datetime.datetime(2025, 1, 1)
+
+    def run():
+        results.append(distributed.run_controller(
+            str(patterns), 2, "secret", port=0, start_delay=0,
+            backfill_range=(start, start + datetime.timedelta(minutes=1)),
+            pattern_cache=False))
+
+    controller = threading.Thread(target=run)
+    controller.start()
+    assert listening.wait(10)
+
+    host, port = addresses[0]
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "rlog_generator.cli", "worker", "--secret", "secret",
+             "--host", host, "--port", str(port), "--name", f"w{i}"],
+            stdout=subprocess.PIPE, text=True)
+        for i in range(2)]
+    outputs = [i.communicate(timeout=60)[0] for i in workers]
+    controller.join(60)
+
+    assert [i.returncode for i in workers] == [0, 0]
+    generated = [int(i.split("Generated ")[1].split()[0]) for i in outputs]
+    # a at 10 eps split 5 + 5, b at 1 eps on a worker only
+    assert sorted(generated) == [300, 360]
+    assert results == [660]
+
+    out = tmp_path / "out"
+    lines = {i.name: len(i.read_text().splitlines()) for i in out.iterdir()}
+    assert lines == {"a.0.log": 300, "a.1.log": 300, "b.log": 60}
+    # each part has its own seed
+    assert (out / "a.0.log").read_text() != (out / "a.1.log").read_text()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from rlog_generator import formats
+
+VALUES = ["a\nb", 'say "hi"] \\ done\r\n', 3]
+
+
+def test_json():
+    fmt, serialize = formats.compile_format("json", "p", ["msg", "text", "n"])
+    assert fmt == formats.ISO_8601
+    line = serialize("2025-01-01T00:00:00.000000Z", VALUES)
+    assert "\n" not in line
+    assert json.loads(line) == {
+        "@timestamp": "2025-01-01T00:00:00.000000Z", "msg": "a\nb",
+        "text": VALUES[1], "n": 3}
+
+
+def test_rfc5424_escapes():
+    _, serialize = formats.compile_format(
+        "rfc5424", "p", ["host", "msg", "text", "n"],
+        {"hostname": "host", "message": "msg"})
+    line = serialize("2025-01-01T00:00:00.000000Z", ["my host\n"] + VALUES)
+    assert "\n" not in line and "\r" not in line
+    assert line == (
+        '<14>1 2025-01-01T00:00:00.000000Z my_host_ p - - '
+        '[fields@32473 text="say \\"hi\\"\\] \\\\ done\\r\\n" n="3"] a\\nb')
+
+
+def test_rfc5424_invalid_name():
+    with pytest.raises(ValueError):
+        formats.compile_format("rfc5424", "p", ["a b"])
+
+
+def test_cef_escapes():
+    _, serialize = formats.compile_format(
+        "cef", "p", ["name", "msg"], {"name": "name", "vendor": "A|B"})
+    line = serialize(1735689600000, ["x\ny", "k=v\r\n"])
+    assert line == "CEF:0|A\\|B|p|1.0|p|x y|5|rt=1735689600000 msg=k\\=v\\r\\n"
+
+
+def test_leef_escapes():
+    _, serialize = formats.compile_format("leef", "p", ["msg"], {"timestamp_field": ""})
+    assert serialize(None, ["a\tb\nc"]) == "LEEF:1.0|rlog_generator|p|1.0|p|msg=a b c"
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        formats.compile_format("xml", "p", [])
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+from rlog_generator import rlog_generator as generator
+
+
+def test_open_output_shared_new_folder(tmp_path, monkeypatch):
+    folder = tmp_path / "new" / "logs"
+    exists = generator.os.path.exists
+
+    # all patterns find the folder missing, like patterns started together
+    monkeypatch.setattr(
+        generator.os.path, "exists", lambda p: False if p == str(folder) else exists(p))
+    errors = []
+    barrier = threading.Barrier(4)
+
+    def open_pattern(i):
+        barrier.wait()
+        try:
+            conf = {"name": f"p{i}", "path": str(folder / f"p{i}.log")}
+            generator.open_output(conf, generator.FLUSH_LINE).close()
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_pattern, args=(i,)) for i in range(4)]
+    for i in threads:
+        i.start()
+    for i in threads:
+        i.join()
+    assert not errors
+    assert sorted(i.name for i in folder.iterdir()) == [f"p{i}.log" for i in range(4)]
+
+
+def test_shard_pattern_eps():
+    conf = {"name": "p", "output": "stdout", "eps": 10, "shards": 3, "seed": 1}
+    confs = generator.shard_pattern(conf, 100)
+    assert [i["eps"] for i in confs] == [4, 3, 3]
+    assert [i["shard"] for i in confs] == [0, 1, 2]
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from rlog_generator import backfill, rotation
+
+START = 1735689600.0
+
+PATTERN = {
+    "name": "p",
+    "enabled": True,
+    "generator_type": "template",
+    "template": ["{timestamp}"],
+    "fields": {"timestamp": "func_format_date %s"},
+    "eps": 0.1,
+    "rotate_interval": 3600,
+}
+
+
+def test_rotate_bytes_encoded(tmp_path):
+    path = str(tmp_path / "p.log")
+    f = rotation.RotatingFile(path, max_bytes=12)
+    # 3 characters, 5 bytes
+    for _ in range(3):
+        f.write("éé\n")
+    f.close()
+    assert f.rotations == 1
+    with open(path + ".1", "rb") as segment:
+        assert segment.read() == "éé\néé\n".encode()
+    with open(path, "rb") as current:
+        assert current.read() == "éé\n".encode()
+
+
+def test_rotate_interval_clock(tmp_path):
+    path = str(tmp_path / "p.log")
+    now = [0.0]
+    f = rotation.RotatingFile(path, interval=60, clock=lambda: now[0])
+    for i in (0, 30, 59, 61, 100, 121):
+        now[0] = i
+        f.write(f"{i}\n")
+    f.close()
+    assert f.rotations == 2
+    assert (tmp_path / "p.log.2").read_text() == "0\n30\n59\n"
+    assert (tmp_path / "p.log.1").read_text() == "61\n100\n"
+    assert (tmp_path / "p.log").read_text() == "121\n"
+
+
+def test_backfill_rotate_interval_log_time(tmp_path):
+    path = tmp_path / "p.log"
+    conf = dict(PATTERN, path=str(path), backfill=(START, START + 3 * 3600))
+    started = time.monotonic()
+    assert backfill.backfill_generator(conf) == 1080
+    assert time.monotonic() - started < 3600
+
+    # a segment for each hour of logs, though the run lasts less
+    segments = [tmp_path / "p.log.2", tmp_path / "p.log.1", path]
+    for hour, segment in enumerate(segments):
+        stamps = [int(i) for i in segment.read_text().split()]
+        assert len(stamps) == 360
+        assert all(START + hour * 3600 <= i < START + (hour + 1) * 3600 for i in stamps)
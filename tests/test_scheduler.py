@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from rlog_generator import scheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make(eps, total, clock, **kwargs):
+    return scheduler.RateScheduler(
+        "test", eps, total, clock=clock.clock, sleep=clock.sleep, **kwargs)
+
+
+def test_one_event_at_deadline():
+    clock = FakeClock()
+    rate = make(10, 5, clock)
+    for i in range(5):
+        assert rate.next_batch() == 1
+        assert clock.now == pytest.approx(i / 10)
+    assert rate.next_batch() == 0
+    assert clock.now == pytest.approx(0.5)
+    assert rate.emitted == 5
+    assert rate.dropped == 0
+
+
+def test_tick_batches():
+    clock = FakeClock()
+    rate = make(100, 50, clock, tick=0.1)
+    counts = []
+    while True:
+        count = rate.next_batch()
+        if not count:
+            break
+        counts.append(count)
+    assert sum(counts) == 50
+    assert len(counts) <= 6
+    assert rate.emitted == 50
+
+
+def test_catch_up_emits_late_events():
+    clock = FakeClock()
+    rate = make(10, 100, clock)
+    rate.begin(0.0)
+    assert rate.take(5.0) == 1
+    assert rate.index == 1
+    assert rate.dropped == 0
+    assert rate.late == 1
+
+
+def test_shed_drops_late_events():
+    clock = FakeClock()
+    rate = make(10, 100, clock, policy=scheduler.SHED, max_lag=0.5)
+    rate.begin(0.0)
+    assert rate.take(5.0) == 1
+    assert rate.dropped == 46
+    assert rate.emitted == 1
+    assert rate.index == 47
+
+
+def test_shed_all_events():
+    clock = FakeClock()
+    rate = make(10, 10, clock, policy=scheduler.SHED, max_lag=0.5)
+    rate.begin(0.0)
+    assert rate.take(60.0) == 0
+    assert rate.dropped == 10
+    assert rate.emitted == 0
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"eps": 0}, {"eps": 10, "policy": "drop"}, {"eps": 10, "max_lag": -1}])
+def test_invalid_parameters(kwargs):
+    with pytest.raises(ValueError):
+        scheduler.RateScheduler("test", total=10, **kwargs)
+
+
+def test_percentile():
+    values = [float(i) for i in range(1, 101)]
+    assert scheduler.percentile(values, 50) == 50
+    assert scheduler.percentile(values, 99) == 99
+    assert scheduler.percentile(values, 100) == 100
+    assert scheduler.percentile([], 50) == 0
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import json
+import re
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from rlog_generator import sinks
+
+RFC5424_HEADER = re.compile(rb"^<14>1 \d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ host p - - - ")
+RFC3164_HEADER = re.compile(rb"^<11>[A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d host p: ")
+
+
+def udp_server():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(5)
+    return server
+
+
+def tcp_server():
+    # bound, but refusing connections until listen
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(5)
+    return server
+
+
+def recv_all(server, size):
+    conn, _ = server.accept()
+    conn.settimeout(5)
+    data = b""
+    while len(data) < size:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    conn.close()
+    return data
+
+
+def octets(data):
+    messages = []
+    while data:
+        size, _, data = data.partition(b" ")
+        messages.append(data[:int(size)])
+        data = data[int(size):]
+    return messages
+
+
+def test_udp_datagram_per_log():
+    server = udp_server()
+    header = sinks.SyslogHeader(hostname="host", app_name="p")
+    with sinks.UdpSink(*server.getsockname(), header=header) as sink:
+        sink.write("first\nsecond\nthi")
+        sink.write("rd\n")
+    datagrams = [server.recv(65536) for _ in range(3)]
+    server.close()
+
+    assert all(RFC5424_HEADER.match(i) for i in datagrams)
+    assert [RFC5424_HEADER.sub(b"", i) for i in datagrams] == [
+        b"first", b"second", b"third"]
+
+
+def test_udp_batch_datagram_bytes():
+    server = udp_server()
+    lines = [f"log {i:04d}" for i in range(100)]
+    with sinks.UdpSink(*server.getsockname(), batch=True, datagram_bytes=100) as sink:
+        sink.write("\n".join(lines) + "\n")
+    received = []
+    while len(received) < len(lines):
+        datagram = server.recv(65536)
+        assert len(datagram) <= 100
+        received.extend(datagram.decode().split("\n"))
+    server.close()
+    assert received == lines
+
+
+def test_tcp_octet_counting():
+    server = tcp_server()
+    server.listen()
+    pool = sinks.ConnectionPool(*server.getsockname())
+    header = sinks.SyslogHeader(
+        sinks.HEADER_RFC3164, facility=1, severity=3, hostname="host", app_name="p")
+    lines = ["a", "with spaces", "ünïcode"]
+    sink = sinks.TcpSink(pool, header=header)
+    sink.write("\n".join(lines) + "\n")
+    size = len(sink._buffer)
+    sink.close()
+    messages = octets(recv_all(server, size))
+    pool.close()
+    server.close()
+
+    assert all(RFC3164_HEADER.match(i) for i in messages)
+    assert [RFC3164_HEADER.sub(b"", i).decode() for i in messages] == lines
+
+
+def test_tcp_lf_raw():
+    server = tcp_server()
+    server.listen()
+    pool = sinks.ConnectionPool(*server.getsockname())
+    data = "one\ntwo 2\n"
+    with sinks.TcpSink(pool, framing=sinks.LF) as sink:
+        sink.write(data)
+    assert recv_all(server, len(data)) == data.encode()
+    pool.close()
+    server.close()
+
+
+def test_tcp_reconnect():
+    server = tcp_server()
+    pool = sinks.ConnectionPool(*server.getsockname(), reconnect_ms=20)
+    sender = threading.Thread(target=pool.send, args=(b"5 hello",))
+    sender.start()
+    # the first connections are refused
+    while pool.reconnects < 2 and sender.is_alive():
+        sender.join(0.01)
+    server.listen()
+    sender.join(5)
+    assert recv_all(server, 7) == b"5 hello"
+    assert not sender.is_alive()
+    pool.close()
+    server.close()
+
+
+def test_tcp_retries():
+    server = tcp_server()
+    pool = sinks.ConnectionPool(*server.getsockname(), reconnect_ms=1, retries=2)
+    with pytest.raises(ConnectionError):
+        pool.send(b"5 hello")
+    assert pool.reconnects == 3
+    server.close()
+    assert sinks.ConnectionPool("127.0.0.1", 1).retries == sinks.DEFAULT_RETRIES
+
+
+def test_output_conf_header():
+    conf = {"name": "p", "output": {"type": "syslog_udp", "host": "h", "port": 514}}
+    assert sinks.output_conf(conf)["header"] == sinks.HEADER_RFC5424
+    conf = dict(conf, format="rfc5424")
+    assert sinks.output_conf(conf)["header"] == sinks.HEADER_NONE
+
+    conf["output"]["header"] = "cef"
+    with pytest.raises(ValueError, match="header must be"):
+        sinks.output_conf(conf)
+
+
+class Elasticsearch(BaseHTTPRequestHandler):
+    """Mock of _bulk: statuses of items are taken from server.script,
+    one list for each request, 201 for all items when it's empty
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        lines = body.decode().splitlines()
+        documents = [json.loads(i) for i in lines[1::2]]
+        with self.server.lock:
+            self.server.requests.append((self.path, documents))
+            script = self.server.script.pop(0) if self.server.script else None
+
+        if isinstance(script, int):
+            return self.reply(script, {"error": "scripted"})
+        items = []
+        for i, action in enumerate(lines[::2]):
+            status = script[i] if script else 201
+            result = {"status": status}
+            if status >= 300:
+                result["error"] = {"type": "scripted"}
+            items.append({next(iter(json.loads(action))): result})
+        self.reply(200, {"errors": bool(script), "items": items})
+
+    def reply(self, status, response):
+        data = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def es():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Elasticsearch)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.script = []
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    pool = sinks.HttpPool("http://%s:%d" % server.server_address, size=2)
+    yield server, pool
+    pool.close()
+    server.shutdown()
+    server.server_close()
+
+
+def bulk_sink(pool, **kwargs):
+    kwargs.setdefault("backoff_ms", 1)
+    return sinks.BulkSink(pool, "logs-test", name="p", **kwargs)
+
+
+def test_bulk_batch_events(es):
+    server, pool = es
+    sink = bulk_sink(pool, batch_events=3)
+    sink.write("".join(f"log {i}\n" for i in range(7)))
+    sink.close()
+
+    assert sorted(len(i) for _, i in server.requests) == [1, 3, 3]
+    path, documents = server.requests[0]
+    assert path.startswith("/logs-test/_bulk?filter_path=")
+    assert set(documents[0]) == {"@timestamp", "message"}
+    messages = sorted(j["message"] for _, i in server.requests for j in i)
+    assert messages == [f"log {i}" for i in range(7)]
+    assert sink.indexed == 7
+
+
+def test_bulk_documents(es):
+    server, pool = es
+    sink = bulk_sink(pool, documents=True, compress=False, data_stream=True)
+    sink.write('{"a": 1, "b": "x"}\n')
+    sink.close()
+    assert server.requests[0][1] == [{"a": 1, "b": "x"}]
+
+
+def test_bulk_batch_interval(es):
+    server, pool = es
+    sink = bulk_sink(pool, batch_interval=60)
+    sink.write("first\nsecond\n")
+    sink.flush()
+    assert len(sink._items) == 2
+
+    sink.batch_interval = 0
+    sink.flush()
+    assert not sink._items
+    sink.close()
+    assert [len(i) for _, i in server.requests] == [2]
+
+
+def test_bulk_close_flushes_batch(es):
+    server, pool = es
+    sink = bulk_sink(pool)
+    sink.write("first\nsecond\nincomplete")
+    assert not server.requests
+    sink.close()
+    assert [len(i) for _, i in server.requests] == [2]
+
+
+def test_bulk_retry_429(es):
+    server, pool = es
+    server.script = [[429, 201, 429], 429]
+    sink = bulk_sink(pool)
+    sink.write("a\nb\nc\n")
+    sink.close()
+
+    sent = [[j["message"] for j in i] for _, i in server.requests]
+    assert sent == [["a", "b", "c"], ["a", "c"], ["a", "c"]]
+    assert (sink.indexed, sink.rejected, sink.retried) == (3, 0, 2)
+
+
+def test_bulk_rejected(es):
+    server, pool = es
+    server.script = [[201, 400, 409]]
+    sink = bulk_sink(pool)
+    sink.write("a\nb\nc\n")
+    sink.close()
+    assert len(server.requests) == 1
+    assert (sink.indexed, sink.rejected, sink.retried) == (1, 2, 0)
+
+
+def test_bulk_errors(es):
+    server, pool = es
+    server.script = [503, 503]
+    sink = bulk_sink(pool, retries=1)
+    sink.write("a\n")
+    with pytest.raises(ConnectionError, match="after 2 attempts"):
+        sink.close()
+
+    server.script = [404]
+    sink = bulk_sink(pool)
+    sink.write("a\n")
+    with pytest.raises(ValueError, match="HTTP 404"):
+        sink.close()